@@ -9,6 +9,18 @@ from AlgorithmImports import *
 import config as c
 import variables as v
 import numpy as np
+from fundamentalCache import FundamentalColumns, FundamentalSnapshot
+
+def smallestK(values, k, ordered=False):
+    # Indices of the k smallest values, in O(n) with argpartition instead of a full sort.
+    # NaN sorts last. ordered=True returns them smallest first.
+    if k >= len(values):
+        indices = np.arange(len(values))
+    else:
+        indices = np.argpartition(values, k)[:k]
+    if ordered:
+        indices = indices[np.argsort(values[indices], kind='stable')]
+    return indices
 
 class AddUniverseHandler:
     def __init__(self, algorithm):
@@ -18,30 +30,30 @@ class AddUniverseHandler:
 
         # If c.symbol_filter_condition_static_universe == True,
         # create a Static Symbol Universe.
-        self.algorithm.Debug(f"Creating Universe...")
-        self.algorithm.Debug(f"---- Static Universe (c.symbol_filter_condition_static_universe) = {c.symbol_filter_condition_static_universe}")
+        v.log.info("AddUniverse", "Creating Universe...")
+        v.log.info("AddUniverse", "---- Static Universe (c.symbol_filter_condition_static_universe) = {}", c.symbol_filter_condition_static_universe)
         if c.symbol_filter_condition_static_universe == True: 
             for x in c.symbol_filter_parameter_static_universe:
-                self.algorithm.AddEquity(x.Symbol, c.finest_resolution)
-                self.algorithm.initializeIndicators(x.Symbol)
-                self.algorithm.Debug(f"-------- Static Universe Updated: +{x.Symbol}")
+                self.algorithm.AddEquity(x, c.finest_resolution)
+                    # Indicators and consolidators are set up in OnSecuritiesChanged.
+                v.log.info("AddUniverse", "-------- Static Universe Updated: +{}", x)
 
         elif not c.symbol_filter_condition_static_universe: 
             # If c.symbol_filter_condition_static_universe not == True,
             # create a Dynamic Symbol Universe.
             
-            self.algorithm.Debug(f"---- Extended Market Hours (c.symbol_filter_condition_extended_market_hours) = {c.symbol_filter_condition_extended_market_hours}")
+            v.log.info("AddUniverse", "---- Extended Market Hours (c.symbol_filter_condition_extended_market_hours) = {}", c.symbol_filter_condition_extended_market_hours)
             self.algorithm.UniverseSettings.ExtendedMarketHours = (
                 c.symbol_filter_condition_extended_market_hours
             ) # Enable or disable Extended Market Hours for the Universe.
 
-            self.algorithm.Debug(f"---- Finest Resolution (c.finest_resolution) = {c.finest_resolution}")
+            v.log.info("AddUniverse", "---- Finest Resolution (c.finest_resolution) = {}", c.finest_resolution)
             self.algorithm.UniverseSettings.Resolution = c.finest_resolution
                 # Sets Universe resolution. OnData will run and receive a 
                 # data slice once per minute 
                 # with data for each symbol in the dynamic universe.
 
-            self.algorithm.AddUniverse(lambda fundamental: self.algorithm.filterAndSortUniverse(fundamental))
+            self.algorithm.AddUniverse(self.filterAndSortUniverse)
                 # Run the built-in AddUniverse based on defined filter filterAndSortUniverse.            
     
     def filterAndSortUniverse(self, fundamental: List[Fundamental]) -> List[Symbol]:
@@ -55,62 +67,62 @@ class AddUniverseHandler:
         ) # Set max price of symbols in the universe to what's defined in config.py, 
           # if not then 95%.
 
-        self.algorithm.Debug(f"---- Symbol Price Range --------------------------- ${c.symbol_filter_parameter_min_price} - ${v.max_symbol_price}")
-        self.algorithm.Debug(f"---- P/E Ratio Range ------------------------------ {c.symbol_filter_parameter_min_pe_ratio} to {c.symbol_filter_parameter_max_pe_ratio}")
-        self.algorithm.Debug(f"---- Min Annual Revenue Growth % ------------------ {c.symbol_filter_parameter_min_revenue_growth_percent}")        
-        self.algorithm.Debug(f"---- Extended Market Hours Enabled ---------------- {c.symbol_filter_condition_extended_market_hours}")        
+        v.log.debug("AddUniverse.filterAndSortUniverse", "---- Symbol Price Range --------------------------- ${} - ${}", c.symbol_filter_parameter_min_price, v.max_symbol_price)
+        v.log.debug("AddUniverse.filterAndSortUniverse", "---- P/E Ratio Range ------------------------------ {} to {}", c.symbol_filter_parameter_min_pe_ratio, c.symbol_filter_parameter_max_pe_ratio)
+        v.log.debug("AddUniverse.filterAndSortUniverse", "---- Min Annual Revenue Growth % ------------------ {}", c.symbol_filter_parameter_min_revenue_growth_percent)        
+        v.log.debug("AddUniverse.filterAndSortUniverse", "---- Extended Market Hours Enabled ---------------- {}", c.symbol_filter_condition_extended_market_hours)        
 
         # Filter symbols by fundamentals
         try:
-            filtered_symbols = [
-                f for f in fundamental
-                if (
-                    f.HasFundamentalData
-                    and not np.isnan(f.MarketCap) and f.MarketCap > 0
-                    and not np.isnan(f.DollarVolume) and f.DollarVolume > 0
-                    and f.Price <= v.max_symbol_price
-                    and (not c.symbol_filter_condition_blacklist 
-                         or f.Symbol not in c.symbol_filter_parameter_blacklist)
-                    and (not c.symbol_filter_condition_min_price or 
-                         c.symbol_filter_parameter_min_price <= f.Price)
-                    and (not c.symbol_filter_condition_min_pe_ratio 
-                         or (c.symbol_filter_parameter_min_pe_ratio 
-                             < f.ValuationRatios.PERatio 
-                             and not np.isnan(f.ValuationRatios.PERatio) 
-                             and f.ValuationRatios.PERatio != 0))
-                    and (not c.symbol_filter_condition_max_pe_ratio 
-                         or (c.symbol_filter_parameter_max_pe_ratio 
-                             > f.ValuationRatios.PERatio 
-                             and not np.isnan(f.ValuationRatios.PERatio) 
-                             and f.ValuationRatios.PERatio != 0))
-                    and (not c.symbol_filter_condition_min_revenue_growth_percent 
-                         or (c.symbol_filter_parameter_min_revenue_growth_percent 
-                             < f.OperationRatios.RevenueGrowth.OneYear 
-                             and not np.isnan(f.OperationRatios.RevenueGrowth.OneYear) 
-                             and f.OperationRatios.RevenueGrowth.OneYear != 0))
-                )
-            ]
-
-            # Sort symbols by Dollar Volume: Top 100
-            symbols_sorted_by_dollar_volume = sorted(
-                filtered_symbols, 
-                key=lambda f: f.DollarVolume, 
-                reverse=True)[:100]
-
-            # Sort symbols by Price-to-Earnings Ratio: Top 50
-            symbols_sorted_by_pe_ratio = sorted(
-                symbols_sorted_by_dollar_volume, 
-                key=lambda f: f.ValuationRatios.PERatio, 
-                reverse=False)[:50]
-
-            # Sort symbols by market cap: Bottom 10
-            symbols_sorted_by_market_cap = sorted(
-                symbols_sorted_by_pe_ratio, 
-                key=lambda f: f.MarketCap, 
-                reverse=False)[:10]
-            return [f.Symbol for f in symbols_sorted_by_market_cap]
+            columns = fundamental if isinstance(fundamental, FundamentalSnapshot) else FundamentalColumns(fundamental)
+                # LEAN passes a List[Fundamental]; the local replay can pass a cached, memory-mapped snapshot.
+                # Either way each field is read as a NumPy column. See fundamentalCache.py.
+
+            # Cheap top-level fields first.
+            market_cap = columns.column('market_cap')
+            dollar_volume = columns.column('dollar_volume')
+            price = columns.column('price')
+            mask = (
+                columns.column('has_data')
+                & (market_cap > 0) # NaN compares False, so missing values are filtered out too.
+                & (dollar_volume > 0)
+                & (price <= v.max_symbol_price)
+            )
+            if c.symbol_filter_condition_min_price:
+                mask &= c.symbol_filter_parameter_min_price <= price
+
+            candidates = np.flatnonzero(mask)
+            if c.symbol_filter_condition_blacklist:
+                blacklist = set(c.symbol_filter_parameter_blacklist)
+                tickers = columns.values('ticker', candidates)
+                candidates = candidates[np.fromiter((ticker not in blacklist for ticker in tickers), dtype=bool, count=len(candidates))]
+
+            # Nested ratios: only read for the symbols that passed the cheap filters.
+            pe_ratio = columns.values('pe_ratio', candidates)
+            mask = np.ones(len(candidates), dtype=bool)
+            if c.symbol_filter_condition_min_pe_ratio:
+                mask &= (c.symbol_filter_parameter_min_pe_ratio < pe_ratio) & (pe_ratio != 0)
+            if c.symbol_filter_condition_max_pe_ratio:
+                mask &= (c.symbol_filter_parameter_max_pe_ratio > pe_ratio) & (pe_ratio != 0)
+            if c.symbol_filter_condition_min_revenue_growth_percent:
+                revenue_growth = columns.values('revenue_growth', candidates)
+                mask &= (c.symbol_filter_parameter_min_revenue_growth_percent < revenue_growth) & (revenue_growth != 0)
+            candidates = candidates[mask]
+            pe_ratio = pe_ratio[mask]
+
+            # Top 100 by Dollar Volume
+            top = smallestK(-dollar_volume[candidates], c.symbol_filter_parameter_top_dollar_volume_count)
+            candidates, pe_ratio = candidates[top], pe_ratio[top]
+
+            # Top 50 by lowest Price-to-Earnings Ratio
+            top = smallestK(pe_ratio, c.symbol_filter_parameter_lowest_pe_ratio_count)
+            candidates = candidates[top]
+
+            # Bottom 10 by market cap, smallest first
+            top = smallestK(market_cap[candidates], c.symbol_filter_parameter_lowest_market_cap_count, ordered=True)
+            return columns.symbols(candidates[top])
          
         except Exception as e:
-            self.algorithm.Error(f"---- Error on filterAndSortUniverse: {str(e)}")
+            v.log.error("AddUniverse.filterAndSortUniverse", "---- Error on filterAndSortUniverse: {}", e)
 
 # End AddUniverse.py
\ No newline at end of file
@@ -5,6 +5,7 @@ from shouldBuy import shouldBuy
 from shouldSell import shouldSell
 import config as c
 import variables as v
+from symbolState import symbolState
 import json
 import charts
 
@@ -15,103 +16,150 @@ class OnDataHandler:
     def OnData(self, data):
     # Runs upon receipt of every bar/candle for the filtered symbols
         try:
-            # Log warm-up progress every 10 iterations
-            if self.algorithm.IsWarmingUp:
-                pass
-                    
-            else:               
-                for symbol in v.active_symbols:
-                    if symbol in data:                        
-                        bar = data[symbol]
-                        if bar is not None and isinstance(bar, (TradeBar, QuoteBar)):
-
-                            # Check if the indicators for the symbol are ready
-                            indicators = v.indicators.get(symbol, None)
-                            if indicators is not None:
-                                all_ready = all(indicator.IsReady for indicator in indicators.values())
-                                if all_ready:
-
-                                    v.symbol_sector[symbol] = self.algorithm.Securities[symbol].Fundamentals.AssetClassification.MorningstarSectorCode
-                                    v.current_price[symbol] = data[symbol].Price
-                                    v.current_close_price[symbol] = data[symbol].Close
-                                
-                                    # Check for Buy condition
-                                    should_buy, order_tag = shouldBuy(self.algorithm, symbol, data)
-                                    if should_buy:
-                                        v.latest_order_ticket[symbol] = self.algorithm.LimitOrder(symbol, round(v.position_size_share_qty_to_buy[symbol]), v.buy_limit_price[symbol], order_tag)
-                                        v.open_order_tickets[symbol] = v.latest_order_ticket[symbol]
-
-                                    # Check for Sell condition
-                                    should_sell, order_tag = shouldSell(self.algorithm, symbol, data)
-                                    if self.algorithm.Portfolio[symbol].Invested and not self.algorithm.Transactions.GetOpenOrders(symbol) and not should_buy and should_sell:
-                                        
-                                        shares_qty_held = self.algorithm.Portfolio[symbol].Quantity
-                                            # Get the total shares held for this symbol.
-                                        
-                                        if v.take_profit_max_price[symbol] == v.take_profit_percent_price[symbol]:
-                                            shares_qty_to_sell = round(shares_qty_held * c.sell_parameter_take_profit_percent) 
-                                            v.latest_order_ticket[symbol] = self.algorithm.LimitOrder(symbol, -round(shares_qty_to_sell), v.take_profit_max_price[symbol], order_tag)
-                                                # In case the price target is the Fixed Take Profit %, only sell half.
-                                            v.open_order_tickets[symbol]  = v.latest_order_ticket[symbol]
-                                        else:
-                                            v.latest_order_ticket[symbol] = self.algorithm.Liquidate(symbol, order_tag)
-                                            v.open_order_tickets[symbol]  = v.latest_order_ticket[symbol]
-                                                # Otherwise, sell the entire position.   
-
-                                    if should_buy or should_sell:
-                                        if symbol in v.latest_order_ticket and v.latest_order_ticket is not None:
-                                            debug_message = {
-                                                "Type": v.latest_order_ticket[symbol].OrderDirection,
-                                                "ID": v.latest_order_ticket[symbol].OrderId,
-                                                "Symbol": str(v.latest_order_ticket[symbol].Symbol),
-                                                "Quantity": v.latest_order_ticket[symbol].Quantity,
-                                                "Status": v.latest_order_ticket[symbol].Status,
-                                                "Price": v.latest_order_ticket[symbol].AverageFillPrice,
-                                                "Time": str(v.latest_order_ticket[symbol].Time),
-                                                "Tag": v.latest_order_ticket[symbol].Tag
-                                            }                     
-                                            self.algorithm.Debug("ORDER SUBMITTED:")
-                                            self.algorithm.Debug(json.dumps(debug_message))
-                                    
-                                    self.algorithm.Debug(f"Plotting indicators for {symbol}")
-                                    try:
-                                        charts.plotIndicators(self.algorithm, symbol, indicators)
-                                    except Exception as e:
-                                        self.algorithm.Error(f"Error in plotIndicators for {symbol}: {str(e)}")
-                                    
-                                else:
-                                    for indicator_name, indicator in indicators.items():
-                                        if not indicator.IsReady:
-                                            self.algorithm.Debug(f"{self.algorithm.Time} - {indicator_name} not ready for {symbol}. Skipping OnData slice...")
-                                            continue
-                            else: 
-                                self.algorithm.Error(f"{self.algorithm.Time} - {indicator_name} not initialized for {symbol}")
+            v.indicator_engine.flush()
+                # Apply all bars consolidated for this slice to every symbol's indicators in one batch.
+
+            v.order_expiry.expireDue(self.algorithm)
+                # Cancel the pending limit orders that are due to expire, see orderExpiry.py.
+
+            if not self.algorithm.IsWarmingUp:
+                ready_states = []
+                for symbol in v.dirty_symbols:
+                    # Only symbols whose consolidated bars completed since the last slice: the others'
+                    # indicators, and so their buy signals, haven't changed.
+                    state = self.slotState(symbol, data)
+                    if state is None:
+                        continue
+
+                    # Check if the indicators for the symbol are ready
+                    if state.indicators is not None:
+                        if v.indicator_engine.isReady(symbol):
+                            if state.sector is None:
+                                state.sector = self.algorithm.Securities[symbol].Fundamentals.AssetClassification.MorningstarSectorCode
+                                    # Read through interop once per symbol; the sector doesn't change between slices.
+                            ready_states.append(state)
                         else:
-                            self.algorithm.Error(f"Received unexpected data type for {symbol}: {type(bar)}. Skipping.")                            
+                            v.log.debug("OnData.indicatorNotReady", "{} - Indicators not ready for {}. Skipping OnData slice...", self.algorithm.Time, symbol)
+                    else:
+                        v.log.error("OnData", "{} - Indicators not initialized for {}", self.algorithm.Time, symbol)
 
-        except Exception as e:
-            self.algorithm.Error(f"Error on OnData: {str(e)}")  
+                v.risk_levels.update(self.algorithm, ready_states)
+                    # Stop loss / take profit levels of every ready symbol in one vectorized pass, see riskLevels.py.
+
+                for state in ready_states:
+                    symbol = state.symbol
+
+                    # Check for Buy condition
+                    should_buy, buy_condition_snapshot = shouldBuy(self.algorithm, state, data)
+                    if should_buy:
+                        order_tag = v.order_tags.createTag(self.algorithm, "B", symbol, buy_condition_snapshot)
+                            # Compact tag pointing to the buy condition snapshot, see orderTags.py.
+                        state.latest_order_ticket = self.algorithm.LimitOrder(symbol, round(state.position_size_share_qty_to_buy), state.buy_limit_price, order_tag)
+                        state.open_order_ticket = state.latest_order_ticket
+                        v.open_orders.addTicket(state.open_order_ticket, state.buy_limit_price)
+                            # Reserve its cash now, so the next buys of this slice are sized without it.
+                        v.order_expiry.add(self.algorithm, state.open_order_ticket)
+
+                    # Check for Sell condition
+                    should_sell = self.checkSell(state, data, should_buy)
+
+                    if should_buy or should_sell:
+                        self.logOrder(state)
+
+                    v.log.debug("OnData.plotIndicators", "Plotting indicators for {}", symbol)
+                    try:
+                        charts.plotIndicators(self.algorithm, symbol, state.indicators)
+                    except Exception as e:
+                        v.log.error("OnData.plotIndicators", "Error in plotIndicators for {}: {}", symbol, e)
+
+                for symbol in list(v.sector_exposure.invested_symbols):
+                    # Held positions without a new consolidated bar: only their price moved, so only check
+                    # it against the position's stop loss / take profit levels.
+                    # The list is a copy: a sell filled right away removes the symbol from the positions.
+                    if symbol not in v.dirty_symbols:
+                        self.checkStops(symbol, data)
+
+            v.dirty_symbols.clear()
+                # Also during the warm-up, so the first slice after it only evaluates the symbols with new bars.
 
-    def CancelOldOrders(self):
-        try:
-            for symbol, order_ticket in v.open_order_tickets.items():
-                
-                if order_ticket is not None and not order_ticket.OrderClosed:
-                    order_time = self.algorithm.Time  # Current algorithm time
-                    order_age = (order_time - order_ticket.Time).total_seconds() / 60  # Age in minutes
-                    
-                    if order_age > c.max_pending_order_age_minutes:
-                        order_ticket.Cancel("Order too old")
-                        self.algorithm.Debug(f"Order {order_ticket.OrderId} for {symbol} cancelled due to timeout")
-                    
-                    # Log unfilled orders periodically (e.g., every 15 minutes)
-                    elif order_age % 15 == 0:
-                        self.algorithm.Debug(f"Order still pending: {order_ticket.Symbol}, Order Age: {order_age} minutes, Canceling in {c.max_submitted_order_minutes - order_age} minutes...")
-        
         except Exception as e:
-            self.algorithm.Error(f"Error on HandleTradeOutcome: {str(e)}") 
-            return False
-    
+            v.log.error("OnData", "Error on OnData: {}", e)
+
+    def slotState(self, symbol, data):
+        # The symbol's state with this slice's prices, or None if the slice has no bar for it.
+        if symbol not in data:
+            return None
+        bar = data[symbol]
+        if bar is None or not isinstance(bar, (TradeBar, QuoteBar)):
+            v.log.error("OnData", "Received unexpected data type for {}: {}. Skipping.", symbol, type(bar))
+            return None
+        state = symbolState(symbol)
+            # All of the symbol's values, fetched once for this slice. See symbolState.py.
+        state.current_price = bar.Price
+        state.current_close_price = bar.Close
+        return state
+
+    def checkStops(self, symbol, data):
+        # Price-only sell check of a held position whose indicators didn't change this slice.
+        state = v.symbol_states.get(symbol)
+        if state is None or state.indicators is None or state.position_stop_loss_price is None or symbol not in data:
+            return
+            # Removed from the universe, or held from before the algorithm computed its levels: not sold by OnData.
+        if not v.indicator_engine.isReady(symbol):
+            return
+        state = self.slotState(symbol, data)
+        if state is None:
+            return
+        v.risk_levels.trail(state)
+            # Raise the trailing stop with the new price, as RiskLevels.update does for ready symbols.
+        if state.position_stop_loss_price < state.current_price < state.position_take_profit_price:
+            return
+            # Neither level reached: shouldSell's price target condition can't be met.
+        if self.checkSell(state, data, False):
+            self.logOrder(state)
+
+    def checkSell(self, state, data, should_buy):
+        # Submits the sell order if shouldSell's conditions are met. Returns should_sell.
+        symbol = state.symbol
+        should_sell, sell_condition_snapshot = shouldSell(self.algorithm, state, data)
+        if self.algorithm.Portfolio[symbol].Invested and not v.open_orders.hasOpenOrders(symbol) and not should_buy and should_sell:
+
+            order_tag = v.order_tags.createTag(self.algorithm, "S", symbol, sell_condition_snapshot)
+                # Compact tag pointing to the sell condition snapshot, see orderTags.py.
+
+            shares_qty_held = self.algorithm.Portfolio[symbol].Quantity
+                # Get the total shares held for this symbol.
+
+            if state.position_take_profit_method == 'percent' and state.current_price >= state.position_take_profit_price:
+                shares_qty_to_sell = round(shares_qty_held * c.sell_parameter_take_profit_percent_to_sell)
+                state.latest_order_ticket = self.algorithm.LimitOrder(symbol, -round(shares_qty_to_sell), state.position_take_profit_price, order_tag)
+                    # In case the price target is the Fixed Take Profit %, only sell a portion.
+                state.open_order_ticket = state.latest_order_ticket
+                v.open_orders.addTicket(state.open_order_ticket, state.position_take_profit_price)
+                v.order_expiry.add(self.algorithm, state.open_order_ticket)
+            else:
+                liquidate_tickets = self.algorithm.Liquidate(symbol, order_tag)
+                if liquidate_tickets:
+                    state.latest_order_ticket = liquidate_tickets[0]
+                    state.open_order_ticket = state.latest_order_ticket
+                    # Otherwise, sell the entire position. Liquidate returns a list of order tickets.
+                for ticket in liquidate_tickets or ():
+                    v.open_orders.addTicket(ticket)
+        return should_sell
 
+    def logOrder(self, state):
+        order_ticket = state.latest_order_ticket
+        if order_ticket is not None:
+            debug_message = {
+                "Type": "Buy" if order_ticket.Quantity > 0 else "Sell",
+                "ID": order_ticket.OrderId,
+                "Symbol": str(order_ticket.Symbol),
+                "Quantity": order_ticket.Quantity,
+                "Status": order_ticket.Status,
+                "Price": order_ticket.AverageFillPrice,
+                "Time": str(order_ticket.Time),
+                "Tag": order_ticket.Tag
+            }
+            v.log.info("OnData.orderSubmitted", lambda message=debug_message: "ORDER SUBMITTED: " + json.dumps(message))
 
 # End OnData.py
\ No newline at end of file
@@ -2,10 +2,14 @@
 from AlgorithmImports import *
 import config as c
 import variables as v
+from symbolState import symbolState, releaseSymbolState
+from consolidationCascade import ConsolidationCascade, cascadeLevels
 
 class OnSecuritiesChangedHandler:
     def __init__(self, algorithm):
         self.algorithm = algorithm
+        self.cascade_levels = cascadeLevels(v.indicator_engine.periods)
+            # Same cascade levels for every symbol, from finest_resolution up to the coarsest indicator timeframe.
 
     def OnSecuritiesChanged(self, changes):
     # Runs whenever a symbol is added to the static or dynamic Universe.
@@ -13,81 +17,72 @@ class OnSecuritiesChangedHandler:
         try:
             for x in changes.AddedSecurities:
                 v.active_symbols.add(x.Symbol)
-                if x.Symbol not in v.indicators:
+                if symbolState(x.Symbol).indicators is None:
                     self.initializeIndicators(x.Symbol)
-                    for indicator_key, indicator in v.indicators[x.Symbol].items():
-                        self.registerConsolidator(x.Symbol, c.finest_resolution, indicator, self.updateIndicator, indicator_key)
+                    self.registerCascade(x.Symbol, self.updateIndicators)
+                        # One consolidator per symbol and timeframe, each fanning its bars out to all the indicators of that timeframe.
 
             for x in changes.RemovedSecurities:
-                v.active_symbols.remove(x.Symbol)
+                v.active_symbols.discard(x.Symbol)
+                v.dirty_symbols.discard(x.Symbol)
                 self.removeConsolidators(x.Symbol)
+                v.indicator_engine.removeSymbol(x.Symbol)
+                releaseSymbolState(self.algorithm, x.Symbol)
+                    # Free the symbol's engine row and state, so it is re-initialized if the symbol is added again.
+                    # The state is kept while a position or open order still refers to it.
 
         except Exception as e:
-            self.algorithm.Error(f"Error on OnSecuritiesChanged: {str(e)}")
+            v.log.error("OnSecuritiesChanged", "Error on OnSecuritiesChanged: {}", e)
 
-    def updateIndicator(self, bar, indicator, indicator_key):
+    def updateIndicators(self, period, bar):
+        # Dispatches one consolidated bar to every indicator of its symbol and timeframe.
         try:
             if bar is not None:
                 try: 
-                    # Determine if the indicator expects IndicatorDataPoint or TradeBar
-                    if isinstance(indicator, IndicatorBase[IndicatorDataPoint]):
-                        # Create an IndicatorDataPoint for these indicators
-                        dataPoint = IndicatorDataPoint(bar.EndTime, bar.Close)
-                        indicator.Update(dataPoint)
-                    else:
-                        indicator.Update(bar)
+                    v.indicator_engine.stage(period, bar.Symbol, bar)
+                        # Stages the bar for all of the symbol's indicators at once. All symbols are
+                        # updated together when OnData flushes the engine at the start of the slice.
                 except Exception as e:
-                    self.algorithm.Error(f"Error on OnSecuritiesChanged: {str(e)}")
+                    v.log.error("OnSecuritiesChanged", "Error on OnSecuritiesChanged: {}", e)
+                v.dirty_symbols.add(bar.Symbol)
+                    # Its indicators change this slice: OnData evaluates its buy / sell signals, see OnData.py.
 
+                state = symbolState(bar.Symbol)
+                if period == v.indicator_engine.periods[-1]:
+                    state.warmup_bar_count += 1
+                        # Counted in bars of the coarsest timeframe, like c.warmup_period.
                 if self.algorithm.IsWarmingUp:
-                    if indicator_key not in v.indicator_warmup_counter:
-                        v.indicator_warmup_counter[indicator_key] = 0
-                    v.indicator_warmup_counter[indicator_key] += 1
-                    self.algorithm.Debug(f"{bar.EndTime} - {bar.Symbol} - Warming up IndicatorDataPoint {indicator_key}: {indicator.Current.Value} - Received {v.indicator_warmup_counter[indicator_key]} / {c.warmup_period} data points...")
+                    v.log.debug("OnSecuritiesChanged.updateIndicators", "{} - {} - Warming up indicators - Received {} / {} data points...", bar.EndTime, bar.Symbol, state.warmup_bar_count, c.warmup_period)
                 else:
-                    v.indicator_warmup_counter[indicator_key] += 1
-                    self.algorithm.Debug(f"{bar.EndTime} - {bar.Symbol} - Updated IndicatorDataPoint {indicator_key}: {indicator.Current.Value} - Received {v.indicator_warmup_counter[indicator_key]} / {c.warmup_period} data points")
+                    v.log.debug("OnSecuritiesChanged.updateIndicators", "{} - {} - Updated indicators - Received {} / {} data points", bar.EndTime, bar.Symbol, state.warmup_bar_count, c.warmup_period)
                                             
             else:
-                self.algorithm.Debug(f"Skipping {indicator_key} update for {bar.Symbol} at {bar.EndTime} due to missing data.")
+                v.log.debug("OnSecuritiesChanged.updateIndicators", "Skipping indicator update due to missing data.")
         
         except Exception as e:
-            self.algorithm.Error(f"Error on OnSecuritiesChanged: {str(e)}")
+            v.log.error("OnSecuritiesChanged", "Error on OnSecuritiesChanged: {}", e)
             
     def initializeIndicators(self, symbol):
         # Initialize indicators
-        self.algorithm.Debug(f"Initializing indicators for {symbol}...")
-        atr_min = Minimum(c.buy_parameter_atr_low_period)
-        atr = AverageTrueRange(c.buy_parameter_atr_periods, MovingAverageType.Wilders)
-        emaShort = ExponentialMovingAverage(c.buy_parameter_ema_short_periods)
-        emaLong = ExponentialMovingAverage(c.buy_parameter_ema_long_periods)
-        macd = MovingAverageConvergenceDivergence(12, 26, 9, MovingAverageType.Wilders)
-        rsi = RelativeStrengthIndex(c.buy_parameter_rsi_periods)
-        sto = Stochastic(14, 3, 3)
+        v.log.debug("OnSecuritiesChanged", "Initializing indicators for {}...", symbol)
+        symbolState(symbol).indicators = v.indicator_engine.addSymbol(symbol)
+            # Store indicators: one view per key ('atr_min', 'atr', 'emaShort', 'emaLong', 'macd', 'rsi', 'sto'),
+            # backed by a row of the shared IndicatorEngine arrays instead of separate LEAN indicator objects.
 
-        # Store indicators
-        v.indicators[symbol] = {
-            'atr_min': atr_min,
-            'atr': atr,
-            'emaShort': emaShort,
-            'emaLong': emaLong,
-            'macd': macd,
-            'rsi': rsi,
-            'sto': sto
-        }
-
-    def registerConsolidator(self, symbol, resolution, indicator, updateMethod, indicator_key):
-        consolidator = self.algorithm.ResolveConsolidator(symbol, resolution)
-        consolidator.DataConsolidated += lambda sender, bar: updateMethod(bar, indicator, indicator_key)
-        self.algorithm.SubscriptionManager.AddConsolidator(symbol, consolidator)
-        if symbol not in v.consolidators:
-            v.consolidators[symbol] = []
-        v.consolidators[symbol].append(consolidator)
+    def registerCascade(self, symbol, updateMethod):
+        # Registers the symbol's consolidation cascade once. Re-registering reuses it.
+        state = symbolState(symbol)
+        if not state.consolidators:
+            cascade = ConsolidationCascade(self.algorithm, symbol, self.cascade_levels, v.indicator_engine.periods, updateMethod)
+            state.consolidators = cascade.consolidators
+        return state.consolidators
 
     def removeConsolidators(self, symbol):
-        if symbol in v.consolidators:
-            for consolidator in v.consolidators[symbol]:
-                self.algorithm.SubscriptionManager.RemoveConsolidator(symbol, consolidator)
-            del v.consolidators[symbol]
+        state = v.symbol_states.get(symbol)
+        if state is not None:
+            if state.consolidators:
+                self.algorithm.SubscriptionManager.RemoveConsolidator(symbol, next(iter(state.consolidators.values())))
+                    # Only the finest level is subscribed; the levels above it are fed by it and go with it.
+            state.consolidators = {}
 
 # End OnSecuritiesChanged.py
\ No newline at end of file
@@ -12,8 +12,16 @@ class OnWarmupFinishedHandler:
     def OnWarmupFinished(self):
         # Runs after the warmup period, regardless of static or dynamic universe.
     
-        self.algorithm.Debug(f"-------- Universe filtering and warmup complete. Symbol count: 
-                   {len(v.active_symbols)}")
+        v.log.info("OnWarmupFinished", "-------- Universe filtering and warmup complete. Symbol count: {}", len(v.active_symbols))
+
+        v.sector_exposure.rebuild(self.algorithm)
+            # Pick up any holdings the account already had, e.g. when deploying live. Fills keep it current afterwards.
+
+        v.open_orders.rebuild(self.algorithm)
+            # Likewise for orders still open at the broker, e.g. after restoring a checkpoint. Order events keep it current afterwards.
+
+        v.order_expiry.rebuild(self.algorithm)
+            # And their expiry times, from each order's submit time.
         
         for symbol in v.active_symbols:
             
@@ -27,6 +35,6 @@ class OnWarmupFinishedHandler:
             industry = self.algorithm.Securities[symbol].Fundamentals.AssetClassification.MorningstarIndustryCode
             short_name = self.algorithm.Securities[symbol].Fundamentals.CompanyReference.ShortName
             
-            self.algorithm.Debug(f"-------- {symbol}, Price: ${price}, Dollar Volume: ${dollar_volume}, P/E Ratio:{pe_ratio}, Revenue Growth: {revenue_growth}%, MarketCap: {market_cap}, Sector: {sector}, Industry: {industry} - {short_name}")
+            v.log.info("OnWarmupFinished", "-------- {}, Price: ${}, Dollar Volume: ${}, P/E Ratio:{}, Revenue Growth: {}%, MarketCap: {}, Sector: {}, Industry: {} - {}", symbol, price, dollar_volume, pe_ratio, revenue_growth, market_cap, sector, industry, short_name)
 
 # End OnWarmupFinished.py
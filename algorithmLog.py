@@ -0,0 +1,140 @@
+# Begin algorithmLog.py
+
+# Level-gated, sampled and rate-limited logging for the algorithm.
+#   Every Debug/Error call site goes through v.log with a call-site name, e.g.
+#       v.log.debug("OnData.plotIndicators", "Plotting indicators for {}", symbol)
+#   - Levels: messages below c.log_level are not emitted.
+#   - Lazy formatting: the message is only formatted (str.format with the args and fields, or called
+#     if it is a function) when it is actually emitted or dumped. Messages below both c.log_level
+#     and c.log_buffer_level return after one level check. Messages at or above either level read
+#     the algorithm time, and buffered ones are appended to the ring buffer, so c.log_buffer_level
+#     defaults to INFO to keep debug calls on the hot path at a level check.
+#   - Sampling: c.log_sample_every emits only every Nth call of a site.
+#   - Rate limits: each site emits at most c.log_rate_limit_messages per c.log_rate_limit_minutes of
+#     algorithm time. The number of suppressed messages is appended to the next one emitted.
+#   - Ring buffer: the last c.log_buffer_size events at or above c.log_buffer_level are kept
+#     unformatted in memory, whether or not they were emitted. On an error, the events recorded since
+#     the last dump are written to the log, to show what led up to it.
+
+from AlgorithmImports import *
+import config as c
+import collections
+from datetime import timedelta
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+LEVEL_NAMES = {level: name for name, level in LEVELS.items()}
+
+def formatMessage(message, args, fields):
+    # message: a str.format template, or a function returning the text.
+    if callable(message):
+        return message()
+    if args or fields:
+        return message.format(*args, **fields)
+    return message
+
+class LogSite:
+    # Sampling and rate limit counters of one call site.
+    __slots__ = ('calls', 'window_start', 'window_count', 'suppressed')
+
+    def __init__(self):
+        self.calls = 0
+        self.window_start = None
+        self.window_count = 0
+        self.suppressed = 0
+
+class AlgorithmLogger:
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.level = LEVELS[c.log_level]
+        self.buffer_level = LEVELS[c.log_buffer_level]
+        self.min_level = min(self.level, self.buffer_level)
+        self.sample_every = c.log_sample_every
+        self.rate_limit_messages = c.log_rate_limit_messages
+        self.rate_limit_window = timedelta(minutes=c.log_rate_limit_minutes)
+        self.events = collections.deque(maxlen=c.log_buffer_size)
+            # (time, level, site, message, args, fields), formatted only when dumped.
+        self.undumped_events = 0
+        self.sites = {}
+
+    def debug(self, site, message, *args, **fields):
+        if DEBUG >= self.min_level:
+            self.log(DEBUG, site, message, args, fields)
+
+    def info(self, site, message, *args, **fields):
+        if INFO >= self.min_level:
+            self.log(INFO, site, message, args, fields)
+
+    def warning(self, site, message, *args, **fields):
+        if WARNING >= self.min_level:
+            self.log(WARNING, site, message, args, fields)
+
+    def error(self, site, message, *args, **fields):
+        self.log(ERROR, site, message, args, fields)
+
+    def log(self, level, site, message, args, fields):
+        time = self.algorithm.Time
+        if level >= self.buffer_level:
+            self.events.append((time, level, site, message, args, fields))
+            self.undumped_events = min(self.undumped_events + 1, self.events.maxlen)
+        if level < self.level:
+            return
+
+        state = self.sites.get(site)
+        if state is None:
+            state = self.sites[site] = LogSite()
+        state.calls += 1
+
+        sample_every = self.sample_every.get(site, 1)
+        if level < ERROR and (sample_every <= 0 or (state.calls - 1) % sample_every):
+            return
+            # Errors are never sampled out. 0 turns a site off.
+
+        if state.window_start is None or time - state.window_start >= self.rate_limit_window:
+            state.window_start = time
+            state.window_count = 0
+        if state.window_count >= self.rate_limit_messages:
+            state.suppressed += 1
+            return
+        state.window_count += 1
+
+        text = formatMessage(message, args, fields)
+        if state.suppressed:
+            text = f"{text} ({state.suppressed} earlier {site} messages suppressed)"
+            state.suppressed = 0
+
+        if level >= ERROR:
+            self.algorithm.Error(text)
+            if c.log_dump_on_error:
+                self.dump()
+        else:
+            self.algorithm.Debug(text)
+
+    def recentEvents(self, count=None):
+        # Most recent buffered events as dicts, oldest first.
+        events = list(self.events)[-count:] if count else list(self.events)
+        return [
+            {
+                "Time": str(time),
+                "Level": LEVEL_NAMES[level],
+                "Site": site,
+                "Message": formatMessage(message, args, fields),
+                **{name: str(value) for name, value in fields.items()}
+            }
+            for time, level, site, message, args, fields in events
+        ]
+
+    def dump(self):
+        # Write the events buffered since the last dump, excluding the error that triggered it.
+        count = self.undumped_events
+        self.undumped_events = 0
+        if count <= 1:
+            return
+        self.algorithm.Debug(f"---- Last {count - 1} events before this error:")
+        for event in self.recentEvents(count)[:-1]:
+            self.algorithm.Debug(f"-------- {event['Time']} {event['Level']} {event['Site']}: {event['Message']}")
+
+# End algorithmLog.py
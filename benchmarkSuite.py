@@ -0,0 +1,212 @@
+# Begin benchmarkSuite.py
+
+# Scaling benchmark of the OnData hot path, using the local replay harness.
+#   Replays synthetic random-walk bars (no data files needed) through the local stand-in for the
+#   LEAN API at several universe sizes and resolutions, and measures for each case:
+#       - per-call latency (p50 / p99 / mean / max) after the warm-up of OnDataHandler.OnData,
+#         shouldBuy, shouldSell and OnOrderEventHandler.OnOrderEvent, plus the whole replay slice
+#       - slices per second over the measured run
+#       - peak traced memory (tracemalloc), in a second run of the same case so tracing doesn't
+#         slow down the timed run
+#   Results are written as JSON, one entry per case, so runs can be compared over time.
+#
+#   Usage:
+#       python benchmarkSuite.py --json benchmark.json
+#       python benchmarkSuite.py --sizes 10 100 --resolutions daily --no-memory
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import localReplay
+import localAlgorithmImports as lean
+
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+RESOLUTIONS = {
+    'daily': lean.Resolution.Daily,
+    'minute': lean.Resolution.Minute
+}
+DEFAULT_SLICES = {
+    'daily': 252, # One year of trading days
+    'minute': 390 # One regular trading session
+} # Measured slices per case, after the warm-up.
+
+TIMED_FUNCTIONS = ('OnData', 'shouldBuy', 'shouldSell', 'OnOrderEvent')
+
+def barTimes(resolution, count, start=datetime(2023, 1, 3)):
+    # Bar start times on weekdays: one per day, or every minute of the 9:30 - 16:00 session.
+    times = []
+    day = start
+    while len(times) < count:
+        if day.weekday() < 5:
+            if resolution == 'daily':
+                times.append(day)
+            else:
+                session_open = day.replace(hour=9, minute=30)
+                times.extend(session_open + timedelta(minutes=minute) for minute in range(390))
+        day += timedelta(days=1)
+    return np.array(times[:count], dtype='datetime64[s]')
+
+def syntheticBars(symbol_count, resolution, count, seed=0):
+    # Geometric random walk per symbol, with a small random drift so some symbols trend.
+    rng = np.random.default_rng(seed)
+    volatility = 0.02 if resolution == 'daily' else 0.001
+    drift = rng.normal(0.0, volatility / 4, symbol_count)
+    returns = rng.normal(drift, volatility, (count, symbol_count))
+    close = 20.0 * np.exp(np.cumsum(returns, axis=0)) * rng.uniform(1.0, 10.0, symbol_count)
+    open_ = np.vstack([close[:1], close[:-1]])
+    spread = np.abs(rng.normal(0.0, volatility, (count, symbol_count))) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.uniform(1e5, 1e7, (count, symbol_count))
+    symbols = [f"S{index:05d}" for index in range(symbol_count)]
+    period = timedelta(days=1) if resolution == 'daily' else timedelta(minutes=1)
+    return localReplay.BarData(barTimes(resolution, count), symbols, open_, high, low, close, volume, period=period)
+
+def warmupSliceCount(resolution, config_overrides):
+    # Number of bars the strategy warms up on at this resolution.
+    localReplay.loadStrategy(config_overrides)
+    from consolidationCascade import warmupBars
+    bar_count, warmup_resolution = warmupBars()
+    bar_period = lean.RESOLUTION_TIMEDELTA[RESOLUTIONS[resolution]]
+    return int(bar_count * max(lean.RESOLUTION_TIMEDELTA[warmup_resolution] // bar_period, 1))
+
+class CallTimer:
+    # Wraps the hot-path functions in place and records the duration of every call after the warm-up.
+    def __init__(self):
+        self.samples = {name: [] for name in TIMED_FUNCTIONS}
+        self.originals = []
+
+    def wrap(self, owner, attribute, name):
+        function = getattr(owner, attribute)
+        samples = self.samples[name]
+
+        def timed(*args, **kwargs):
+            algorithm = getattr(args[0], 'algorithm', args[0])
+                # Handlers keep the algorithm; shouldBuy / shouldSell take it as first argument.
+            if algorithm.IsWarmingUp:
+                return function(*args, **kwargs)
+            started = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter_ns() - started)
+
+        self.originals.append((owner, attribute, function))
+        setattr(owner, attribute, timed)
+
+    def __enter__(self):
+        import OnData
+        import OnOrderEvent
+        self.wrap(OnData.OnDataHandler, 'OnData', 'OnData')
+        self.wrap(OnData, 'shouldBuy', 'shouldBuy')
+        self.wrap(OnData, 'shouldSell', 'shouldSell')
+            # OnData.py calls them through its own module globals.
+        self.wrap(OnOrderEvent.OnOrderEventHandler, 'OnOrderEvent', 'OnOrderEvent')
+        return self
+
+    def __exit__(self, *exc_info):
+        for owner, attribute, function in reversed(self.originals):
+            setattr(owner, attribute, function)
+        self.originals.clear()
+
+    def latency(self):
+        return {
+            name: dict(calls=len(samples), **localReplay.latencyPercentiles(samples))
+            for name, samples in self.samples.items()
+        }
+
+def runCase(symbol_count, resolution, slices, seed=0, memory=True):
+    config_overrides = {'finest_resolution': RESOLUTIONS[resolution]}
+    warmup_slices = warmupSliceCount(resolution, config_overrides)
+    bars = syntheticBars(symbol_count, resolution, warmup_slices + slices, seed)
+    start, end = bars.times[warmup_slices].astype(datetime), bars.times[-1].astype(datetime)
+
+    def replay():
+        return localReplay.ReplayEngine(bars, start=start, end=end, config_overrides=config_overrides, all_symbols=True).run()
+
+    with CallTimer() as timer:
+        result = replay()
+    summary = result.summary()
+    measured_ns = result.step_ns[result.warmup_slices:]
+    measured_s = measured_ns.sum() / 1e9
+
+    peak_memory_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            replay()
+            peak_memory_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "symbols": symbol_count,
+        "resolution": resolution,
+        "slices": len(measured_ns),
+        "warmup_slices": result.warmup_slices,
+        "slices_per_second": len(measured_ns) / measured_s if measured_s else 0.0,
+        "wall_time_s": summary['wall_time_s'],
+        "peak_memory_mb": peak_memory_mb,
+        "trade_count": summary['trade_count'],
+        "order_count": summary['order_count'],
+        "error_count": summary['error_count'],
+        "slice_latency": localReplay.latencyPercentiles(measured_ns),
+        "latency": timer.latency()
+    }
+
+def runSuite(sizes=DEFAULT_SIZES, resolutions=tuple(RESOLUTIONS), slices=None, seed=0, memory=True, progress=None):
+    cases = []
+    for resolution in resolutions:
+        for symbol_count in sizes:
+            case = runCase(symbol_count, resolution, (slices or {}).get(resolution, DEFAULT_SLICES[resolution]), seed, memory)
+            cases.append(case)
+            if progress is not None:
+                progress(case)
+    return {
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "seed": seed,
+        "cases": cases
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the OnData hot path over synthetic universes.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="Universe sizes (symbols).")
+    parser.add_argument('--resolutions', nargs='+', choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument('--daily-slices', type=int, default=DEFAULT_SLICES['daily'], help="Measured daily slices per case.")
+    parser.add_argument('--minute-slices', type=int, default=DEFAULT_SLICES['minute'], help="Measured minute slices per case.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic bars.")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run of each case.")
+    parser.add_argument('--json', help="Write the results to this file instead of stdout.")
+    args = parser.parse_args(argv)
+
+    def progress(case):
+        print(
+            f"{case['resolution']:>6} {case['symbols']:>5} symbols: {case['slices_per_second']:.1f} slices/s, "
+            f"OnData p50 {case['latency']['OnData']['p50_ms']:.2f} ms, p99 {case['latency']['OnData']['p99_ms']:.2f} ms",
+            file=sys.stderr
+        )
+
+    results = runSuite(
+        args.sizes, args.resolutions, {'daily': args.daily_slices, 'minute': args.minute_slices},
+        args.seed, not args.no_memory, progress
+    )
+    output = json.dumps(results, indent=2)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
+
+# End benchmarkSuite.py
@@ -0,0 +1,169 @@
+# Begin buyPlan.py
+
+# Compiled, short-circuiting buy-condition plan.
+#   compileBuyPlan() turns the enabled buy_condition_* flags in config.py into an ordered list of
+#   gates, once at start-up. shouldBuy runs the plan stage by stage and stops at the first gate
+#   that fails, so a rejected symbol never pays for risk levels, position sizing or charting:
+#       "signal" - portfolio-level rules and indicator reads, cheapest first.
+#       "risk"   - gates that need the take profit / stop loss prices.
+#       "sizing" - gates that need the position size.
+#   Within a stage, gates run in config.buy_plan_condition_order if it lists them, otherwise in the
+#   order below. Every gate counts how often it was evaluated and passed; hitRates() / report()
+#   show those counts so the order can be tuned (most selective cheap gates first).
+
+from AlgorithmImports import *
+import config as c
+import variables as v
+
+STAGES = ('signal', 'risk', 'sizing')
+
+# Gate predicates: (algorithm, state) -> bool, where state is the symbol's SymbolState.
+def pdtRuleAllowsTrade(algorithm, state):
+    return not (len(v.day_trade_dates) >= 3 and algorithm.Portfolio.Cash < 25000)
+    # Restricted when 3+ day trades were made recently on an account under $25,000.
+
+def minSymbolsInvested(algorithm, state):
+    return len(v.sector_exposure.invested_symbols) < c.buy_parameter_min_symbols_invested
+
+def maxSectorInvestedPercent(algorithm, state):
+    return v.sector_exposure.sectorPercent(state.sector) < c.buy_parameter_max_sector_invested_percent
+    # A sector with no holdings yet is at 0%.
+
+def emaCrossover(algorithm, state):
+    return state.indicators["emaShort"].Current.Value > state.indicators["emaLong"].Current.Value
+
+def shortEmaRising(algorithm, state):
+    return state.indicators["emaShort"].Current.Value > state.indicators["emaShort"].Previous.Value
+
+def emaDistanceWidening(algorithm, state):
+    return (
+        (state.indicators["emaShort"].Current.Value - state.indicators["emaLong"].Current.Value) >
+        (state.indicators["emaShort"].Previous.Value - state.indicators["emaLong"].Previous.Value)
+    )
+
+def macdCrossAboveSignal(algorithm, state):
+    return state.indicators["macd"].Current.Value > state.indicators["macd"].Signal.Current.Value
+
+def rsiStrong(algorithm, state):
+    return state.indicators["rsi"].Current.Value > c.buy_parameter_rsi_min_threshold
+
+def stochasticRsiStrong(algorithm, state):
+    return state.indicators["sto"].Current.Value > c.buy_parameter_stochastic_rsi_min_threshold
+
+def atrBreakoutLevelReached(algorithm, state):
+    return state.current_price > (
+        state.indicators["atr_min"].Current.Value
+        + state.indicators["atr"].Current.Value * c.buy_parameter_atr_breakout_level_multiplier
+    )
+
+def riskRewardValid(algorithm, state):
+    return (
+        state.max_loss_risk_per_share is not None and state.max_loss_risk_per_share > 0
+        and state.max_profit_reward_per_share is not None and state.max_profit_reward_per_share > 0
+    )
+
+def rewardRiskRatio(algorithm, state):
+    return state.max_profit_reward_per_share / state.max_loss_risk_per_share >= c.buy_parameter_reward_risk_ratio
+
+def positionSizePositive(algorithm, state):
+    return state.position_size_share_qty_to_buy > 0
+
+def maxTotalPortfolioInvestedPercent(algorithm, state):
+    max_loss_risk_per_trade = state.max_loss_risk_per_share * state.position_size_share_qty_to_buy
+    return max_loss_risk_per_trade < c.buy_parameter_max_total_portfolio_invested_percent * algorithm.Portfolio.TotalPortfolioValue
+
+def maxPortfolioPercentPerTrade(algorithm, state):
+    max_loss_risk_per_trade = state.max_loss_risk_per_share * state.position_size_share_qty_to_buy
+    return max_loss_risk_per_trade < c.buy_parameter_max_portfolio_percent_per_trade * algorithm.Portfolio.TotalPortfolioValue
+
+BUY_GATES = (
+    # (name used in order tags, config flag or None if always on, stage, predicate)
+    ("PDTRule", 'buy_condition_pdt_rule', 'signal', pdtRuleAllowsTrade),
+    ("MinSymbolsInvested", 'buy_condition_min_symbols_invested', 'signal', minSymbolsInvested),
+    ("MaxSectorInvestedPercent", 'buy_condition_max_sector_invested_percent', 'signal', maxSectorInvestedPercent),
+    ("EMACrossover", 'buy_condition_ema_crossover', 'signal', emaCrossover),
+    ("ShortEMARising", 'buy_condition_short_ema_rising', 'signal', shortEmaRising),
+    ("EMADistanceWidening", 'buy_condition_ema_distance_widening', 'signal', emaDistanceWidening),
+    ("MACDCrossAboveSignal", 'buy_condition_macd_cross_above_signal', 'signal', macdCrossAboveSignal),
+    ("RSIStrong", 'buy_condition_rsi_strong', 'signal', rsiStrong),
+    ("StochasticRSIStrong", 'buy_condition_stochastic_rsi_strong', 'signal', stochasticRsiStrong),
+    ("RiskRewardValid", None, 'risk', riskRewardValid),
+    ("RewardRiskRatio", 'buy_condition_reward_risk_ratio', 'risk', rewardRiskRatio),
+    ("PositionSizePositive", None, 'sizing', positionSizePositive),
+    ("MaxTotalPortfolioInvestedPercent", 'buy_condition_max_total_portfolio_invested_percent', 'sizing', maxTotalPortfolioInvestedPercent),
+    ("MaxPortfolioPercentPerTrade", 'buy_condition_max_portfolio_percent_per_trade', 'sizing', maxPortfolioPercentPerTrade),
+)
+
+RECORDED_CONDITIONS = (
+    # (name used in order tags, config flag, predicate)
+    ("ATRBreakoutLevelReached", 'buy_condition_atr_breakout_level_reached', atrBreakoutLevelReached),
+) # Recorded in the order tag snapshot when enabled, but not required for a buy, as in the original condition set.
+
+class BuyGate:
+    __slots__ = ('name', 'check', 'evaluated', 'passed')
+
+    def __init__(self, name, check):
+        self.name = name
+        self.check = check
+        self.evaluated = 0
+        self.passed = 0
+
+class BuyPlan:
+    def __init__(self, stages, disabled):
+        self.stages = stages # Stage name -> [BuyGate], in evaluation order
+        self.disabled = disabled # Names of gates switched off in config.py
+        self.last_failed = None
+
+    def passes(self, stage, algorithm, state):
+        # Run the stage's gates in order, stopping at the first one that fails.
+        for gate in self.stages[stage]:
+            gate.evaluated += 1
+            if not gate.check(algorithm, state):
+                self.last_failed = gate.name
+                return False
+            gate.passed += 1
+        return True
+
+    def conditionStates(self, algorithm, state):
+        # Condition values for an order tag snapshot: every enabled gate passed to get here.
+        states = {name: "Disabled" for name in self.disabled}
+        for gates in self.stages.values():
+            for gate in gates:
+                states[gate.name] = True
+        for name, flag, check in RECORDED_CONDITIONS:
+            states[name] = check(algorithm, state) if getattr(c, flag) else "Disabled"
+        return states
+
+    def hitRates(self):
+        # {gate name: {"Evaluated", "Passed", "PassRate"}} in evaluation order.
+        return {
+            gate.name: {
+                "Evaluated": gate.evaluated,
+                "Passed": gate.passed,
+                "PassRate": gate.passed / gate.evaluated if gate.evaluated else None
+            }
+            for stage in STAGES for gate in self.stages[stage]
+        }
+
+    def report(self, algorithm):
+        v.log.info("buyPlan", "---- Buy plan condition hit rates (evaluated / passed):")
+        for name, counts in self.hitRates().items():
+            rate = f"{counts['PassRate']:.1%}" if counts['PassRate'] is not None else "n/a"
+            v.log.info("buyPlan", "-------- {}: {} / {} ({})", name, counts['Evaluated'], counts['Passed'], rate)
+
+def compileBuyPlan():
+    # Build the plan from the buy_condition_* flags currently set in config.py.
+    order = {name: position for position, name in enumerate(c.buy_plan_condition_order)}
+    stages = {stage: [] for stage in STAGES}
+    disabled = []
+    for default_position, (name, flag, stage, check) in enumerate(BUY_GATES):
+        if flag is not None and not getattr(c, flag):
+            disabled.append(name)
+            continue
+        stages[stage].append((order.get(name, len(order) + default_position), BuyGate(name, check)))
+    return BuyPlan(
+        {stage: [gate for _, gate in sorted(gates, key=lambda item: item[0])] for stage, gates in stages.items()},
+        disabled
+    )
+
+# End buyPlan.py
@@ -0,0 +1,138 @@
+# Begin chartStore.py
+
+# Batched, compressed chart persistence.
+#   charts.plotIndicators / plotPositionSizes record one row per symbol per slice into an in-memory
+#   buffer instead of saving a JSON document to the ObjectStore each time. The buffer is flushed
+#   once per trading day, or sooner when it reaches c.chart_store_flush_rows rows, as one
+#   compressed columnar chunk per series (NumPy .npz: a time column, a symbol column and one
+#   column per value) plus a small JSON manifest of that flush's chunks. Only the manifest of the
+#   flush and a fixed-size head are written per flush, so the cost of a flush doesn't grow with the
+#   number of chunks saved before it.
+#   The chunks are compressed and saved by the background v.persistence_writer, so a flush inside
+#   OnData only hands the buffers over. Chunks may be dropped when its queue is full (see
+#   c.persistence_drop_policy); loadChartSeries() skips indexed chunks that were never saved.
+#   loadChartSeries() reads the chunks back into NumPy arrays, e.g. in research.ipynb.
+#
+#   ObjectStore layout, under c.chart_store_object_store_prefix:
+#       <prefix>/index.json                  - {"Manifests": number of manifests written}
+#       <prefix>/manifests/<flush id>.json   - [{"Key", "Series", "Rows", "Start", "End", "Symbols"}, ...] of one flush
+#       <prefix>/<series>/<chunk id>.npz     - one flushed chunk
+
+from AlgorithmImports import *
+import config as c
+import variables as v
+import io
+import json
+import numpy as np
+
+class ChartStore:
+    def __init__(self, prefix=None, flush_rows=None):
+        self.prefix = prefix or c.chart_store_object_store_prefix
+        self.flush_rows = flush_rows or c.chart_store_flush_rows
+        self.buffers = {} # Series -> {"Time": [], "Symbol": [], column: [], ...}
+        self.buffered_rows = 0
+        self.buffer_date = None # Trading day of the buffered rows
+        self.next_chunk_id = 0
+        self.manifest_count = 0 # Manifests written so far, one per flush
+
+    def record(self, algorithm, series, symbol, row):
+        # Buffer one row of chart values for the symbol. Flushes first when a new day starts.
+        date = algorithm.Time.date()
+        if self.buffer_date is not None and date != self.buffer_date:
+            self.flush(algorithm)
+        self.buffer_date = date
+
+        buffer = self.buffers.get(series)
+        if buffer is None:
+            buffer = self.buffers[series] = {"Time": [], "Symbol": []}
+        rows = len(buffer["Time"])
+        buffer["Time"].append(algorithm.Time)
+        buffer["Symbol"].append(str(symbol))
+        for column, value in row.items():
+            values = buffer.get(column)
+            if values is None:
+                values = buffer[column] = [np.nan] * rows
+                # A column first seen now is missing for the rows buffered before it.
+            values.append(value)
+        for column, values in buffer.items():
+            if len(values) == rows:
+                values.append(np.nan)
+                # A column missing from this row.
+
+        self.buffered_rows += 1
+        if self.buffered_rows >= self.flush_rows:
+            self.flush(algorithm)
+
+    def flush(self, algorithm):
+        # Queue every buffered series as one compressed chunk, and the flush's manifest.
+        # Returns False if a chunk was dropped by the writer.
+        if not self.buffered_rows:
+            return True
+        saved = True
+        manifest = []
+        for series, buffer in self.buffers.items():
+            if not buffer["Time"]:
+                continue
+            key = f"{self.prefix}/{series}/{self.next_chunk_id:06d}.npz"
+            self.next_chunk_id += 1
+            saved = v.persistence_writer.save(key, lambda buffer=buffer: encodeChunk(buffer), droppable=True) and saved
+                # The buffer is handed over: record() starts new ones below.
+            manifest.append({
+                "Key": key,
+                "Series": series,
+                "Rows": len(buffer["Time"]),
+                "Start": str(np.datetime64(buffer["Time"][0], 's')),
+                "End": str(np.datetime64(buffer["Time"][-1], 's')),
+                "Symbols": sorted(set(buffer["Symbol"]))
+            })
+        self.buffers = {}
+        self.buffered_rows = 0
+
+        v.persistence_writer.save(f"{self.prefix}/manifests/{self.manifest_count:06d}.json", lambda: json.dumps(manifest))
+        self.manifest_count += 1
+        v.persistence_writer.save(f"{self.prefix}/index.json", json.dumps({"Manifests": self.manifest_count}))
+            # Written after the manifest, so the head never counts a manifest that isn't saved yet.
+        return saved
+
+def encodeChunk(buffer):
+    # Compressed .npz of one series buffer, on the writer thread.
+    times = np.array(buffer["Time"], dtype='datetime64[s]')
+    arrays = {
+        column: np.asarray(values, dtype=np.float64)
+        for column, values in buffer.items() if column not in ("Time", "Symbol")
+    }
+    chunk = io.BytesIO()
+    np.savez_compressed(chunk, Time=times, Symbol=np.array(buffer["Symbol"]), **arrays)
+    return chunk.getvalue()
+
+def loadChartIndex(object_store, prefix=None):
+    # List of saved chunk entries, oldest first, from every manifest.
+    prefix = prefix or c.chart_store_object_store_prefix
+    text = object_store.Read(f"{prefix}/index.json")
+    if not text:
+        return []
+    manifest_count = json.loads(text)["Manifests"]
+    entries = []
+    for manifest_id in range(manifest_count):
+        manifest = object_store.Read(f"{prefix}/manifests/{manifest_id:06d}.json")
+        if manifest:
+            entries.extend(json.loads(manifest))
+    return entries
+
+def loadChartSeries(object_store, series, symbol=None, prefix=None):
+    # Read every chunk of a series back as {column: array}, optionally for one symbol.
+    # Chunks whose index entry doesn't list the symbol are not read.
+    columns = {}
+    for entry in loadChartIndex(object_store, prefix):
+        if entry["Series"] != series or (symbol is not None and str(symbol) not in entry["Symbols"]):
+            continue
+        if not object_store.ContainsKey(entry["Key"]):
+            continue
+            # Dropped by the writer when its queue was full.
+        with np.load(io.BytesIO(bytes(object_store.ReadBytes(entry["Key"]))), allow_pickle=False) as chunk:
+            mask = chunk["Symbol"] == str(symbol) if symbol is not None else slice(None)
+            for column in chunk.files:
+                columns.setdefault(column, []).append(chunk[column][mask])
+    return {column: np.concatenate(parts) for column, parts in columns.items()}
+
+# End chartStore.py
@@ -1,5 +1,3 @@
-from datetime import datetime
-import json
 from AlgorithmImports import *
 import variables as v
 import config as c
@@ -14,43 +12,30 @@ def plotIndicators(self, symbol, indicators):
         "MACD Signal": indicators["macd"].Signal.Current.Value,
         "MACD Histogram": indicators["macd"].Current.Value - indicators["macd"].Signal.Current.Value,
         "RSI": indicators["rsi"].Current.Value,
-        "Stochastic": indicators["sto"].Current.Value,
-        "Time": self.Time.strftime("%Y-%m-%d %H:%M:%S")
+        "Stochastic": indicators["sto"].Current.Value
     }
 
-    # Convert data to JSON
-    data_json = json.dumps(data)
+    # Buffer the row, saved to the Object Store in compressed daily chunks. See chartStore.py.
+    v.chart_store.record(self, "indicators", symbol, data)
 
-    # Object Store key
-    key = f"{symbol}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-
-    # Save to Object Store
-    if not self.ObjectStore.Save(key, data_json):
-        self.Error(f"Failed to save data to Object Store: {key}")
-
-def plotPositionSizes(self, symbol):
+def plotPositionSizes(self, state):
+    symbol = state.symbol
 
     # Calculate position sizes
-    cash_available = round(self.Portfolio.Cash / v.buy_limit_price[symbol])
-    kelly_criterion = round((self.Portfolio.Cash * v.kelly_criterion) / v.max_loss_risk_per_share[symbol])
-    max_portfolio_per_trade = round((self.Portfolio.TotalPortfolioValue * c.buy_parameter_max_portfolio_percent_per_trade) / v.max_loss_risk_per_share[symbol])
-    max_total_portfolio = round((self.Portfolio.TotalPortfolioValue * c.buy_parameter_max_total_portfolio_invested_percent) / v.max_loss_risk_per_share[symbol])
+    cash = v.open_orders.availableCash(self)
+    cash_available = round(cash / state.buy_limit_price)
+    kelly_fraction = v.trade_bootstrap.kellyFraction(c.buy_parameter_kelly_criterion_scope, symbol, state.sector)
+    kelly_criterion = round((cash * kelly_fraction) / state.max_loss_risk_per_share) if kelly_fraction is not None else float('nan')
+    max_portfolio_per_trade = round((self.Portfolio.TotalPortfolioValue * c.buy_parameter_max_portfolio_percent_per_trade) / state.max_loss_risk_per_share)
+    max_total_portfolio = round((self.Portfolio.TotalPortfolioValue * c.buy_parameter_max_total_portfolio_invested_percent) / state.max_loss_risk_per_share)
 
     # Prepare data dictionary for position sizes
     position_sizes_data = {
         "Cash Available Shares": cash_available,
         "Kelly Criterion Shares": kelly_criterion,
         "Per Trade Max Shares": max_portfolio_per_trade,
-        "Portfolio Max Shares": max_total_portfolio,
-        "Time": self.Time.strftime("%Y-%m-%d %H:%M:%S")
+        "Portfolio Max Shares": max_total_portfolio
     }
 
-    # Convert data to JSON
-    position_sizes_data_json = json.dumps(position_sizes_data)
-
-    # Object Store key for position sizes
-    position_sizes_key = f"{symbol}-position-sizes-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-
-    # Save position sizes data to Object Store
-    if not self.ObjectStore.Save(position_sizes_key, position_sizes_data_json):
-        self.Error(f"Failed to save position sizes data to Object Store: {position_sizes_key}")
+    # Buffer the row, saved to the Object Store in compressed daily chunks. See chartStore.py.
+    v.chart_store.record(self, "position-sizes", symbol, position_sizes_data)
@@ -0,0 +1,208 @@
+# Begin checkpoint.py
+
+# Checkpoint and fast restore of the strategy state.
+#   A restarted deployment would otherwise redo the full SetWarmUp period and rebuild everything in
+#   variables.py from nothing. StrategyCheckpoint.save() periodically writes all strategy state to one
+#   compact binary snapshot, in the Object Store or a local file:
+#       - the indicator engines of every timeframe, including their internal smoothing and window arrays
+#       - trade statistics (Kelly Criterion) and the order tag counter
+#       - day trade history and each symbol's sector and held position levels
+#   Each component provides checkpointState() / fromCheckpoint() with plain arrays and dicts and its
+#   own CHECKPOINT_VERSION, so the format doesn't depend on the classes' attributes, and a checkpoint
+#   from an older version of any component is rejected as a whole instead of half restored. The order
+#   tag snapshots are saved by OrderTagJournal.save and read back from the Object Store.
+#   The sector exposure, the open-order index and the order expiries aren't stored: they are rebuilt
+#   from the Portfolio and the broker's open orders at the end of the warm-up, which is exact even if
+#   orders filled or were cancelled while the algorithm was down. LEAN only loads the broker's open
+#   orders after Initialize, and order ids aren't kept across restarts.
+#
+#   On start-up, restore() loads a valid checkpoint back and main.Initialize shortens the warm-up to
+#   start at the beginning of the coarsest indicator period containing the checkpoint time
+#   (consolidationCascade.replayStart), so the first bar of every timeframe after it is built from
+#   complete data. Each IndicatorEngine ignores the replayed bars up to the last one it had applied,
+#   so only the bars since then update the indicators.
+#
+#   The state is pickled on the algorithm's thread; compression and the write happen on the
+#   background v.persistence_writer, see persistenceWriter.py.
+#
+#   Format: HEADER (magic, format version, CRC-32 and length of the payload) + zlib-compressed pickle.
+#   A checkpoint is only restored if its format version, CRC, indicator configuration and component
+#   versions match. LEAN Symbols are pickled by their SecurityIdentifier string and ticker.
+#   Bump CHECKPOINT_VERSION whenever the state stored here changes shape, and a component's
+#   CHECKPOINT_VERSION when its checkpointState() does.
+
+from AlgorithmImports import *
+import config as c
+import variables as v
+from symbolState import symbolState
+from consolidationCascade import indicatorPeriods
+from indicatorEngine import MultiTimeframeIndicatorEngine
+from tradeStatistics import TradeStatistics
+from orderTags import OrderTagJournal, loadOrderTags
+import collections
+import io
+import os
+import pickle
+import struct
+import zlib
+
+CHECKPOINT_MAGIC = b'CKPT'
+CHECKPOINT_VERSION = 6
+HEADER = struct.Struct('>4sHIQ') # magic, version, crc32 of the payload, payload length
+
+SYMBOL_STATE_FIELDS = (
+    'sector',
+    'warmup_bar_count',
+    'position_stop_loss_price',
+    'position_stop_loss_method',
+    'position_take_profit_price',
+    'position_take_profit_method',
+    'position_high_price'
+)
+
+class SymbolPickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        if isinstance(obj, Symbol):
+            return ('Symbol', str(obj.ID), obj.Value)
+        return None
+
+class SymbolUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        kind, security_id, ticker = pid
+        return Symbol(SecurityIdentifier.Parse(security_id), ticker)
+
+def indicatorFingerprint():
+    # Indicator settings the engine's array shapes and values depend on.
+    return (
+        c.buy_parameter_atr_low_period,
+        c.buy_parameter_atr_periods,
+        c.buy_parameter_ema_short_periods,
+        c.buy_parameter_ema_long_periods,
+        c.buy_parameter_rsi_periods,
+        str(c.finest_resolution),
+        tuple(sorted((key, period.total_seconds()) for key, period in indicatorPeriods().items()))
+    )
+
+def pickleCheckpoint(state):
+    # Pickled state, taken on the algorithm's thread while nothing changes it.
+    buffer = io.BytesIO()
+    SymbolPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(state)
+    return buffer.getvalue()
+
+def packCheckpoint(pickled):
+    # Compressed payload with its header, on the persistence writer thread.
+    payload = zlib.compress(pickled, c.checkpoint_compression_level)
+    return HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, zlib.crc32(payload), len(payload)) + payload
+
+def writeCheckpointFile(path, data):
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as f:
+        f.write(data)
+    os.replace(temporary_path, path)
+        # Never leaves a half-written checkpoint behind.
+    return True
+
+def decodeCheckpoint(data):
+    # The checkpoint's state dict, or None if it is damaged or from another format version.
+    if data is None or len(data) < HEADER.size:
+        return None
+    magic, version, crc, length = HEADER.unpack_from(data)
+    payload = bytes(data[HEADER.size:HEADER.size + length])
+    if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION or len(payload) != length or zlib.crc32(payload) != crc:
+        return None
+    return SymbolUnpickler(io.BytesIO(zlib.decompress(payload))).load()
+
+class StrategyCheckpoint:
+    def __init__(self, key=None, path=None):
+        self.key = key or c.checkpoint_object_store_key
+        self.path = path if path is not None else c.checkpoint_file_path
+        self.restored_time = None # Algorithm time of the checkpoint restored at start-up, if any
+
+    def enabled(self, algorithm):
+        return c.checkpoint_enabled and (algorithm.LiveMode or c.checkpoint_in_backtests)
+
+    def capture(self, algorithm):
+        v.indicator_engine.flush()
+            # Bars staged but not applied yet would be lost.
+        return {
+            'time': algorithm.Time,
+            'indicator_fingerprint': indicatorFingerprint(),
+            'indicator_engine': v.indicator_engine.checkpointState(),
+            'trade_statistics': v.trade_statistics.checkpointState(),
+            'order_tags': v.order_tags.checkpointState(),
+            'day_trade_counter': v.day_trade_counter,
+            'day_trade_dates': list(v.day_trade_dates),
+            'daily_transactions': dict(v.daily_transactions),
+            'max_symbol_price': v.max_symbol_price,
+            'symbol_states': {
+                symbol: {field: getattr(state, field) for field in SYMBOL_STATE_FIELDS}
+                for symbol, state in v.symbol_states.items()
+            }
+        }
+
+    def save(self, algorithm):
+        if not self.enabled(algorithm) or algorithm.IsWarmingUp:
+            return False
+        try:
+            pickled = pickleCheckpoint(self.capture(algorithm))
+            v.persistence_writer.save(
+                self.path or self.key, lambda: packCheckpoint(pickled),
+                write=writeCheckpointFile if self.path else None
+            ) # Compressed and written by the background writer, see persistenceWriter.py.
+            v.log.debug("checkpoint", "Checkpoint queued: {} bytes before compression", len(pickled))
+            return True
+        except Exception as e:
+            v.log.error("checkpoint", "Error on save: {}", e)
+            return False
+
+    def read(self, algorithm):
+        if self.path:
+            if not os.path.exists(self.path):
+                return None
+            with open(self.path, 'rb') as f:
+                return f.read()
+        if not algorithm.ObjectStore.ContainsKey(self.key):
+            return None
+        return algorithm.ObjectStore.ReadBytes(self.key)
+
+    def restore(self, algorithm, now):
+        # Load a valid checkpoint taken before `now` into variables.py. Returns its time, or None.
+        if not self.enabled(algorithm):
+            return None
+        try:
+            state = decodeCheckpoint(self.read(algorithm))
+        except Exception as e:
+            v.log.error("checkpoint", "Error on restore: {}", e)
+            return None
+        if state is None or state['indicator_fingerprint'] != indicatorFingerprint() or state['time'] > now:
+            v.log.info("checkpoint", "No usable checkpoint, warming up from scratch")
+            return None
+
+        try:
+            indicator_engine = MultiTimeframeIndicatorEngine.fromCheckpoint(state['indicator_engine'])
+            trade_statistics = TradeStatistics.fromCheckpoint(state['trade_statistics'])
+            order_tags = OrderTagJournal.fromCheckpoint(state['order_tags'], loadOrderTags(algorithm.ObjectStore))
+                # Every component is built before any of variables.py changes.
+        except (KeyError, ValueError) as e:
+            v.log.info("checkpoint", "Stale checkpoint, warming up from scratch: {}", e)
+            return None
+
+        v.indicator_engine = indicator_engine
+        v.indicator_engine.skipAppliedBars()
+        v.trade_statistics = trade_statistics
+        v.order_tags = order_tags
+        v.day_trade_counter = state['day_trade_counter']
+        v.day_trade_dates = collections.deque(state['day_trade_dates'], maxlen=v.day_trade_dates.maxlen)
+        v.daily_transactions = state['daily_transactions']
+        v.max_symbol_price = state['max_symbol_price']
+
+        for symbol, fields in state['symbol_states'].items():
+            symbol_state = symbolState(symbol)
+            for field, value in fields.items():
+                setattr(symbol_state, field, value)
+
+        self.restored_time = state['time']
+        v.log.info("checkpoint", "Restored checkpoint from {}: {} symbols", self.restored_time, len(state['symbol_states']))
+        return self.restored_time
+
+# End checkpoint.py
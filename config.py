@@ -25,13 +25,21 @@ finest_resolution = Resolution.Daily
     # Sets the finest time resolution for WarmUp, Universe OnData slices, and indicators.
     # Can be set to lower resolution for faster backtest runs, for easier troubleshooting.
 
+indicator_timeframes = {}
+    # Bar timeframe of each indicator, by key: 'atr_min', 'atr', 'emaShort', 'emaLong', 'macd', 'rsi', 'sto'.
+    # Values: Resolution.Minute, timedelta(minutes=5), timedelta(minutes=15), Resolution.Hour, Resolution.Daily.
+    # Indicators not listed use finest_resolution. Timeframes finer than finest_resolution use finest_resolution.
+    # e.g. {'atr': Resolution.Daily, 'macd': Resolution.Hour, 'rsi': timedelta(minutes=15)}
+    # Each symbol gets one consolidation cascade (minute -> 5m -> 15m -> hour -> day) up to the coarsest timeframe used.
+
 warmup_period = 30
 def SetWarmUp(algorithm_instance):
-    algorithm_instance.SetWarmUp(warmup_period, finest_resolution)
+    from consolidationCascade import warmupBars
+    algorithm_instance.SetWarmUp(*warmupBars())
     # Built-in QuantConnect method: SetWarmUp ensures time-based indicator data will be correct.
-    # Period should be the max time needed by any of the indicators, at least 26 days,
+    # Warms up warmup_period bars of the coarsest timeframe in indicator_timeframes (finest_resolution if empty).
+    # warmup_period should be the max number of bars needed by any of the indicators, at least 26,
     # or the equivalent to 26 days in the resolution set by finest_resolution.
-    # Resolution should be the finest level of detail out of all the indicators.
 
 def SetBrokerageModel(algorithm_instance):
     algorithm_instance.SetBrokerageModel(BrokerageName.TradierBrokerage, AccountType.Cash)
@@ -42,6 +50,108 @@ max_pending_order_age_minutes = 15
     # Expire any pending (un-filled) submitted orders after this time.
     # If the order went un-filled for too long, we lost the opportunity. 
     # Only Limit Orders, not Market Orders, will be affected.
+
+sector_exposure_refresh_minutes = 30
+    # How often sector holdings are revalued at current prices for the max sector invested % condition.
+    # Fills update them immediately, this only catches price moves of held symbols in between.
+
+order_tag_journal_object_store_key = "order-tags.json"
+    # Object Store key the order tag side-table is saved to at the end of the algorithm.
+    # Order tags are short IDs like "B-17" that point to the full buy/sell condition snapshot in this table.
+
+checkpoint_enabled = True
+    # Periodically save all strategy state (indicators, trade statistics, open orders, day trades) to a checkpoint.
+    # A restarted live deployment restores it and only warms up on the bars since, instead of the full warm-up period.
+
+checkpoint_in_backtests = False
+    # Also save and restore checkpoints in backtests. Off by default, so every backtest starts from scratch.
+
+checkpoint_interval_minutes = 60
+    # How often the checkpoint is saved while trading. It is also saved at the end of the algorithm.
+
+checkpoint_object_store_key = "checkpoint.bin"
+    # Object Store key of the checkpoint.
+
+checkpoint_file_path = None
+    # Save the checkpoint to this local file instead of the Object Store, e.g. for local runs.
+
+checkpoint_compression_level = 6
+    # zlib compression level of the checkpoint, 1 (fastest) to 9 (smallest).
+
+buy_plan_condition_order = []
+    # Evaluation order of the enabled buy conditions, by name (see BUY_GATES in buyPlan.py).
+    # e.g. ["RSIStrong", "EMACrossover"]. Listed conditions run first within their stage, the rest keep their default order.
+    # Put cheap conditions that reject the most symbols first; the hit rates reported at the end of the algorithm show which.
+
+buy_plan_report_hit_rates = True
+    # Log how often each buy condition was evaluated and passed at the end of the algorithm.
+
+chart_store_object_store_prefix = "charts"
+    # Object Store folder for the indicator and position size chart rows recorded by charts.py.
+
+chart_store_flush_rows = 5000
+    # Chart rows are buffered in memory and saved as one compressed chunk per trading day,
+    # or sooner once this many rows are buffered.
+
+persistence_writer_enabled = True
+    # Write Object Store saves (chart chunks, order tags, checkpoints) on a background thread, so OnData never waits on them.
+    # When off, every save is written synchronously. See persistenceWriter.py.
+
+persistence_queue_size = 64
+    # Saves waiting for the background writer, at most. Full queues apply persistence_drop_policy or backpressure.
+
+persistence_batch_size = 16
+    # Saves the writer takes from the queue at once. Only the latest save of each key in a batch is written.
+
+persistence_drop_policy = "oldest"
+    # What happens to droppable saves (chart chunks) when the queue is full:
+    # "oldest" drops the oldest queued chart chunk to make room, "newest" drops the new one.
+    # Order tags and checkpoints are never dropped: they wait for room instead.
+
+persistence_block_timeout_seconds = 5
+    # Longest a save that can't be dropped waits for room in a full queue, before it replaces the queued saves
+    # of its key or is queued past the bound.
+
+persistence_flush_timeout_seconds = 60
+    # Longest the end of the algorithm waits for the queued saves to be written.
+
+log_level = "INFO"
+    # Minimum level of messages written to the log: "DEBUG", "INFO", "WARNING" or "ERROR".
+    # DEBUG includes per-bar and per-slice messages, which flood the log at minute resolution.
+
+log_sample_every = {
+    "OnSecuritiesChanged.updateIndicators": 100,
+    "OnData.plotIndicators": 0,
+    "OnData.indicatorNotReady": 100
+}   # Only write every Nth message of these call sites (0 = never). Other sites write every message.
+
+log_rate_limit_messages = 50
+log_rate_limit_minutes = 60
+    # Each call site writes at most this many messages per this many minutes of algorithm time.
+
+log_buffer_level = "INFO"
+log_buffer_size = 200
+    # The most recent messages at or above this level are kept in memory, even if not written to the log.
+    # "DEBUG" also keeps the per-bar and per-slice messages, but then every debug call on the hot path
+    # reads the algorithm time and is buffered, even when log_level hides it.
+
+log_dump_on_error = True
+    # On an error, write the kept messages recorded since the previous error to the log.
+
+profiling_enabled = False
+    # Time the main entry points (OnData, updateIndicators, shouldBuy, shouldSell, stop loss / take profit
+    # levels, chart writers, filterAndSortUniverse, OnOrderEvent) and report calls, total, mean and max
+    # time of each at the end of the algorithm. See profiler.py.
+
+profiling_cprofile_slices = None
+    # (first, last) OnData slices after the warm-up to run cProfile over, e.g. (100, 200). None = off.
+    # cProfile slows those slices down several times, so keep the window short.
+
+profiling_cprofile_top = 30
+    # Number of functions listed in the cProfile report, by cumulative time.
+
+profiling_report_object_store_key = "profile_report.txt"
+    # Object Store key the profiling report is saved to, besides the log. None = log only.
 # -----------------------------------------------------
 
 # -----------------------------------------------------
@@ -110,6 +220,12 @@ symbol_filter_parameter_max_pe_ratio = 20
 symbol_filter_parameter_min_revenue_growth_percent = 0
     # Require symbol to have positive Revenue Growth for past year.
 
+symbol_filter_parameter_top_dollar_volume_count = 100
+symbol_filter_parameter_lowest_pe_ratio_count = 50
+symbol_filter_parameter_lowest_market_cap_count = 10
+    # Of the symbols passing the filters above, keep the 100 with the highest Dollar Volume,
+    # of those the 50 with the lowest P/E Ratio, and of those the 10 with the lowest Market Cap.
+
     # If dynamic universe is selected,
     # List of symbol we don't want to trade due to ethics or other reasons.
 symbol_filter_parameter_blacklist = [
@@ -288,6 +404,39 @@ buy_parameter_stochastic_rsi_min_threshold = 0.5
 buy_condition_kelly_criterion_position_size = True
     # Uses the win probability and win/loss ratio to determine the optimal fraction of capital to be used for each trade
 
+buy_parameter_kelly_criterion_scope = "global"
+    # Which trades the Kelly Criterion is calculated from: "global" (all trades), "symbol" (this symbol's trades)
+    # or "sector" (trades in this symbol's sector). Uses all trades while the scope has too few of its own.
+
+trade_statistics_window = 50
+    # Win probability, win/loss ratio and Kelly Criterion are calculated over this many most recent trades.
+
+trade_statistics_min_trades = 10
+    # Kelly Criterion doesn't limit position sizes until at least this many trades have been closed.
+
+monte_carlo_kelly_enabled = True
+    # Size positions with a risk-adjusted Kelly Criterion from a bootstrap of the scope's trade returns,
+    # instead of the point estimate. Refreshed daily. See monteCarlo.py.
+
+monte_carlo_paths = 2000
+    # Number of resampled trade sequences.
+
+monte_carlo_trades_per_path = None
+    # Trades per resampled sequence. None = as many as the scope's trade window holds.
+
+monte_carlo_kelly_percentile = 25
+    # Percentile of the resampled Kelly fractions to size with. Lower is more conservative, 50 is the median.
+
+monte_carlo_max_drawdown = 0.25
+monte_carlo_drawdown_percentile = 95
+    # The Kelly fraction is also capped so that this percentile of resampled max drawdowns stays within this limit.
+
+monte_carlo_fraction_steps = 20
+    # Fractions of capital per trade (0 to 1 in this many steps) the drawdown limit is checked at.
+
+monte_carlo_seed = 0
+    # Random seed, so backtests are reproducible. None = different samples every run.
+
 buy_condition_limit_order_percent = True
     # Attempt to place Buy orders at a discounted limit price instead of market price.
 
@@ -328,6 +477,7 @@ sell_condition_stop_loss_trailing_percent = True
 
 sell_condition_take_profit_atr_price = True
     # An ATR Multiplier-based Stop Loss Price is set by using the Average True Range value, a measure of market volatility, to determine a stop loss level that adjusts with the asset's recent price fluctuations. 
+    # Not one of the take profit levels the highest is chosen from (see riskLevels.TAKE_PROFIT_METHODS), as in the original strategy.
 
 sell_condition_take_profit_fibonacci_atr_price = True
     # A Fibonacci Retracement-Based Take Profit Price is established using key Fibonacci levels as potential targets for exiting a position, based on the assumption that price may reverse after reaching these historically significant proportions of a prior move.
@@ -0,0 +1,98 @@
+# Begin consolidationCascade.py
+
+# Multi-timeframe consolidation cascade.
+#   Each indicator runs on the timeframe c.indicator_timeframes gives it (c.finest_resolution if
+#   not listed). For every symbol, one chain of consolidators is built from the finest resolution up
+#   to the coarsest timeframe in use, e.g. minute -> 5 minutes -> 15 minutes -> hour -> day.
+#   Only the first level is registered with the SubscriptionManager. Each level above it is fed by
+#   the consolidated bars of the level below, so a bar is aggregated once per level no matter how
+#   many indicators use it, and a daily bar is built from 7 hourly bars instead of 390 minute bars.
+#   Levels with indicators stage their bars into that timeframe's IndicatorEngine, see indicatorEngine.py.
+
+from AlgorithmImports import *
+import config as c
+from indicatorEngine import INDICATOR_KEYS
+
+CASCADE_PERIODS = (
+    timedelta(minutes=1),
+    timedelta(minutes=5),
+    timedelta(minutes=15),
+    timedelta(hours=1),
+    timedelta(days=1)
+) # Standard levels between the finest resolution and the coarsest indicator timeframe.
+
+RESOLUTION_PERIODS = (
+    (Resolution.Daily, timedelta(days=1)),
+    (Resolution.Hour, timedelta(hours=1)),
+    (Resolution.Minute, timedelta(minutes=1)),
+    (Resolution.Second, timedelta(seconds=1))
+) # Coarsest first.
+
+def timeframePeriod(timeframe):
+    # Bar period of a Resolution or timedelta.
+    if isinstance(timeframe, timedelta):
+        return timeframe
+    for resolution, period in RESOLUTION_PERIODS:
+        if resolution == timeframe:
+            return period
+    raise ValueError(f"Unsupported indicator timeframe: {timeframe}")
+
+def indicatorPeriods():
+    # {indicator key: bar period}. Timeframes finer than finest_resolution use finest_resolution.
+    finest = timeframePeriod(c.finest_resolution)
+    return {
+        key: max(timeframePeriod(c.indicator_timeframes.get(key, c.finest_resolution)), finest)
+        for key in INDICATOR_KEYS
+    }
+
+def warmupBars():
+    # (bar count, resolution) for SetWarmUp: c.warmup_period bars of the coarsest indicator timeframe.
+    coarsest = max(indicatorPeriods().values())
+    for resolution, period in RESOLUTION_PERIODS:
+        if coarsest >= period and coarsest % period == timedelta(0):
+            return c.warmup_period * (coarsest // period), resolution
+    return c.warmup_period, c.finest_resolution
+
+def periodStart(time, period):
+    # Start of the `period` bar containing `time`, with bars aligned to midnight like the consolidators.
+    midnight = datetime.combine(time.date(), datetime.min.time())
+    if period >= timedelta(days=1):
+        return midnight
+    return midnight + ((time - midnight) // period) * period
+
+def replayStart(checkpoint_time):
+    # Where a warm-up restored from a checkpoint starts: the start of the coarsest indicator bar
+    # containing the checkpoint time, so that bar is consolidated from all of its data.
+    return periodStart(checkpoint_time, max(indicatorPeriods().values()))
+
+def cascadeLevels(periods):
+    # [(period, period of the level feeding it, or None for the subscription)], finest to coarsest.
+    finest = timeframePeriod(c.finest_resolution)
+    coarsest = max(periods)
+    levels = sorted({finest, *periods, *(period for period in CASCADE_PERIODS if finest < period < coarsest)})
+    cascade = []
+    for i, period in enumerate(levels):
+        source = None
+        if i:
+            source = next((lower for lower in reversed(levels[:i]) if period % lower == timedelta(0)), levels[0])
+                # The coarsest level below that divides this one evenly.
+        cascade.append((period, source))
+    return cascade
+
+class ConsolidationCascade:
+    def __init__(self, algorithm, symbol, levels, indicator_periods, onBar):
+        # onBar(period, bar) receives the consolidated bars of every level in indicator_periods.
+        self.consolidators = {} # Period -> consolidator, finest first
+        for period, source in levels:
+            if source is None:
+                consolidator = algorithm.ResolveConsolidator(symbol, c.finest_resolution)
+                algorithm.SubscriptionManager.AddConsolidator(symbol, consolidator)
+            else:
+                consolidator = TradeBarConsolidator(period)
+                self.consolidators[source].DataConsolidated += lambda sender, bar, consolidator=consolidator: consolidator.Update(bar)
+                    # Fed by the level below, not by the subscription.
+            if period in indicator_periods:
+                consolidator.DataConsolidated += lambda sender, bar, period=period: onBar(period, bar)
+            self.consolidators[period] = consolidator
+
+# End consolidationCascade.py
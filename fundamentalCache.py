@@ -0,0 +1,182 @@
+# Begin fundamentalCache.py
+
+# Columnar fundamentals and an on-disk, memory-mapped snapshot cache of them.
+#   AddUniverseHandler.filterAndSortUniverse reads fundamentals as columns (NumPy arrays), from either:
+#       - FundamentalColumns: an adapter over LEAN's List[Fundamental], reading each field through
+#         interop at most once per symbol, and the nested ratios only for the symbols that need them.
+#       - FundamentalSnapshot: one date of fundamentals stored as .npy files and memory-mapped
+#         read-only, so selection reads them zero-copy without building any Fundamental objects.
+#
+#   FundamentalCache stores one snapshot per date and source, for repeated local backtests and sweeps:
+#       <root>/<source key>/<YYYY-MM-DD>/<field>.npy + meta.json
+#   Invalidation rule: a snapshot is only used if its meta.json has the current SCHEMA_VERSION and
+#   the same source fingerprint (e.g. the fundamentals file's size and modification time).
+#   Anything else is rebuilt from the source on the next access and replaces the stale snapshot.
+#   Bump SCHEMA_VERSION whenever SNAPSHOT_FIELDS or their meaning changes.
+
+from AlgorithmImports import *
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import numpy as np
+
+SCHEMA_VERSION = 1
+
+SNAPSHOT_FIELDS = {
+    # Field -> (dtype, how it is read from a Fundamental)
+    'symbol_id': (str, lambda f: str(f.Symbol.ID)),
+    'ticker': (str, lambda f: f.Symbol.Value),
+    'price': (np.float64, lambda f: f.Price),
+    'market_cap': (np.float64, lambda f: f.MarketCap),
+    'dollar_volume': (np.float64, lambda f: f.DollarVolume),
+    'pe_ratio': (np.float64, lambda f: f.ValuationRatios.PERatio),
+    'revenue_growth': (np.float64, lambda f: f.OperationRatios.RevenueGrowth.OneYear),
+    'sector_code': (np.int64, lambda f: f.AssetClassification.MorningstarSectorCode),
+    'has_data': (bool, lambda f: f.HasFundamentalData),
+}
+
+class FundamentalColumns:
+    # Columns over a List[Fundamental]. Each column is read once, when first used.
+    def __init__(self, fundamental):
+        self.fundamental = fundamental
+        self.count = len(fundamental)
+        self.columns = {}
+
+    def column(self, field):
+        values = self.columns.get(field)
+        if values is None:
+            dtype, read = SNAPSHOT_FIELDS[field]
+            if dtype is str:
+                values = np.array([read(f) for f in self.fundamental], dtype=str)
+            else:
+                values = np.fromiter((read(f) for f in self.fundamental), dtype=dtype, count=self.count)
+            self.columns[field] = values
+        return values
+
+    def values(self, field, indices):
+        # Field values of some symbols only, without reading the others.
+        if field in self.columns:
+            return self.columns[field][indices]
+        dtype, read = SNAPSHOT_FIELDS[field]
+        if dtype is str:
+            return [read(self.fundamental[i]) for i in indices]
+        return np.fromiter((read(self.fundamental[i]) for i in indices), dtype=dtype, count=len(indices))
+
+    def symbols(self, indices):
+        return [self.fundamental[i].Symbol for i in indices]
+
+class FundamentalSnapshot:
+    # One date of fundamentals, as read-only memory-mapped columns.
+    def __init__(self, date, columns):
+        self.date = date
+        self.columns = columns
+        self.count = len(columns['price'])
+
+    def column(self, field):
+        return self.columns[field]
+
+    def values(self, field, indices):
+        return self.columns[field][indices]
+
+    def symbols(self, indices):
+        return [Symbol(SecurityIdentifier.Parse(str(self.columns['symbol_id'][i])), str(self.columns['ticker'][i])) for i in indices]
+
+    def __len__(self):
+        return self.count
+
+def extractColumns(fundamentals):
+    # Read every snapshot field of every Fundamental once: the parsing the cache saves on later runs.
+    columns = {}
+    for field, (dtype, read) in SNAPSHOT_FIELDS.items():
+        values = [read(f) for f in fundamentals]
+        columns[field] = np.array(values, dtype=str if dtype is str else dtype) if values else np.zeros(0, dtype='U1' if dtype is str else dtype)
+    return columns
+
+def sourceFingerprint(*paths):
+    # Identifies the content of source files by path, size and modification time.
+    parts = []
+    for path in paths:
+        files = [path]
+        if os.path.isdir(path):
+            files = sorted(os.path.join(directory, name) for directory, _, names in os.walk(path) for name in names)
+        for file in files:
+            stat = os.stat(file)
+            parts.append(f"{os.path.abspath(file)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1("\n".join(parts).encode('utf-8')).hexdigest()
+
+class FundamentalCache:
+    def __init__(self, root, source, fingerprint):
+        # source: name of the fundamentals source, e.g. a file path or provider name.
+        # fingerprint: changes whenever the source's content does, see sourceFingerprint().
+        self.root = root
+        self.source = source
+        self.fingerprint = fingerprint
+        source_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', os.path.basename(str(source).rstrip('/\\')))[:40]
+        self.directory = os.path.join(root, f"{source_name}-{hashlib.sha1(str(source).encode('utf-8')).hexdigest()[:12]}")
+        self.hits = 0
+        self.misses = 0
+
+    def snapshotPath(self, date):
+        return os.path.join(self.directory, date.isoformat())
+
+    def load(self, date):
+        # The date's snapshot, or None if it is missing or stale.
+        path = self.snapshotPath(date)
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('schema_version') != SCHEMA_VERSION or meta.get('fingerprint') != self.fingerprint:
+            return None
+        columns = {
+            field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode='r', allow_pickle=False)
+            for field in SNAPSHOT_FIELDS
+        }
+        return FundamentalSnapshot(date, columns)
+
+    def store(self, date, fundamentals):
+        # Write the date's snapshot, replacing a stale one, and return it memory-mapped.
+        os.makedirs(self.directory, exist_ok=True)
+        columns = extractColumns(fundamentals)
+        staging = tempfile.mkdtemp(prefix=f".{date.isoformat()}-", dir=self.directory)
+        for field, values in columns.items():
+            np.save(os.path.join(staging, f"{field}.npy"), values, allow_pickle=False)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump({
+                'schema_version': SCHEMA_VERSION,
+                'fingerprint': self.fingerprint,
+                'source': str(self.source),
+                'date': date.isoformat(),
+                'count': len(fundamentals)
+            }, f)
+            # Written last: a snapshot without meta.json is never read.
+
+        path = self.snapshotPath(date)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+                # Stale snapshot.
+        try:
+            os.replace(staging, path)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+                # Another process (e.g. a sweep worker) stored the same date first.
+        snapshot = self.load(date)
+        return snapshot if snapshot is not None else FundamentalSnapshot(date, columns)
+
+    def get(self, date, build):
+        # The date's snapshot, building it with build() -> [Fundamental] only on a cache miss.
+        snapshot = self.load(date)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        return self.store(date, build())
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+# End fundamentalCache.py
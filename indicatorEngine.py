@@ -0,0 +1,444 @@
+# Begin indicatorEngine.py
+
+# Vectorized indicator engine.
+#   Keeps the state of every indicator for every symbol in NumPy arrays: one row per symbol
+#   and one column per indicator. Consolidated bars are staged as they arrive and the whole
+#   slice is applied in one batched step by flush(), instead of updating seven LEAN indicator
+#   objects per symbol through Python/.NET interop.
+#   addSymbol returns the {key: indicator} dict stored on the symbol's SymbolState, where each
+#   view exposes Current.Value, Previous.Value and IsReady (and Signal for the MACD),
+#   so shouldBuy, shouldSell and charts.plotIndicators read it unchanged.
+
+from AlgorithmImports import *
+import numpy as np
+import config as c
+
+INDICATOR_KEYS = ('atr_min', 'atr', 'emaShort', 'emaLong', 'macd', 'rsi', 'sto')
+    # Indicator keys, in the same order initializeIndicators used to build them.
+
+# Columns of the current / previous value arrays.
+COLUMN_ATR_MIN = 0
+COLUMN_ATR = 1
+COLUMN_EMA_SHORT = 2
+COLUMN_EMA_LONG = 3
+COLUMN_MACD = 4
+COLUMN_MACD_SIGNAL = 5
+COLUMN_RSI = 6
+COLUMN_STO = 7
+COLUMN_COUNT = 8
+
+KEY_COLUMNS = {
+    'atr_min': COLUMN_ATR_MIN,
+    'atr': COLUMN_ATR,
+    'emaShort': COLUMN_EMA_SHORT,
+    'emaLong': COLUMN_EMA_LONG,
+    'macd': COLUMN_MACD,
+    'rsi': COLUMN_RSI,
+    'sto': COLUMN_STO
+} # Value column of each indicator key.
+
+STATE_ARRAYS = (
+    'current', 'previous', 'last_close', 'macd_fast', 'macd_slow', 'rsi_gain', 'rsi_loss',
+    'min_window', 'high_window', 'low_window', 'samples', 'ready'
+) # Per-symbol state arrays, saved by checkpointState().
+
+# Fixed parameters, matching MovingAverageConvergenceDivergence(12, 26, 9, Wilders) and Stochastic(14, 3, 3).
+MACD_FAST_PERIODS = 12
+MACD_SLOW_PERIODS = 26
+MACD_SIGNAL_PERIODS = 9
+STO_PERIODS = 14
+STO_K_PERIODS = 3
+STO_D_PERIODS = 3
+
+
+class IndicatorValue:
+    # Stand-in for IndicatorDataPoint: reads one cell of the engine's value arrays.
+    __slots__ = ('_engine', '_array', '_slot', '_column')
+
+    def __init__(self, engine, array, slot, column):
+        self._engine = engine
+        self._array = array
+        self._slot = slot
+        self._column = column
+
+    @property
+    def Value(self):
+        return float(getattr(self._engine, self._array)[self._slot, self._column])
+
+
+class IndicatorView:
+    # Stand-in for a LEAN indicator object for one symbol and one column.
+    __slots__ = ('_engine', '_slot', '_column', 'Current', 'Previous', 'Signal')
+
+    def __init__(self, engine, slot, column, signal_column=None):
+        self._engine = engine
+        self._slot = slot
+        self._column = column
+        self.Current = IndicatorValue(engine, 'current', slot, column)
+        self.Previous = IndicatorValue(engine, 'previous', slot, column)
+        self.Signal = (
+            IndicatorView(engine, slot, signal_column)
+            if signal_column is not None else None
+        ) # Only the MACD has a signal line.
+
+    @property
+    def IsReady(self):
+        return bool(self._engine.samples[self._slot] >= self._engine.ready_after[self._column])
+
+    @property
+    def Samples(self):
+        return int(self._engine.samples[self._slot])
+
+    def Update(self, bar):
+        # Stage the bar for this view's symbol; the values change on the next flush().
+        self._engine.stageSlot(self._slot, bar)
+        return self.IsReady
+
+
+class IndicatorEngine:
+    CHECKPOINT_VERSION = 1 # Bump when checkpointState() changes shape, see checkpoint.py.
+
+    def __init__(self, capacity=64, keys=INDICATOR_KEYS):
+        self.keys = tuple(keys)
+        self.capacity = 0
+        self.slots = {} # Symbol -> row index.
+        self.free_slots = []
+        self.pending = {} # Row index -> (end_time, high, low, close) staged since the last flush.
+        self.skip_until = None # Bars ending at or before this time are already applied, see checkpoint.py.
+        self.last_bar_time = None # End time of the latest bar applied by flush(), where a restored engine resumes.
+
+        # Periods from config.py, same as the LEAN indicators they replace.
+        self.atr_min_periods = c.buy_parameter_atr_low_period
+        self.atr_periods = c.buy_parameter_atr_periods
+        self.ema_short_periods = c.buy_parameter_ema_short_periods
+        self.ema_long_periods = c.buy_parameter_ema_long_periods
+        self.rsi_periods = c.buy_parameter_rsi_periods
+
+        # Number of bars a symbol needs before each column IsReady.
+        self.ready_after = np.zeros(COLUMN_COUNT, dtype=np.int64)
+        self.ready_after[COLUMN_ATR_MIN] = self.atr_min_periods
+        self.ready_after[COLUMN_ATR] = self.atr_periods + 1
+            # The first bar only seeds the previous close for the True Range.
+        self.ready_after[COLUMN_EMA_SHORT] = self.ema_short_periods
+        self.ready_after[COLUMN_EMA_LONG] = self.ema_long_periods
+        self.ready_after[COLUMN_MACD] = MACD_SLOW_PERIODS + MACD_SIGNAL_PERIODS - 1
+        self.ready_after[COLUMN_MACD_SIGNAL] = MACD_SLOW_PERIODS + MACD_SIGNAL_PERIODS - 1
+            # The signal line only starts once the slow average is ready, like LEAN's MACD.
+        self.ready_after[COLUMN_RSI] = self.rsi_periods + 1
+            # The first bar only seeds the previous close for gains / losses.
+        self.ready_after[COLUMN_STO] = STO_PERIODS + STO_K_PERIODS + STO_D_PERIODS - 2
+            # Fast %K window plus the %K and %D smoothing warm-up.
+        self.ready_bar_count = int(max(self.ready_after[KEY_COLUMNS[key]] for key in self.keys)) if self.keys else 0
+            # Bars a symbol needs before all of this engine's indicators are ready.
+
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        # Resize every state array to hold at least `capacity` symbols, keeping existing rows.
+        if capacity <= self.capacity:
+            return
+        old_capacity = self.capacity
+
+        def resized(name, shape, fill):
+            array = np.full(shape, fill, dtype=np.float64)
+            if old_capacity:
+                array[:old_capacity] = getattr(self, name)
+            setattr(self, name, array)
+
+        resized('current', (capacity, COLUMN_COUNT), 0.0)
+        resized('previous', (capacity, COLUMN_COUNT), 0.0)
+        resized('last_close', capacity, np.nan)
+        resized('macd_fast', capacity, 0.0)
+        resized('macd_slow', capacity, 0.0)
+        resized('rsi_gain', capacity, 0.0)
+        resized('rsi_loss', capacity, 0.0)
+        resized('min_window', (capacity, self.atr_min_periods), np.inf)
+        resized('high_window', (capacity, STO_PERIODS), -np.inf)
+        resized('low_window', (capacity, STO_PERIODS), np.inf)
+
+        samples = np.zeros(capacity, dtype=np.int64)
+        ready = np.zeros(capacity, dtype=bool)
+        if old_capacity:
+            samples[:old_capacity] = self.samples
+            ready[:old_capacity] = self.ready
+        self.samples = samples
+        self.ready = ready
+            # Readiness bitmap: row has all of this engine's indicators ready. Set by update(), so
+            # checking a symbol is one lookup instead of IsReady on each of its indicators.
+
+        self.free_slots.extend(range(capacity - 1, old_capacity - 1, -1))
+        self.capacity = capacity
+
+    def checkpointState(self):
+        # Plain copy of the indicator state for checkpoint.py. Call flush() first: staged bars aren't included.
+        state = {
+            'version': self.CHECKPOINT_VERSION,
+            'keys': self.keys,
+            'capacity': self.capacity,
+            'slots': dict(self.slots),
+            'free_slots': list(self.free_slots),
+            'last_bar_time': self.last_bar_time
+        }
+        for name in STATE_ARRAYS:
+            state[name] = getattr(self, name).copy()
+        return state
+
+    @classmethod
+    def fromCheckpoint(cls, state):
+        # Engine restored from checkpointState(). Raises ValueError if the state doesn't fit this version.
+        if state.get('version') != cls.CHECKPOINT_VERSION:
+            raise ValueError(f"IndicatorEngine checkpoint version {state.get('version')}, expected {cls.CHECKPOINT_VERSION}")
+        engine = cls(capacity=state['capacity'], keys=state['keys'])
+        for name in STATE_ARRAYS:
+            array = state[name]
+            if array.shape != getattr(engine, name).shape or array.dtype != getattr(engine, name).dtype:
+                raise ValueError(f"IndicatorEngine checkpoint array {name} has shape {array.shape}, expected {getattr(engine, name).shape}")
+            setattr(engine, name, array)
+        engine.slots = dict(state['slots'])
+        engine.free_slots = list(state['free_slots'])
+        engine.last_bar_time = state['last_bar_time']
+        return engine
+
+    def addSymbol(self, symbol):
+        # Assign a row to the symbol and return its {key: indicator view} dict.
+        if symbol not in self.slots:
+            if not self.free_slots:
+                self.grow(max(2 * self.capacity, 1))
+            self.slots[symbol] = self.free_slots.pop()
+        slot = self.slots[symbol]
+
+        views = {}
+        for key in self.keys:
+            if key == 'macd':
+                views[key] = IndicatorView(self, slot, COLUMN_MACD, COLUMN_MACD_SIGNAL)
+            else:
+                views[key] = IndicatorView(self, slot, KEY_COLUMNS[key])
+        return views
+
+    def removeSymbol(self, symbol):
+        # Release the symbol's row and reset its state so the row can be reused.
+        slot = self.slots.pop(symbol, None)
+        if slot is None:
+            return
+        self.pending.pop(slot, None)
+        self.resetSlot(slot)
+        self.free_slots.append(slot)
+
+    def resetSlot(self, slot):
+        self.samples[slot] = 0
+        self.ready[slot] = False
+        self.current[slot] = 0.0
+        self.previous[slot] = 0.0
+        self.last_close[slot] = np.nan
+        self.macd_fast[slot] = 0.0
+        self.macd_slow[slot] = 0.0
+        self.rsi_gain[slot] = 0.0
+        self.rsi_loss[slot] = 0.0
+        self.min_window[slot] = np.inf
+        self.high_window[slot] = -np.inf
+        self.low_window[slot] = np.inf
+
+    def currentValues(self, symbols, key):
+        # Current values of one indicator for several symbols, as an array in the same order.
+        rows = np.fromiter((self.slots[symbol] for symbol in symbols), dtype=np.int64, count=len(symbols))
+        return self.current[rows, KEY_COLUMNS[key]]
+
+    def isReady(self, symbol):
+        # Whether all of the symbol's indicators are ready, from the readiness bitmap.
+        slot = self.slots.get(symbol)
+        return slot is not None and bool(self.ready[slot])
+
+    def readySymbolCount(self):
+        # Number of symbols whose indicators are all ready.
+        if not self.slots:
+            return 0
+        rows = np.fromiter(self.slots.values(), dtype=np.int64, count=len(self.slots))
+        return int(np.count_nonzero(self.ready[rows]))
+
+    def readySymbols(self):
+        # Set of symbols whose indicators are all ready.
+        return {symbol for symbol, slot in self.slots.items() if self.ready[slot]}
+
+    def stage(self, symbol, bar):
+        # Queue a consolidated bar for the symbol. Values update on the next flush().
+        if self.skip_until is not None and bar.EndTime <= self.skip_until:
+            return
+        slot = self.slots.get(symbol)
+        if slot is not None:
+            self.stageSlot(slot, bar)
+
+    def stageSlot(self, slot, bar):
+        staged = self.pending.get(slot)
+        if staged is not None and staged[0] != bar.EndTime:
+            self.flush()
+            # A second bar for the same symbol: apply the first one before staging it.
+        self.pending[slot] = (bar.EndTime, float(bar.High), float(bar.Low), float(bar.Close))
+
+    def flush(self):
+        # Apply every staged bar to all symbols in one batched step.
+        if not self.pending:
+            return 0
+        rows = np.fromiter(self.pending.keys(), dtype=np.int64, count=len(self.pending))
+        bars = np.array([staged[1:] for staged in self.pending.values()], dtype=np.float64)
+        end_time = max(staged[0] for staged in self.pending.values())
+        if self.last_bar_time is None or end_time > self.last_bar_time:
+            self.last_bar_time = end_time
+        self.pending.clear()
+        self.update(rows, bars[:, 0], bars[:, 1], bars[:, 2])
+        return len(rows)
+
+    def update(self, rows, high, low, close):
+        # Vectorized update of every indicator for the given rows (unique) with one bar each.
+        keys = self.keys
+        samples = self.samples[rows] + 1
+        self.samples[rows] = samples
+        self.ready[rows] = samples >= self.ready_bar_count
+        self.previous[rows] = self.current[rows]
+        values = self.current[rows]
+        previous_close = self.last_close[rows]
+        has_previous = samples > 1
+
+        if 'atr_min' in keys:
+            self.min_window[rows, (samples - 1) % self.atr_min_periods] = close
+            values[:, COLUMN_ATR_MIN] = self.min_window[rows].min(axis=1)
+
+        if 'atr' in keys:
+            true_range = np.maximum(
+                high - low,
+                np.maximum(np.abs(high - previous_close), np.abs(low - previous_close))
+            )
+            count = np.maximum(samples - 1, 1)
+            values[:, COLUMN_ATR] = np.where(
+                has_previous,
+                smoothWilders(values[:, COLUMN_ATR], true_range, count, self.atr_periods),
+                0.0
+            )
+
+        if 'emaShort' in keys:
+            values[:, COLUMN_EMA_SHORT] = smoothExponential(values[:, COLUMN_EMA_SHORT], close, samples, self.ema_short_periods)
+
+        if 'emaLong' in keys:
+            values[:, COLUMN_EMA_LONG] = smoothExponential(values[:, COLUMN_EMA_LONG], close, samples, self.ema_long_periods)
+
+        if 'macd' in keys:
+            fast = smoothWilders(self.macd_fast[rows], close, samples, MACD_FAST_PERIODS)
+            slow = smoothWilders(self.macd_slow[rows], close, samples, MACD_SLOW_PERIODS)
+            self.macd_fast[rows] = fast
+            self.macd_slow[rows] = slow
+            macd = fast - slow
+            values[:, COLUMN_MACD] = macd
+            signal_count = samples - MACD_SLOW_PERIODS + 1
+            values[:, COLUMN_MACD_SIGNAL] = np.where(
+                signal_count > 0,
+                smoothWilders(values[:, COLUMN_MACD_SIGNAL], macd, np.maximum(signal_count, 1), MACD_SIGNAL_PERIODS),
+                0.0
+            )
+
+        if 'rsi' in keys:
+            change = np.where(has_previous, close - previous_close, 0.0)
+            count = np.maximum(samples - 1, 1)
+            gain = np.where(has_previous, smoothWilders(self.rsi_gain[rows], np.maximum(change, 0.0), count, self.rsi_periods), 0.0)
+            loss = np.where(has_previous, smoothWilders(self.rsi_loss[rows], np.maximum(-change, 0.0), count, self.rsi_periods), 0.0)
+            self.rsi_gain[rows] = gain
+            self.rsi_loss[rows] = loss
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = np.where(loss == 0.0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+            values[:, COLUMN_RSI] = np.where(has_previous, rsi, 0.0)
+
+        if 'sto' in keys:
+            position = (samples - 1) % STO_PERIODS
+            self.high_window[rows, position] = high
+            self.low_window[rows, position] = low
+            highest = self.high_window[rows].max(axis=1)
+            lowest = self.low_window[rows].min(axis=1)
+            denominator = highest - lowest
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fast = np.where(denominator == 0.0, 0.0, (close - lowest) / denominator)
+            values[:, COLUMN_STO] = np.where(samples >= STO_PERIODS, fast * 100.0, 0.0)
+
+        self.current[rows] = values
+        self.last_close[rows] = close
+
+
+class MultiTimeframeIndicatorEngine:
+    # One IndicatorEngine per indicator timeframe, fed by the consolidation cascade (consolidationCascade.py).
+    #   Presents the same interface as a single engine, except that stage() takes the bar's timeframe.
+    CHECKPOINT_VERSION = 1 # Bump when checkpointState() changes shape, see checkpoint.py.
+    def __init__(self, key_periods):
+        # key_periods: {indicator key: bar period}, see consolidationCascade.indicatorPeriods().
+        self.key_periods = dict(key_periods)
+        self.engines = {} # Bar period -> IndicatorEngine with the indicators of that timeframe
+        for period in sorted(set(self.key_periods.values())):
+            self.engines[period] = IndicatorEngine(keys=[key for key in INDICATOR_KEYS if self.key_periods.get(key) == period])
+
+    @property
+    def periods(self):
+        return tuple(self.engines)
+
+    def checkpointState(self):
+        return {
+            'version': self.CHECKPOINT_VERSION,
+            'key_periods': dict(self.key_periods),
+            'engines': {period: engine.checkpointState() for period, engine in self.engines.items()}
+        }
+
+    @classmethod
+    def fromCheckpoint(cls, state):
+        if state.get('version') != cls.CHECKPOINT_VERSION:
+            raise ValueError(f"MultiTimeframeIndicatorEngine checkpoint version {state.get('version')}, expected {cls.CHECKPOINT_VERSION}")
+        multi = cls(state['key_periods'])
+        if set(state['engines']) != set(multi.engines):
+            raise ValueError("MultiTimeframeIndicatorEngine checkpoint has other timeframes")
+        multi.engines = {period: IndicatorEngine.fromCheckpoint(state['engines'][period]) for period in multi.engines}
+        return multi
+
+    def skipAppliedBars(self):
+        # After a restore: each engine ignores the replayed bars up to the last one it had applied,
+        # at its own timeframe. See checkpoint.py.
+        for engine in self.engines.values():
+            engine.skip_until = engine.last_bar_time
+
+    def addSymbol(self, symbol):
+        # {key: indicator view} over all timeframes, in INDICATOR_KEYS order.
+        views = {}
+        for engine in self.engines.values():
+            views.update(engine.addSymbol(symbol))
+        return {key: views[key] for key in INDICATOR_KEYS if key in views}
+
+    def removeSymbol(self, symbol):
+        for engine in self.engines.values():
+            engine.removeSymbol(symbol)
+
+    def stage(self, period, symbol, bar):
+        engine = self.engines.get(period)
+        if engine is not None:
+            engine.stage(symbol, bar)
+
+    def flush(self):
+        return sum(engine.flush() for engine in self.engines.values())
+
+    def currentValues(self, symbols, key):
+        return self.engines[self.key_periods[key]].currentValues(symbols, key)
+
+    def isReady(self, symbol):
+        for engine in self.engines.values():
+            if not engine.isReady(symbol):
+                return False
+        return True
+
+    def readySymbolCount(self):
+        if len(self.engines) == 1:
+            return next(iter(self.engines.values())).readySymbolCount()
+        return len(set.intersection(*(engine.readySymbols() for engine in self.engines.values())))
+
+
+def smoothExponential(values, inputs, samples, periods):
+    # EMA seeded with the simple average of the first `periods` inputs, like LEAN's ExponentialMovingAverage.
+    alpha = np.where(samples <= periods, 1.0 / samples, 2.0 / (periods + 1))
+    return values + (inputs - values) * alpha
+
+def smoothWilders(values, inputs, samples, periods):
+    # Wilder's moving average seeded with the simple average of the first `periods` inputs.
+    return values + (inputs - values) / np.minimum(samples, periods)
+
+# End indicatorEngine.py
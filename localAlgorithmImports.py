@@ -0,0 +1,888 @@
+# Begin localAlgorithmImports.py
+
+# Pure-Python stand-in for the parts of LEAN's AlgorithmImports this algorithm uses.
+#   Lets localReplay.py run CodysAdvancedStrategy outside QuantConnect: localReplay registers this
+#   module as "AlgorithmImports" before importing main.py, so every `from AlgorithmImports import *`
+#   resolves here. Only the API surface the algorithm touches is implemented, with a simple,
+#   deterministic brokerage simulation (no fees, cash account, limit orders fill on a later bar
+#   that trades through the limit, market orders fill immediately at the last price).
+#   Never upload this file to a QuantConnect project.
+
+import math
+import os
+from datetime import datetime, timedelta
+from typing import List
+
+# -----------------------------------------------------
+# Enums
+# -----------------------------------------------------
+class Resolution:
+    Tick = 'Tick'
+    Second = 'Second'
+    Minute = 'Minute'
+    Hour = 'Hour'
+    Daily = 'Daily'
+
+RESOLUTION_TIMEDELTA = {
+    Resolution.Tick: timedelta(0),
+    Resolution.Second: timedelta(seconds=1),
+    Resolution.Minute: timedelta(minutes=1),
+    Resolution.Hour: timedelta(hours=1),
+    Resolution.Daily: timedelta(days=1)
+} # Bar period of each resolution.
+
+class BrokerageName:
+    Default = 'Default'
+    InteractiveBrokersBrokerage = 'InteractiveBrokersBrokerage'
+    TradierBrokerage = 'TradierBrokerage'
+
+class AccountType:
+    Margin = 'Margin'
+    Cash = 'Cash'
+
+class SecurityType:
+    Equity = 'Equity'
+
+class Market:
+    USA = 'usa'
+
+class MovingAverageType:
+    Simple = 'Simple'
+    Exponential = 'Exponential'
+    Wilders = 'Wilders'
+
+class OrderDirection:
+    Buy = 0
+    Sell = 1
+    Hold = 2
+
+class OrderType:
+    Market = 0
+    Limit = 1
+
+class OrderStatus:
+    New = 0
+    Submitted = 1
+    PartiallyFilled = 2
+    Filled = 3
+    Canceled = 5
+    Invalid = 7
+    CancelPending = 8
+
+CLOSED_ORDER_STATUSES = (OrderStatus.Filled, OrderStatus.Canceled, OrderStatus.Invalid)
+
+# -----------------------------------------------------
+# Symbols and data
+# -----------------------------------------------------
+class SecurityIdentifier:
+    __slots__ = ('Symbol',)
+
+    def __init__(self, ticker):
+        self.Symbol = ticker
+
+    @staticmethod
+    def Parse(value):
+        return SecurityIdentifier(str(value).split(' ')[0])
+
+    def __str__(self):
+        return self.Symbol
+
+class Symbol:
+    __slots__ = ('Value', 'ID')
+
+    def __init__(self, ticker, value=None):
+        # Symbol(ticker), or Symbol(SecurityIdentifier, ticker) like LEAN.
+        self.Value = str(value if value is not None else ticker).upper()
+        self.ID = SecurityIdentifier(self.Value)
+
+    @staticmethod
+    def Create(ticker, security_type=SecurityType.Equity, market=Market.USA):
+        return Symbol(ticker)
+
+    def __str__(self):
+        return self.Value
+
+    def __repr__(self):
+        return self.Value
+
+    def __eq__(self, other):
+        if isinstance(other, Symbol):
+            return self.Value == other.Value
+        if isinstance(other, str):
+            return self.Value == other.upper()
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.Value)
+
+    def to_dict(self):
+        return {"Value": self.Value}
+
+class TradeBar:
+    __slots__ = ('Time', 'EndTime', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume', 'Period')
+
+    def __init__(self, time, symbol, open, high, low, close, volume, period=timedelta(days=1)):
+        self.Time = time
+        self.EndTime = time + period
+        self.Symbol = symbol
+        self.Open = open
+        self.High = high
+        self.Low = low
+        self.Close = close
+        self.Volume = volume
+        self.Period = period
+
+    @property
+    def Price(self):
+        return self.Close
+
+    @property
+    def Value(self):
+        return self.Close
+
+class QuoteBar(TradeBar):
+    __slots__ = ()
+
+class IndicatorDataPoint:
+    __slots__ = ('Time', 'EndTime', 'Value')
+
+    def __init__(self, time=None, value=0.0):
+        self.Time = time
+        self.EndTime = time
+        self.Value = value
+
+class Slice:
+    def __init__(self, time, bars):
+        self.Time = time
+        self.Bars = bars # Symbol -> TradeBar
+
+    def __contains__(self, symbol):
+        return symbol in self.Bars
+
+    def __getitem__(self, symbol):
+        return self.Bars[symbol]
+
+    def ContainsKey(self, symbol):
+        return symbol in self.Bars
+
+    def get(self, symbol, default=None):
+        return self.Bars.get(symbol, default)
+
+    @property
+    def Keys(self):
+        return list(self.Bars.keys())
+
+class _Namespace:
+    # Attribute bag for the nested Fundamental properties.
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+class Fundamental:
+    # Fundamental data for one symbol and date. Unknown values are NaN, like LEAN.
+    def __init__(self, symbol, price=math.nan, market_cap=math.nan, dollar_volume=math.nan,
+                 pe_ratio=math.nan, revenue_growth=math.nan, sector_code=0, industry_code=0,
+                 short_name="", has_fundamental_data=None):
+        self.Symbol = symbol
+        self.Price = price
+        self.MarketCap = market_cap
+        self.DollarVolume = dollar_volume
+        self.HasFundamentalData = (
+            has_fundamental_data if has_fundamental_data is not None
+            else not math.isnan(market_cap)
+        )
+        self.ValuationRatios = _Namespace(PERatio=pe_ratio)
+        self.OperationRatios = _Namespace(RevenueGrowth=_Namespace(OneYear=revenue_growth))
+        self.AssetClassification = _Namespace(MorningstarSectorCode=sector_code, MorningstarIndustryCode=industry_code)
+        self.CompanyReference = _Namespace(ShortName=short_name)
+
+# -----------------------------------------------------
+# Events and consolidators
+# -----------------------------------------------------
+class _EventHandler:
+    # Supports the `event += handler` / `event -= handler` syntax of .NET events.
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+        return self
+
+    def fire(self, *args):
+        for handler in list(self.handlers):
+            handler(*args)
+
+class TradeBarConsolidator:
+    # Aggregates bars into fixed periods aligned to midnight and emits each one when it completes.
+    def __init__(self, period):
+        self.Period = period
+        self.DataConsolidated = _EventHandler()
+        self.WorkingBar = None
+        self.Consolidated = None
+
+    def Update(self, bar):
+        if self.Period <= bar.Period:
+            self.emit(bar) # Same or coarser input resolution: pass bars through.
+            return
+
+        if self.WorkingBar is not None and bar.Time >= self.WorkingBar.EndTime:
+            self.emit(self.WorkingBar)
+            self.WorkingBar = None
+
+        if self.WorkingBar is None:
+            midnight = datetime(bar.Time.year, bar.Time.month, bar.Time.day)
+            start = midnight + ((bar.Time - midnight) // self.Period) * self.Period
+            self.WorkingBar = TradeBar(start, bar.Symbol, bar.Open, bar.High, bar.Low, bar.Close, bar.Volume, self.Period)
+        else:
+            self.WorkingBar.High = max(self.WorkingBar.High, bar.High)
+            self.WorkingBar.Low = min(self.WorkingBar.Low, bar.Low)
+            self.WorkingBar.Close = bar.Close
+            self.WorkingBar.Volume += bar.Volume
+
+        if bar.EndTime >= self.WorkingBar.EndTime:
+            self.emit(self.WorkingBar)
+            self.WorkingBar = None
+
+    def emit(self, bar):
+        self.Consolidated = bar
+        self.DataConsolidated.fire(self, bar)
+
+class SubscriptionManager:
+    def __init__(self):
+        self.consolidators = {} # Symbol -> [consolidator]
+
+    def AddConsolidator(self, symbol, consolidator):
+        self.consolidators.setdefault(symbol, []).append(consolidator)
+
+    def RemoveConsolidator(self, symbol, consolidator):
+        if consolidator in self.consolidators.get(symbol, []):
+            self.consolidators[symbol].remove(consolidator)
+
+class SecurityChanges:
+    def __init__(self, added, removed):
+        self.AddedSecurities = added
+        self.RemovedSecurities = removed
+
+# -----------------------------------------------------
+# Indicators
+#   Scalar, streaming versions of the LEAN indicators used by the algorithm and research.ipynb.
+#   Same warm-up and seeding rules as indicatorEngine.py.
+# -----------------------------------------------------
+class IndicatorBase:
+    def __init__(self, warm_up_period):
+        self.WarmUpPeriod = warm_up_period
+        self.Samples = 0
+        self.Current = IndicatorDataPoint(None, 0.0)
+        self.Previous = IndicatorDataPoint(None, 0.0)
+
+    def __class_getitem__(cls, item):
+        return cls
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.WarmUpPeriod
+
+    def Update(self, *args):
+        # Accepts Update(bar), Update(IndicatorDataPoint) or Update(time, value).
+        if len(args) == 2:
+            time, value = args
+        else:
+            time, value = args[0].EndTime, args[0]
+        self.Samples += 1
+        self.Previous = self.Current
+        self.Current = IndicatorDataPoint(time, float(self.computeNextValue(value)))
+        return self.IsReady
+
+    @staticmethod
+    def closeOf(value):
+        return value.Close if hasattr(value, 'Close') else getattr(value, 'Value', value)
+
+class _SeededAverage:
+    # Simple average of the first `period` inputs, then exponential smoothing with factor k.
+    def __init__(self, period, k):
+        self.period = period
+        self.k = k
+        self.samples = 0
+        self.value = 0.0
+
+    def add(self, x):
+        self.samples += 1
+        self.value += (x - self.value) * (1.0 / self.samples if self.samples <= self.period else self.k)
+        return self.value
+
+def _average(period, moving_average_type):
+    return _SeededAverage(period, 1.0 / period if moving_average_type == MovingAverageType.Wilders else 2.0 / (period + 1))
+
+class ExponentialMovingAverage(IndicatorBase):
+    def __init__(self, period):
+        super().__init__(period)
+        self.average = _average(period, MovingAverageType.Exponential)
+
+    def computeNextValue(self, value):
+        return self.average.add(self.closeOf(value))
+
+class Minimum(IndicatorBase):
+    def __init__(self, period):
+        super().__init__(period)
+        self.window = []
+
+    def computeNextValue(self, value):
+        self.window.append(self.closeOf(value))
+        if len(self.window) > self.WarmUpPeriod:
+            self.window.pop(0)
+        return min(self.window)
+
+class AverageTrueRange(IndicatorBase):
+    def __init__(self, period, moving_average_type=MovingAverageType.Wilders):
+        super().__init__(period + 1)
+        self.average = _average(period, moving_average_type)
+        self.previous_close = None
+
+    def computeNextValue(self, bar):
+        previous_close, self.previous_close = self.previous_close, bar.Close
+        if previous_close is None:
+            return 0.0
+        true_range = max(bar.High - bar.Low, abs(bar.High - previous_close), abs(bar.Low - previous_close))
+        return self.average.add(true_range)
+
+class MovingAverageConvergenceDivergence(IndicatorBase):
+    def __init__(self, fast_period=12, slow_period=26, signal_period=9, moving_average_type=MovingAverageType.Exponential):
+        super().__init__(slow_period + signal_period - 1)
+        self.slow_period = slow_period
+        self.fast = _average(fast_period, moving_average_type)
+        self.slow = _average(slow_period, moving_average_type)
+        self.signal_average = _average(signal_period, moving_average_type)
+        self.Signal = IndicatorBase(signal_period)
+
+    def computeNextValue(self, value):
+        close = self.closeOf(value)
+        macd = self.fast.add(close) - self.slow.add(close)
+        if self.Samples >= self.slow_period:
+            self.Signal.Samples += 1
+            self.Signal.Previous = self.Signal.Current
+            self.Signal.Current = IndicatorDataPoint(None, self.signal_average.add(macd))
+        return macd
+
+class RelativeStrengthIndex(IndicatorBase):
+    def __init__(self, period, moving_average_type=MovingAverageType.Wilders):
+        super().__init__(period + 1)
+        self.gain = _average(period, moving_average_type)
+        self.loss = _average(period, moving_average_type)
+        self.previous_close = None
+
+    def computeNextValue(self, value):
+        close = self.closeOf(value)
+        previous_close, self.previous_close = self.previous_close, close
+        if previous_close is None:
+            return 0.0
+        gain = self.gain.add(max(close - previous_close, 0.0))
+        loss = self.loss.add(max(previous_close - close, 0.0))
+        return 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+
+class Stochastic(IndicatorBase):
+    def __init__(self, period, k_period, d_period):
+        super().__init__(period + k_period + d_period - 2)
+        self.period = period
+        self.highs = []
+        self.lows = []
+
+    def computeNextValue(self, bar):
+        self.highs.append(bar.High)
+        self.lows.append(bar.Low)
+        if len(self.highs) > self.period:
+            self.highs.pop(0)
+            self.lows.pop(0)
+        highest, lowest = max(self.highs), min(self.lows)
+        if highest == lowest or self.Samples < self.period:
+            return 0.0
+        return 100.0 * (bar.Close - lowest) / (highest - lowest)
+
+# -----------------------------------------------------
+# Portfolio, securities, orders
+# -----------------------------------------------------
+class SecurityHolding:
+    def __init__(self, symbol):
+        self.Symbol = symbol
+        self.Quantity = 0
+        self.AveragePrice = 0.0
+        self.Price = 0.0
+
+    @property
+    def Invested(self):
+        return self.Quantity != 0
+
+    @property
+    def HoldingsValue(self):
+        return self.Quantity * self.Price
+
+    @property
+    def HoldingsCost(self):
+        return self.Quantity * self.AveragePrice
+
+    @property
+    def UnrealizedProfit(self):
+        return self.HoldingsValue - self.HoldingsCost
+
+    def fill(self, quantity, price):
+        # Apply a fill to the holding, keeping the average cost of the remaining shares.
+        new_quantity = self.Quantity + quantity
+        if new_quantity == 0:
+            self.AveragePrice = 0.0
+        elif self.Quantity == 0 or (self.Quantity > 0) != (new_quantity > 0):
+            self.AveragePrice = price
+        elif abs(new_quantity) > abs(self.Quantity):
+            self.AveragePrice = (self.AveragePrice * self.Quantity + price * quantity) / new_quantity
+        self.Quantity = new_quantity
+
+class SecurityPortfolioManager:
+    def __init__(self):
+        self.holdings = {}
+        self.Cash = 0.0
+
+    def __getitem__(self, symbol):
+        holding = self.holdings.get(symbol)
+        if holding is None:
+            holding = self.holdings[symbol] = SecurityHolding(symbol)
+        return holding
+
+    def __contains__(self, symbol):
+        return symbol in self.holdings
+
+    def __iter__(self):
+        return iter(self.holdings)
+
+    def items(self):
+        return self.holdings.items()
+
+    @property
+    def Keys(self):
+        return list(self.holdings.keys())
+
+    @property
+    def Values(self):
+        return list(self.holdings.values())
+
+    @property
+    def TotalHoldingsValue(self):
+        return sum(holding.HoldingsValue for holding in self.holdings.values())
+
+    @property
+    def TotalPortfolioValue(self):
+        return self.Cash + self.TotalHoldingsValue
+
+    @property
+    def Invested(self):
+        return any(holding.Invested for holding in self.holdings.values())
+
+class Security:
+    def __init__(self, symbol, resolution, fundamentals=None):
+        self.Symbol = symbol
+        self.Resolution = resolution
+        self.Price = 0.0
+        self.Close = 0.0
+        self.HasData = False
+        self.Fundamentals = fundamentals if fundamentals is not None else Fundamental(symbol)
+
+class SecurityManager(dict):
+    def ContainsKey(self, symbol):
+        return symbol in self
+
+    @property
+    def Keys(self):
+        return list(self.keys())
+
+class OrderTicket:
+    def __init__(self, transactions, order_id, symbol, quantity, order_type, limit_price, time, tag):
+        self.transactions = transactions
+        self.OrderId = order_id
+        self.Symbol = symbol
+        self.Quantity = quantity
+        self.OrderType = order_type
+        self.LimitPrice = limit_price
+        self.Time = time
+        self.Tag = tag
+        self.Status = OrderStatus.New
+        self.QuantityFilled = 0
+        self.AverageFillPrice = 0.0
+
+    @property
+    def Id(self):
+        # GetOpenOrders returns Order objects in LEAN, whose id is Id rather than OrderId.
+        return self.OrderId
+
+    @property
+    def OrderClosed(self):
+        return self.Status in CLOSED_ORDER_STATUSES
+
+    @property
+    def Direction(self):
+        return OrderDirection.Buy if self.Quantity > 0 else OrderDirection.Sell
+
+    def Cancel(self, tag=""):
+        return self.transactions.CancelOrder(self.OrderId, tag)
+
+    def __str__(self):
+        return f"OrderTicket {self.OrderId}: {self.Symbol} {self.Quantity} @ {self.LimitPrice} ({self.Status})"
+
+class OrderEvent:
+    def __init__(self, ticket, status, fill_price=0.0, fill_quantity=0, message=""):
+        self.OrderId = ticket.OrderId
+        self.Symbol = ticket.Symbol
+        self.Status = status
+        self.Direction = ticket.Direction
+        self.Quantity = ticket.Quantity
+        self.FillPrice = fill_price
+        self.FillQuantity = fill_quantity
+        self.LimitPrice = ticket.LimitPrice
+        self.Message = message
+
+class SecurityTransactionManager:
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.tickets = {} # OrderId -> OrderTicket
+        self.open_tickets = {} # OrderId -> OrderTicket, not yet filled or canceled
+        self.next_order_id = 1
+        self.filled_order_count = 0
+
+    def GetOpenOrders(self, symbol=None):
+        return [t for t in self.open_tickets.values() if symbol is None or t.Symbol == symbol]
+
+    def GetOpenOrderTickets(self, symbol=None):
+        return self.GetOpenOrders(symbol)
+
+    def GetOrderTicket(self, order_id):
+        return self.tickets.get(order_id)
+
+    def CancelOrder(self, order_id, tag=""):
+        ticket = self.open_tickets.pop(order_id, None)
+        if ticket is None:
+            return False
+        ticket.Status = OrderStatus.Canceled
+        self.algorithm.OnOrderEvent(OrderEvent(ticket, OrderStatus.Canceled, message=tag))
+        return True
+
+    def CancelOpenOrders(self, symbol=None):
+        for ticket in self.GetOpenOrders(symbol):
+            self.CancelOrder(ticket.OrderId)
+
+    def submit(self, symbol, quantity, order_type, limit_price, tag):
+        algorithm = self.algorithm
+        ticket = OrderTicket(self, self.next_order_id, symbol, quantity, order_type, limit_price, algorithm.Time, tag)
+        self.next_order_id += 1
+        self.tickets[ticket.OrderId] = ticket
+
+        security = algorithm.Securities.get(symbol)
+        price = limit_price if order_type == OrderType.Limit else (security.Price if security else 0.0)
+        if quantity == 0 or algorithm.IsWarmingUp or security is None or not security.HasData:
+            ticket.Status = OrderStatus.Invalid
+            return ticket # Zero-quantity, warm-up and no-data orders are rejected without an event, like LEAN.
+        if quantity > 0 and quantity * price > algorithm.Portfolio.Cash:
+            ticket.Status = OrderStatus.Invalid
+            algorithm.OnOrderEvent(OrderEvent(ticket, OrderStatus.Invalid, message="Insufficient buying power"))
+            return ticket
+
+        ticket.Status = OrderStatus.Submitted
+        self.open_tickets[ticket.OrderId] = ticket
+        algorithm.OnOrderEvent(OrderEvent(ticket, OrderStatus.Submitted))
+        if order_type == OrderType.Market:
+            self.fill(ticket, security.Price)
+        return ticket
+
+    def fill(self, ticket, price):
+        # Fill the whole remaining quantity at `price` and notify the algorithm.
+        algorithm = self.algorithm
+        quantity = ticket.Quantity - ticket.QuantityFilled
+        if quantity > 0 and quantity * price > algorithm.Portfolio.Cash:
+            self.open_tickets.pop(ticket.OrderId, None)
+            ticket.Status = OrderStatus.Invalid
+            algorithm.OnOrderEvent(OrderEvent(ticket, OrderStatus.Invalid, message="Insufficient buying power"))
+            return
+        self.open_tickets.pop(ticket.OrderId, None)
+        algorithm.Portfolio.Cash -= quantity * price
+        algorithm.Portfolio[ticket.Symbol].fill(quantity, price)
+        ticket.QuantityFilled = ticket.Quantity
+        ticket.AverageFillPrice = price
+        ticket.Status = OrderStatus.Filled
+        self.filled_order_count += 1
+        algorithm.OnOrderEvent(OrderEvent(ticket, OrderStatus.Filled, price, quantity))
+
+    def processFills(self, bars):
+        # Fill open limit orders whose limit was traded through by the new bars.
+        for ticket in list(self.open_tickets.values()):
+            bar = bars.get(ticket.Symbol)
+            if bar is None or ticket.Time >= bar.EndTime:
+                continue
+            if ticket.Quantity > 0 and bar.Low <= ticket.LimitPrice:
+                self.fill(ticket, min(ticket.LimitPrice, bar.Open))
+            elif ticket.Quantity < 0 and bar.High >= ticket.LimitPrice:
+                self.fill(ticket, max(ticket.LimitPrice, bar.Open))
+
+class ObjectStore:
+    # Key/value store. Kept in memory, and mirrored to files under `root` when one is given.
+    def __init__(self, root=None):
+        self.root = root
+        self.store = {}
+
+    def path(self, key):
+        return os.path.join(self.root, key.replace('/', os.sep))
+
+    def SaveBytes(self, key, data):
+        self.store[key] = bytes(data)
+        if self.root is not None:
+            os.makedirs(os.path.dirname(self.path(key)) or self.root, exist_ok=True)
+            with open(self.path(key), 'wb') as f:
+                f.write(self.store[key])
+        return True
+
+    def Save(self, key, text):
+        return self.SaveBytes(key, text.encode('utf-8'))
+
+    def ReadBytes(self, key):
+        if key not in self.store and self.root is not None:
+            if os.path.exists(self.path(key)):
+                with open(self.path(key), 'rb') as f:
+                    self.store[key] = f.read()
+        return self.store.get(key)
+
+    def Read(self, key):
+        data = self.ReadBytes(key)
+        return data.decode('utf-8') if data is not None else None
+
+    def ContainsKey(self, key):
+        return self.ReadBytes(key) is not None
+
+    def Delete(self, key):
+        existed = self.store.pop(key, None) is not None
+        if self.root is not None:
+            if os.path.exists(self.path(key)):
+                os.remove(self.path(key))
+                existed = True
+        return existed
+
+    @property
+    def Keys(self):
+        return list(self.store.keys())
+
+# -----------------------------------------------------
+# Scheduled events
+#   Schedule.On(DateRules.X(), TimeRules.Y(), callback) like LEAN. localReplay calls Schedule.fire()
+#   before each OnData. Occurrences missed between two slices (e.g. every 30 minutes with daily
+#   bars) run once, not once each.
+# -----------------------------------------------------
+class DateRule:
+    def __init__(self, name, predicate):
+        self.Name = name
+        self.predicate = predicate # date -> bool
+
+class TimeRule:
+    def __init__(self, name, next_time):
+        self.Name = name
+        self.next_time = next_time # (date, after) -> first time of the date after `after`, or None
+
+class DateRules:
+    def EveryDay(self, symbol=None):
+        return DateRule("EveryDay", lambda date: True)
+
+    def Every(self, *days):
+        # Days of the week, Monday = 0.
+        return DateRule("Every", lambda date: date.weekday() in days)
+
+class TimeRules:
+    def At(self, hour, minute=0, second=0):
+        def next_time(date, after):
+            at = datetime(date.year, date.month, date.day, hour, minute, second)
+            return at if at > after else None
+        return TimeRule(f"At {hour:02d}:{minute:02d}", next_time)
+
+    def Every(self, interval):
+        def next_time(date, after):
+            midnight = datetime(date.year, date.month, date.day)
+            if after < midnight:
+                return midnight
+            at = midnight + ((after - midnight) // interval + 1) * interval
+            return at if at.date() == date else None
+        return TimeRule(f"Every {interval}", next_time)
+
+    @property
+    def Midnight(self):
+        return self.At(0, 0)
+
+class ScheduledEvent:
+    def __init__(self, date_rule, time_rule, callback):
+        self.Name = f"{date_rule.Name}: {time_rule.Name}"
+        self.date_rule = date_rule
+        self.time_rule = time_rule
+        self.callback = callback
+        self.next_time = None
+
+    def nextTime(self, after):
+        # First occurrence strictly after `after`, searching up to a year ahead.
+        for days in range(367):
+            date = after.date() + timedelta(days=days)
+            if self.date_rule.predicate(date):
+                at = self.time_rule.next_time(date, after)
+                if at is not None:
+                    return at
+        return None
+
+class ScheduleManager:
+    def __init__(self):
+        self.events = []
+
+    def On(self, date_rule, time_rule, callback):
+        event = ScheduledEvent(date_rule, time_rule, callback)
+        self.events.append(event)
+        return event
+
+    def Remove(self, event):
+        if event in self.events:
+            self.events.remove(event)
+
+    def fire(self, now):
+        # Run every event due at or before `now`.
+        for event in list(self.events):
+            if event.next_time is None:
+                event.next_time = event.nextTime(now - timedelta(microseconds=1))
+                    # First call: an occurrence exactly at `now` is due.
+            if event.next_time is not None and event.next_time <= now:
+                event.callback()
+                event.next_time = event.nextTime(now)
+
+# -----------------------------------------------------
+# Algorithm
+# -----------------------------------------------------
+class _Settings:
+    def __init__(self):
+        self.FreePortfolioValuePercentage = 0.0025
+
+class _UniverseSettings:
+    def __init__(self):
+        self.Resolution = Resolution.Minute
+        self.ExtendedMarketHours = False
+
+class QCAlgorithm:
+    def __init__(self):
+        self.Time = datetime(1998, 1, 2)
+        self.StartDate = datetime(1998, 1, 2)
+        self.EndDate = datetime.now()
+        self.IsWarmingUp = False
+        self.LiveMode = False
+        self.warmup_period = None
+        self.warmup_resolution = None
+        self.Settings = _Settings()
+        self.UniverseSettings = _UniverseSettings()
+        self.Portfolio = SecurityPortfolioManager()
+        self.Securities = SecurityManager()
+        self.Transactions = SecurityTransactionManager(self)
+        self.SubscriptionManager = SubscriptionManager()
+        self.ObjectStore = ObjectStore()
+        self.Schedule = ScheduleManager()
+        self.DateRules = DateRules()
+        self.TimeRules = TimeRules()
+        self.universe_selectors = []
+        self.pending_added = []
+        self.pending_removed = []
+        self.logs = []
+        self.errors = []
+        self.echo_logs = False
+
+    @property
+    def UtcTime(self):
+        # The replay runs in UTC: algorithm time and UTC time are the same, as are OrderTicket.Time stamps.
+        return self.Time
+
+    # Setup
+    def SetStartDate(self, year, month=None, day=None):
+        self.StartDate = year if month is None else datetime(year, month, day)
+
+    def SetEndDate(self, year, month=None, day=None):
+        self.EndDate = year if month is None else datetime(year, month, day)
+
+    def SetCash(self, cash):
+        self.Portfolio.Cash = float(cash)
+
+    def SetWarmUp(self, period, resolution=None):
+        self.warmup_period = period
+        self.warmup_resolution = resolution
+
+    def SetBrokerageModel(self, brokerage, account_type=None):
+        pass
+
+    def SetBenchmark(self, symbol):
+        pass
+
+    # Universe
+    def AddEquity(self, ticker, resolution=None, fundamentals=None):
+        symbol = ticker if isinstance(ticker, Symbol) else Symbol.Create(ticker)
+        if symbol not in self.Securities:
+            self.Securities[symbol] = Security(symbol, resolution or self.UniverseSettings.Resolution, fundamentals)
+            self.pending_added.append(self.Securities[symbol])
+        return self.Securities[symbol]
+
+    def RemoveSecurity(self, symbol):
+        security = self.Securities.pop(symbol, None)
+        if security is not None:
+            self.pending_removed.append(security)
+
+    def AddUniverse(self, selector):
+        self.universe_selectors.append(selector)
+
+    def ResolveConsolidator(self, symbol, resolution):
+        return TradeBarConsolidator(RESOLUTION_TIMEDELTA[resolution])
+
+    # Orders
+    def LimitOrder(self, symbol, quantity, limit_price, tag=""):
+        return self.Transactions.submit(symbol, int(quantity), OrderType.Limit, float(limit_price), tag)
+
+    def MarketOrder(self, symbol, quantity, asynchronous=False, tag=""):
+        return self.Transactions.submit(symbol, int(quantity), OrderType.Market, None, tag)
+
+    def Liquidate(self, symbol=None, tag="Liquidated"):
+        # Cancels open orders and closes the position(s). Returns the list of new order tickets, like LEAN.
+        symbols = [symbol] if symbol is not None else [s for s, h in self.Portfolio.items() if h.Invested]
+        tickets = []
+        for s in symbols:
+            self.Transactions.CancelOpenOrders(s)
+            quantity = self.Portfolio[s].Quantity
+            if quantity != 0:
+                tickets.append(self.MarketOrder(s, -quantity, tag=tag))
+        return tickets
+
+    # Logging
+    def Debug(self, message):
+        self.logs.append(f"{self.Time} {message}")
+        if self.echo_logs:
+            print(f"{self.Time} DEBUG {message}")
+
+    def Log(self, message):
+        self.Debug(message)
+
+    def Error(self, message):
+        self.errors.append(f"{self.Time} {message}")
+        if self.echo_logs:
+            print(f"{self.Time} ERROR {message}")
+
+    # Event handlers, overridden by the algorithm.
+    def Initialize(self):
+        pass
+
+    def OnData(self, data):
+        pass
+
+    def OnSecuritiesChanged(self, changes):
+        pass
+
+    def OnOrderEvent(self, orderEvent):
+        pass
+
+    def OnWarmupFinished(self):
+        pass
+
+    def OnEndOfAlgorithm(self):
+        pass
+
+# End localAlgorithmImports.py
@@ -0,0 +1,407 @@
+# Begin localReplay.py
+
+# Offline, event-driven replay of CodysAdvancedStrategy without LEAN.
+#   Registers localAlgorithmImports.py as "AlgorithmImports", then feeds bar files through
+#   CodysAdvancedStrategy.Initialize / OnSecuritiesChanged / OnData / OnOrderEvent, with the simple
+#   fill model of localAlgorithmImports. Deterministic and network-free, so it can be used to
+#   profile and benchmark the algorithm and measure per-slice latency and throughput.
+#
+#   Bar files:
+#       - a directory of <TICKER>.csv files with columns time,open,high,low,close,volume
+#       - a single .csv file with columns time,symbol,open,high,low,close,volume
+#       - a .npz file written by saveBars (times, symbols and one (T, N) array per field)
+#     `time` is the bar start time. Missing bars are NaN in the (T, N) arrays.
+#
+#   Fundamentals (optional, for the dynamic universe): a CSV with columns
+#       date,symbol,price,market_cap,dollar_volume,pe_ratio,revenue_growth,sector_code
+#   With --fundamental-cache, each date is parsed once and stored as a memory-mapped snapshot
+#   (fundamentalCache.py), so later runs over the same period skip the parsing entirely.
+#
+#   Usage:
+#       python localReplay.py --bars data/ --all-symbols --start 2023-10-01 --end 2024-03-23
+#       python localReplay.py --bars data/ --fundamentals fundamentals.csv --fundamental-cache .cache/
+
+import argparse
+import csv
+import importlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import localAlgorithmImports as lean
+
+BAR_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class BarData:
+    # Aligned panel of bars: times (T,) bar start times, symbols (N,) tickers and
+    # open / high / low / close / volume arrays of shape (T, N), NaN where a symbol has no bar.
+    def __init__(self, times, symbols, open, high, low, close, volume, period=None):
+        self.times = np.asarray(times, dtype='datetime64[s]')
+        self.symbols = [str(s) for s in symbols]
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        if period is None:
+            steps = np.diff(self.times).astype('timedelta64[s]').astype(np.int64)
+            period = timedelta(seconds=int(steps[steps > 0].min())) if np.any(steps > 0) else timedelta(days=1)
+            period = min(period, timedelta(days=1)) # Weekends and holidays don't make daily bars longer.
+        self.period = period
+
+    def fields(self):
+        return {name: getattr(self, name) for name in BAR_FIELDS}
+
+
+def loadBars(path, period=None, mmap_mode=None):
+    # Load bars from a directory of per-symbol CSVs, a long-format CSV, or a .npz / .npy directory.
+    if path.endswith('.npz'):
+        with np.load(path, allow_pickle=False) as archive:
+            return BarData(archive['times'], archive['symbols'], *(archive[name] for name in BAR_FIELDS), period=period)
+    if os.path.isdir(path) and os.path.exists(os.path.join(path, 'times.npy')):
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+        return BarData(load('times'), load('symbols'), *(load(name) for name in BAR_FIELDS), period=period)
+
+    rows = {} # ticker -> [(time, open, high, low, close, volume)]
+    files = (
+        [(os.path.splitext(name)[0].upper(), os.path.join(path, name)) for name in sorted(os.listdir(path)) if name.lower().endswith('.csv')]
+        if os.path.isdir(path) else [(None, path)]
+    )
+    for ticker, file_path in files:
+        with open(file_path, newline='') as f:
+            for record in csv.DictReader(f):
+                record = {key.strip().lower(): value for key, value in record.items()}
+                rows.setdefault(ticker or record['symbol'].upper(), []).append((
+                    np.datetime64(record['time'].strip().replace(' ', 'T'), 's'),
+                    *(float(record[name]) if record.get(name, '') != '' else np.nan for name in BAR_FIELDS)
+                ))
+
+    symbols = sorted(rows)
+    times = np.unique(np.array([row[0] for ticker in symbols for row in rows[ticker]], dtype='datetime64[s]'))
+    panel = {name: np.full((len(times), len(symbols)), np.nan) for name in BAR_FIELDS}
+    for column, ticker in enumerate(symbols):
+        records = rows[ticker]
+        index = np.searchsorted(times, np.array([row[0] for row in records], dtype='datetime64[s]'))
+        for field_number, name in enumerate(BAR_FIELDS):
+            panel[name][index, column] = [row[field_number + 1] for row in records]
+    return BarData(times, symbols, *(panel[name] for name in BAR_FIELDS), period=period)
+
+
+def saveBars(path, bars):
+    # Save bars as a .npz archive, or as one .npy file per array when `path` is a directory
+    # (which loadBars can memory-map with mmap_mode='r').
+    arrays = dict(times=bars.times, symbols=np.array(bars.symbols), **bars.fields())
+    if path.endswith('.npz'):
+        np.savez(path, **arrays)
+    else:
+        os.makedirs(path, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+
+
+FUNDAMENTAL_FIELDS = ('price', 'market_cap', 'dollar_volume', 'pe_ratio', 'revenue_growth', 'sector_code')
+
+
+class CsvFundamentalSource:
+    # callable(date, symbols) -> [Fundamental] over a fundamentals CSV, for ReplayEngine(fundamentals=...).
+    # The file is only parsed on the first call, so runs served entirely from a FundamentalCache never parse it.
+    def __init__(self, path):
+        self.path = path
+        self.by_date = None
+
+    def parse(self):
+        self.by_date = {}
+        with open(self.path, newline='') as f:
+            for record in csv.DictReader(f):
+                record = {key.strip().lower(): value.strip() for key, value in record.items()}
+                values = {name: float(record[name]) if record.get(name, '') != '' else np.nan for name in FUNDAMENTAL_FIELDS}
+                self.by_date.setdefault(datetime.fromisoformat(record['date']).date(), []).append(lean.Fundamental(
+                    lean.Symbol(record['symbol']),
+                    price=values['price'],
+                    market_cap=values['market_cap'],
+                    dollar_volume=values['dollar_volume'],
+                    pe_ratio=values['pe_ratio'],
+                    revenue_growth=values['revenue_growth'],
+                    sector_code=0 if np.isnan(values['sector_code']) else int(values['sector_code'])
+                ))
+
+    def __call__(self, date, symbols):
+        if self.by_date is None:
+            self.parse()
+        return self.by_date.get(date, [])
+
+    def fingerprint(self):
+        from fundamentalCache import sourceFingerprint
+        return sourceFingerprint(self.path)
+
+
+def fundamentalCacheFor(root, source):
+    # FundamentalCache for a CsvFundamentalSource, invalidated whenever the CSV file changes.
+    installAlgorithmImports()
+    from fundamentalCache import FundamentalCache
+    return FundamentalCache(root, os.path.abspath(source.path), source.fingerprint())
+
+
+def installAlgorithmImports():
+    # Make `from AlgorithmImports import *` resolve to the local stand-in.
+    sys.modules['AlgorithmImports'] = lean
+
+
+def loadStrategy(config_overrides=None):
+    # Import (or reset) the algorithm modules and return the CodysAdvancedStrategy class.
+    # config.py and variables.py are reloaded so every run starts from a clean state.
+    installAlgorithmImports()
+    import config as c
+    import variables as v
+    importlib.reload(c)
+    for name, value in (config_overrides or {}).items():
+        if not hasattr(c, name):
+            raise KeyError(f"Unknown config parameter: {name}")
+        setattr(c, name, value)
+    importlib.reload(v)
+    return importlib.import_module('main').CodysAdvancedStrategy
+
+
+def toDatetime(value):
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+class ReplayEngine:
+    def __init__(self, bars, start=None, end=None, config_overrides=None, all_symbols=False,
+                 fundamentals=None, object_store_root=None, echo_logs=False, fundamental_cache=None):
+        self.bars = bars
+        self.start = toDatetime(start) if start is not None else None
+        self.end = toDatetime(end) if end is not None else None
+        self.config_overrides = dict(config_overrides or {})
+        if self.start is not None:
+            self.config_overrides['SetStartDate'] = lambda algorithm, start=self.start: algorithm.SetStartDate(start)
+        if self.end is not None:
+            self.config_overrides['SetEndDate'] = lambda algorithm, end=self.end: algorithm.SetEndDate(end)
+            # Replaces config.SetStartDate / SetEndDate, so everything Initialize derives from the dates,
+            # like the warm-up and a checkpoint's replay start, uses the replay window.
+        if all_symbols:
+            self.config_overrides.setdefault('symbol_filter_condition_static_universe', True)
+            self.config_overrides['symbol_filter_parameter_static_universe'] = list(bars.symbols)
+        self.fundamentals = fundamentals
+            # Optional callable(date, symbols) -> [Fundamental] for dynamic universe selection.
+            # Without it, selection gets Fundamentals built from the bars (price and dollar volume only).
+        self.fundamental_cache = fundamental_cache
+            # Optional FundamentalCache: selection reads each date's memory-mapped snapshot and
+            # only calls `fundamentals` for dates that aren't cached yet.
+        self.object_store_root = object_store_root
+        self.echo_logs = echo_logs
+
+    def warmupStartIndex(self, algorithm, start_index):
+        # First slice of the warm-up period that precedes StartDate.
+        period = algorithm.warmup_period
+        if period is None:
+            return start_index
+        if isinstance(period, timedelta):
+            warmup_start = np.datetime64(algorithm.StartDate - period, 's')
+            return int(np.searchsorted(self.bars.times, warmup_start))
+        resolution = lean.RESOLUTION_TIMEDELTA.get(algorithm.warmup_resolution, self.bars.period)
+        bar_count = int(period * max(resolution // self.bars.period, 1))
+        return max(0, start_index - bar_count)
+
+    def selectUniverse(self, algorithm, time, index):
+        # Run the universe selectors once per day and add / remove securities to match.
+        symbols = [lean.Symbol(ticker) for ticker in self.bars.symbols]
+        if self.fundamentals is not None and self.fundamental_cache is not None:
+            fundamentals = self.fundamental_cache.get(time.date(), lambda: self.fundamentals(time.date(), symbols))
+        elif self.fundamentals is not None:
+            fundamentals = self.fundamentals(time.date(), symbols)
+        else:
+            close = self.bars.close[index]
+            volume = self.bars.volume[index]
+            fundamentals = [
+                lean.Fundamental(symbol, price=float(close[column]), dollar_volume=float(close[column] * volume[column]))
+                for column, symbol in enumerate(symbols) if not np.isnan(close[column])
+            ]
+        selected = set()
+        for selector in algorithm.universe_selectors:
+            selected.update(selector(fundamentals) or [])
+        for symbol in selected:
+            if symbol not in algorithm.Securities:
+                algorithm.AddEquity(symbol, algorithm.UniverseSettings.Resolution)
+        for symbol in list(algorithm.Securities.keys()):
+            if symbol not in selected and not algorithm.Portfolio[symbol].Invested:
+                algorithm.RemoveSecurity(symbol)
+
+    def run(self):
+        Strategy = loadStrategy(self.config_overrides)
+        algorithm = Strategy()
+        algorithm.echo_logs = self.echo_logs
+        if self.object_store_root is not None:
+            algorithm.ObjectStore = lean.ObjectStore(self.object_store_root)
+        algorithm.Initialize()
+
+        bars = self.bars
+        period = bars.period
+        times = bars.times.astype(datetime)
+        columns = {lean.Symbol(ticker): column for column, ticker in enumerate(bars.symbols)}
+        start_index = int(np.searchsorted(bars.times, np.datetime64(algorithm.StartDate, 's')))
+        end_index = int(np.searchsorted(bars.times, np.datetime64(algorithm.EndDate, 's'), side='right'))
+        warmup_index = self.warmupStartIndex(algorithm, start_index)
+
+        slice_count = max(end_index - warmup_index, 0)
+        step_ns = np.zeros(slice_count, dtype=np.int64)
+        on_data_ns = np.zeros(slice_count, dtype=np.int64)
+        equity = np.zeros(slice_count, dtype=np.float64)
+        subscribed = np.zeros(0, dtype=np.int64)
+        subscribed_symbols = []
+        last_date = None
+        warmup_finished = False
+        wall_start = time.perf_counter()
+
+        for step, index in enumerate(range(warmup_index, end_index)):
+            step_start = time.perf_counter_ns()
+            bar_start = times[index]
+            algorithm.Time = bar_start + period
+            algorithm.IsWarmingUp = index < start_index
+            if not algorithm.IsWarmingUp and not warmup_finished:
+                warmup_finished = True
+                algorithm.OnWarmupFinished()
+
+            if algorithm.universe_selectors and bar_start.date() != last_date:
+                self.selectUniverse(algorithm, bar_start, index)
+            last_date = bar_start.date()
+
+            if algorithm.pending_added or algorithm.pending_removed:
+                changes = lean.SecurityChanges(algorithm.pending_added, algorithm.pending_removed)
+                algorithm.pending_added, algorithm.pending_removed = [], []
+                algorithm.OnSecuritiesChanged(changes)
+                subscribed_symbols = [symbol for symbol in algorithm.Securities if symbol in columns]
+                subscribed = np.array([columns[symbol] for symbol in subscribed_symbols], dtype=np.int64)
+
+            # Build the slice for subscribed symbols that have a bar at this time.
+            slice_bars = {}
+            if len(subscribed):
+                open_, high, low, close, volume = (getattr(bars, name)[index, subscribed] for name in BAR_FIELDS)
+                for position in np.flatnonzero(~np.isnan(close)):
+                    symbol = subscribed_symbols[position]
+                    bar = lean.TradeBar(bar_start, symbol, float(open_[position]), float(high[position]),
+                                        float(low[position]), float(close[position]), float(volume[position]), period)
+                    slice_bars[symbol] = bar
+                    security = algorithm.Securities[symbol]
+                    security.Price = security.Close = bar.Close
+                    security.HasData = True
+                    algorithm.Portfolio[symbol].Price = bar.Close
+
+            algorithm.Transactions.processFills(slice_bars)
+            for symbol, bar in slice_bars.items():
+                for consolidator in algorithm.SubscriptionManager.consolidators.get(symbol, ()):
+                    consolidator.Update(bar)
+
+            algorithm.Schedule.fire(algorithm.Time)
+                # Scheduled events due at this time run before OnData, like LEAN.
+
+            on_data_start = time.perf_counter_ns()
+            algorithm.OnData(lean.Slice(algorithm.Time, slice_bars))
+            finished = time.perf_counter_ns()
+            on_data_ns[step] = finished - on_data_start
+            step_ns[step] = finished - step_start
+            equity[step] = algorithm.Portfolio.TotalPortfolioValue
+
+        algorithm.OnEndOfAlgorithm()
+        wall_time = time.perf_counter() - wall_start
+        return ReplayResult(algorithm, times[warmup_index:end_index], start_index - warmup_index,
+                            equity, step_ns, on_data_ns, wall_time)
+
+
+def latencyPercentiles(samples_ns):
+    # p50 / p99 / mean / max in milliseconds of an array of nanosecond timings.
+    samples_ns = np.asarray(samples_ns, dtype=np.int64)
+    if not len(samples_ns):
+        return {"p50_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0, "max_ms": 0.0}
+    milliseconds = samples_ns / 1e6
+    return {
+        "p50_ms": float(np.percentile(milliseconds, 50)),
+        "p99_ms": float(np.percentile(milliseconds, 99)),
+        "mean_ms": float(milliseconds.mean()),
+        "max_ms": float(milliseconds.max())
+    }
+
+
+class ReplayResult:
+    def __init__(self, algorithm, times, warmup_slices, equity, step_ns, on_data_ns, wall_time):
+        self.algorithm = algorithm
+        self.times = times
+        self.warmup_slices = max(warmup_slices, 0)
+        self.equity = equity
+        self.step_ns = step_ns
+        self.on_data_ns = on_data_ns
+        self.wall_time = wall_time
+
+    def tradingEquity(self):
+        # Equity curve after warm-up.
+        return self.equity[self.warmup_slices:]
+
+    def summary(self):
+        equity = self.tradingEquity()
+        starting_value = equity[0] if len(equity) else self.algorithm.Portfolio.TotalPortfolioValue
+        final_value = equity[-1] if len(equity) else starting_value
+        peaks = np.maximum.accumulate(equity) if len(equity) else equity
+        drawdown = float(np.max(1 - equity / peaks)) if len(equity) else 0.0
+        slices = len(self.step_ns)
+
+        return {
+            "start": str(self.times[self.warmup_slices]) if slices > self.warmup_slices else None,
+            "end": str(self.times[-1]) if slices else None,
+            "slices": slices,
+            "warmup_slices": self.warmup_slices,
+            "starting_value": float(starting_value),
+            "final_value": float(final_value),
+            "total_return": float(final_value / starting_value - 1) if starting_value else 0.0,
+            "max_drawdown": drawdown,
+            "trade_count": self.algorithm.Transactions.filled_order_count,
+            "order_count": len(self.algorithm.Transactions.tickets),
+            "error_count": len(self.algorithm.errors),
+            "wall_time_s": self.wall_time,
+            "slices_per_second": slices / self.wall_time if self.wall_time else 0.0,
+            "slice_latency": latencyPercentiles(self.step_ns),
+            "on_data_latency": latencyPercentiles(self.on_data_ns)
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay CodysAdvancedStrategy over local bar files.")
+    parser.add_argument('--bars', required=True, help="Bar CSV directory, CSV file, .npz file or .npy directory.")
+    parser.add_argument('--start', help="Override config.SetStartDate, e.g. 2023-10-01.")
+    parser.add_argument('--end', help="Override config.SetEndDate, e.g. 2024-03-23.")
+    parser.add_argument('--all-symbols', action='store_true', help="Use every symbol in the bar files as a static universe.")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE', help="Override a config.py parameter (Python literal).")
+    parser.add_argument('--object-store', help="Directory to mirror ObjectStore writes to.")
+    parser.add_argument('--echo-logs', action='store_true', help="Print Debug / Error messages.")
+    parser.add_argument('--json', help="Write the summary to this file instead of stdout.")
+    parser.add_argument('--fundamentals', help="Fundamentals CSV for the dynamic universe.")
+    parser.add_argument('--fundamental-cache', help="Directory of memory-mapped fundamental snapshots, reused across runs.")
+    args = parser.parse_args(argv)
+
+    import ast
+    overrides = {}
+    for assignment in args.set:
+        name, value = assignment.split('=', 1)
+        overrides[name.strip()] = ast.literal_eval(value)
+
+    fundamentals = CsvFundamentalSource(args.fundamentals) if args.fundamentals else None
+    result = ReplayEngine(
+        loadBars(args.bars), start=args.start, end=args.end, config_overrides=overrides,
+        all_symbols=args.all_symbols, object_store_root=args.object_store, echo_logs=args.echo_logs,
+        fundamentals=fundamentals,
+        fundamental_cache=fundamentalCacheFor(args.fundamental_cache, fundamentals) if fundamentals and args.fundamental_cache else None
+    ).run()
+    summary = json.dumps(result.summary(), indent=2)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(summary)
+    else:
+        print(summary)
+
+if __name__ == '__main__':
+    main()
+
+# End localReplay.py
@@ -12,10 +12,34 @@ from OnSecuritiesChanged import OnSecuritiesChangedHandler
 from OnWarmupFinished import OnWarmupFinishedHandler
 from OnData import OnDataHandler
 from OnOrderEvent import OnOrderEventHandler
+from indicatorEngine import MultiTimeframeIndicatorEngine
+from consolidationCascade import indicatorPeriods, replayStart
+from orderTags import OrderTagJournal
+from buyPlan import compileBuyPlan
+from chartStore import ChartStore
+from persistenceWriter import PersistenceWriter
+from sectorAnalysis import SectorExposureTracker
+from tradeStatistics import TradeStatistics
+from monteCarlo import TradeBootstrap
+from orderExpiry import OrderExpiryQueue
+from openOrders import OpenOrderIndex
+from riskLevels import RiskLevels
+from scheduledEvents import ScheduledEventsHandler
+from checkpoint import StrategyCheckpoint
+from algorithmLog import AlgorithmLogger
+from profiler import HandlerProfiler
 
 class CodysAdvancedStrategy(QCAlgorithm):
     def Initialize(self):
     # Main function for algorithm
+
+        v.log = AlgorithmLogger(self)
+            # Level-gated, sampled logging used by every module instead of self.Debug / self.Error.
+
+        if c.profiling_enabled:
+            v.profiler = HandlerProfiler()
+            v.profiler.instrument()
+                # Times the entry points from here on, reported at the end of the algorithm. See profiler.py.
         
         c.SetStartDate(self)
             # Set Start Date defined in config.py
@@ -41,6 +65,39 @@ class CodysAdvancedStrategy(QCAlgorithm):
             else 0.03
         ) # Set the minimum portfolio value to place trades. If not set use 3%.
 
+        v.indicator_engine = MultiTimeframeIndicatorEngine(indicatorPeriods())
+            # Holds the indicator state of every symbol in NumPy arrays, one engine per indicator timeframe, updated once per slice.
+
+        v.order_tags = OrderTagJournal()
+            # Side-table of buy/sell condition snapshots referenced by compact order tags.
+
+        v.buy_plan = compileBuyPlan()
+            # Ordered, short-circuiting list of the buy conditions enabled in config.py.
+
+        v.persistence_writer = PersistenceWriter(self)
+            # Background thread for the Object Store saves of the chart store, order tags and checkpoints.
+
+        v.chart_store = ChartStore()
+            # Buffers chart rows and saves them to the Object Store in compressed daily chunks.
+
+        v.sector_exposure = SectorExposureTracker()
+            # Per-sector holdings value, symbol counts and percents, updated from fills and once per slice.
+
+        v.trade_statistics = TradeStatistics()
+            # Rolling trade results for Kelly Criterion position sizing, globally and per symbol and sector.
+
+        v.trade_bootstrap = TradeBootstrap()
+            # Monte Carlo bootstrap of those trades for a risk-adjusted Kelly Criterion, refreshed daily.
+
+        v.risk_levels = RiskLevels()
+            # Stop loss / take profit levels of all ready symbols, computed in one vectorized pass per slice.
+
+        v.open_orders = OpenOrderIndex()
+            # Working orders per symbol and cash reserved by open buy limits, updated from OnOrderEvent.
+
+        v.order_expiry = OrderExpiryQueue()
+            # Pending limit orders by expiry time, cancelled after max_pending_order_age_minutes.
+
         self.AddUniverseHandler = AddUniverseHandler(self)
             # Define the handler for AddUniverse.py
 
@@ -56,9 +113,21 @@ class CodysAdvancedStrategy(QCAlgorithm):
         self.onOrderEventHandler = OnOrderEventHandler(self)
             # Define the event handler for OnOrderEvent.py
 
-    # Define the handler for AddUniverse.py
-    def AddUniverse(self):
+        self.scheduledEventsHandler = ScheduledEventsHandler(self)
+        self.scheduledEventsHandler.schedule()
+            # Periodic housekeeping run as scheduled events instead of in OnData, see scheduledEvents.py.
+
+        v.checkpoint = StrategyCheckpoint()
+        warmup_end = self.Time if self.LiveMode else self.StartDate
+        checkpoint_time = v.checkpoint.restore(self, warmup_end)
+        if checkpoint_time is not None:
+            self.SetWarmUp(warmup_end - replayStart(checkpoint_time), c.finest_resolution)
+                # Restored from a checkpoint: only warm up on the bars since it was saved, from the start
+                # of the coarsest indicator bar it fell in. See checkpoint.py.
+
         self.AddUniverseHandler.AddUniverse()
+            # Create the static or dynamic symbol Universe defined in config.py.
+            # Not named AddUniverse on the algorithm, which would hide QCAlgorithm.AddUniverse.
 
     # Define the event handler for OnSecuritiesChanged.py
     def OnSecuritiesChanged(self, changes):
@@ -76,28 +145,33 @@ class CodysAdvancedStrategy(QCAlgorithm):
     def OnOrderEvent(self, orderEvent):
         self.onOrderEventHandler.OnOrderEvent(orderEvent)
 
+    # Runs once at the end of the backtest or live deployment.
+    def OnEndOfAlgorithm(self):
+        v.order_tags.save(self)
+            # Persist the order tag side-table for research.ipynb.
+
+        v.chart_store.flush(self)
+            # Save the chart rows buffered since the last daily chunk.
+
+        v.checkpoint.save(self)
+            # Latest strategy state, to restart from.
+
+        if c.buy_plan_report_hit_rates:
+            v.buy_plan.report(self)
+                # Shows which buy conditions reject the most symbols, to tune buy_plan_condition_order.
+
+        v.trade_bootstrap.report()
+            # Distributions of Kelly Criterion, terminal equity and max drawdown from resampling the realized trades.
+
+        v.persistence_writer.close()
+            # Wait for the queued Object Store saves above to be written. Saves after this are synchronous.
+
+        if v.profiler is not None:
+            v.profiler.report(self)
+                # Last, so the Object Store writes above are included.
+
     def initializeIndicators(self, symbol):
-        self.EnableAutomaticIndicatorWarmUp = True
-        # Enable auto warmup for indicators where possible.
-        # Most indicators are manually updated with consolidators.
-
-        # Initialize indicators
-        self.Debug(f"Initializing indicators for {symbol}...")
-        atr = AverageTrueRange(c.buy_parameter_atr_periods, MovingAverageType.Wilders)
-        emaShort = ExponentialMovingAverage(c.buy_parameter_ema_short_periods)
-        emaLong = ExponentialMovingAverage(c.buy_parameter_ema_long_periods)
-        macd = MovingAverageConvergenceDivergence(12, 26, 9, MovingAverageType.Wilders)
-        rsi = RelativeStrengthIndex(c.buy_parameter_rsi_periods)
-        sto = Stochastic(14, 3, 3)
-
-        # Store indicators
-        v.indicators[symbol] = {
-            'atr': atr,
-            'emaShort': emaShort,
-            'emaLong': emaLong,
-            'macd': macd,
-            'rsi': rsi,
-            'sto': sto
-        }
+        self.onSecuritiesChangedHandler.initializeIndicators(symbol)
+        # Indicators live in v.indicator_engine, see OnSecuritiesChanged.py.
 
 # End main.py
\ No newline at end of file
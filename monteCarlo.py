@@ -0,0 +1,123 @@
+# Begin monteCarlo.py
+
+# Monte Carlo bootstrap of realized trade returns, for a Kelly fraction that holds up to bad luck.
+#   The Kelly fraction of tradeStatistics.py is a point estimate from a few dozen trades, and
+#   sizing positions with it assumes those trades are exactly representative. TradeBootstrap
+#   resamples the trade returns of a scope with replacement into c.monte_carlo_paths paths of
+#   equal length, all as one (paths x trades) array, and from it computes:
+#       - the Kelly fraction of every path, whose c.monte_carlo_kelly_percentile is used
+#       - terminal equity and max drawdown of every path, for a grid of fractions of capital per trade
+#   The risk-adjusted Kelly fraction is the lower of that Kelly percentile and the largest fraction
+#   whose c.monte_carlo_drawdown_percentile max drawdown stays within c.monte_carlo_max_drawdown.
+#
+#   Results are cached per scope and cleared once a day by scheduledEvents.py, so each scope is
+#   resampled at most once a day, the first time shouldBuy sizes a position with it.
+
+from AlgorithmImports import *
+import config as c
+import variables as v
+import numpy as np
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+def bootstrapSamples(returns, paths, trades, rng):
+    # (paths x trades) trade returns drawn with replacement.
+    return np.asarray(returns, dtype=np.float64)[rng.integers(0, len(returns), size=(paths, trades))]
+
+def pathKelly(samples):
+    # Kelly fraction W - (1 - W) / R of every path, like RollingTradeStats.kelly.
+    trades = samples.shape[1]
+    wins = samples > 0
+    win_count = wins.sum(axis=1)
+    loss_count = trades - win_count
+    win_sum = np.where(wins, samples, 0.0).sum(axis=1)
+    loss_sum = np.where(wins, 0.0, -samples).sum(axis=1)
+    win_rate = win_count / trades
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payoff_ratio = (win_sum / win_count) / (loss_sum / loss_count)
+        payoff_ratio = np.where((loss_count == 0) | (loss_sum <= 0), np.inf, payoff_ratio)
+            # No losses: unbounded payoff ratio, Kelly = win rate.
+        kelly = win_rate - (1 - win_rate) / payoff_ratio
+    return np.where(win_count == 0, 0.0, kelly)
+
+def equityPaths(samples, fractions):
+    # (fractions x paths x trades + 1) equity, starting at 1, risking each fraction of capital per trade.
+    growth = 1.0 + fractions[:, None, None] * samples[None, :, :]
+    equity = np.cumprod(np.maximum(growth, 0.0), axis=2)
+    return np.concatenate([np.ones(equity.shape[:2] + (1,)), equity], axis=2)
+
+def maxDrawdowns(equity):
+    # Largest peak-to-trough loss of every path, along the last axis.
+    peaks = np.maximum.accumulate(equity, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.nanmax(1.0 - equity / peaks, axis=-1)
+
+def percentiles(values):
+    return {f"p{q}": float(value) for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+class TradeBootstrap:
+    def __init__(self, paths=None, trades=None, seed=None):
+        self.paths = paths or c.monte_carlo_paths
+        self.trades = trades or c.monte_carlo_trades_per_path
+        self.fractions = np.linspace(0.0, 1.0, c.monte_carlo_fraction_steps + 1)[1:]
+            # Fractions of capital per trade the drawdown limit is checked at.
+        self.rng = np.random.default_rng(c.monte_carlo_seed if seed is None else seed)
+        self.results = {} # RollingTradeStats -> analyze() result, cleared by refresh()
+
+    def analyze(self, returns):
+        # Distributions of per-path Kelly fraction, and terminal equity / max drawdown per fraction.
+        samples = bootstrapSamples(returns, self.paths, self.trades or len(returns), self.rng)
+        kelly = pathKelly(samples)
+        equity = equityPaths(samples, self.fractions)
+        drawdowns = maxDrawdowns(equity)
+        drawdown_limit = np.percentile(drawdowns, c.monte_carlo_drawdown_percentile, axis=1)
+        within_limit = self.fractions[drawdown_limit <= c.monte_carlo_max_drawdown]
+        kelly_percentile = float(np.percentile(kelly, c.monte_carlo_kelly_percentile))
+        robust_kelly = min(kelly_percentile, float(within_limit.max()) if len(within_limit) else 0.0)
+
+        sizing_equity = equityPaths(samples, np.array([max(robust_kelly, 0.0)]))[0]
+        return {
+            "Trades": len(returns),
+            "Kelly": percentiles(kelly),
+            "RobustKelly": max(robust_kelly, 0.0),
+            "TerminalEquity": percentiles(sizing_equity[:, -1]),
+            "MaxDrawdown": percentiles(maxDrawdowns(sizing_equity))
+        } # Terminal equity and drawdown are at the robust Kelly fraction, per unit of starting capital.
+
+    def refresh(self):
+        # Scheduled daily: the next sizing of each scope resamples its latest trades.
+        self.results.clear()
+
+    def result(self, stats):
+        result = self.results.get(stats)
+        if result is None:
+            result = self.results[stats] = self.analyze(stats.values())
+        return result
+
+    def kellyFraction(self, scope, symbol=None, sector=None):
+        # Kelly fraction positions are sized with: the bootstrapped risk-adjusted one, or the point
+        # estimate of tradeStatistics.py if c.monte_carlo_kelly_enabled is off. None while too few trades.
+        stats = v.trade_statistics.sizingStats(scope, symbol, sector)
+        if stats is None:
+            return None
+        if not c.monte_carlo_kelly_enabled:
+            return stats.kelly
+        return self.result(stats)["RobustKelly"]
+
+    def report(self):
+        # Post-run distributions over the global trade window.
+        stats = v.trade_statistics.global_stats
+        if stats.count < 2:
+            return
+        result = self.analyze(stats.values())
+        v.log.info(
+            "monteCarlo", "Bootstrap of the last {} trades: point Kelly {:.3f}, Kelly p5/p25/p50 {:.3f} / {:.3f} / {:.3f}, robust Kelly {:.3f}",
+            result["Trades"], stats.kelly, result["Kelly"]["p5"], result["Kelly"]["p25"], result["Kelly"]["p50"], result["RobustKelly"]
+        )
+        v.log.info(
+            "monteCarlo", "At the robust Kelly: terminal equity p5/p50/p95 {:.3f} / {:.3f} / {:.3f}, max drawdown p50/p95 {:.2%} / {:.2%}",
+            result["TerminalEquity"]["p5"], result["TerminalEquity"]["p50"], result["TerminalEquity"]["p95"],
+            result["MaxDrawdown"]["p50"], result["MaxDrawdown"]["p95"]
+        )
+
+# End monteCarlo.py
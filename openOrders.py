@@ -0,0 +1,120 @@
+# Begin openOrders.py
+
+# Local index of working orders, kept up to date from OnOrderEvent status transitions.
+#   Answers "does this symbol have a working order, and for how many shares" in O(1), without a
+#   Transactions.GetOpenOrders interop call that builds a list for every symbol on every slice.
+#   Also keeps the cash reserved by open buy limit orders (remaining shares * limit price), so
+#   position sizing in shouldBuy.py only spends cash that isn't already committed.
+#   OnData adds each order as soon as it is placed (addTicket), so buys sized later in the same slice
+#   don't spend the same cash while the order's Submitted event is still on its way.
+
+from AlgorithmImports import *
+import variables as v
+
+class OpenOrder:
+    __slots__ = ('symbol', 'remaining_qty', 'limit_price')
+
+    def __init__(self, symbol, remaining_qty, limit_price):
+        self.symbol = symbol
+        self.remaining_qty = remaining_qty # Signed, like the order quantity
+        self.limit_price = limit_price # 0 for market orders
+
+    @property
+    def reserved_cash(self):
+        return self.remaining_qty * self.limit_price if self.remaining_qty > 0 else 0.0
+
+CLOSED_STATUSES = (OrderStatus.Filled, OrderStatus.Canceled, OrderStatus.Invalid)
+
+class OpenOrderIndex:
+    def __init__(self):
+        self.orders = {} # Order id -> OpenOrder
+        self.symbol_orders = {} # Symbol -> number of working orders
+        self.symbol_qty = {} # Symbol -> net remaining quantity of its working orders
+        self.reserved_cash = 0.0 # Cash committed to open buy limit orders
+
+    def onOrderEvent(self, orderEvent):
+        status = orderEvent.Status
+        if status == OrderStatus.Submitted:
+            self.update(orderEvent.OrderId, orderEvent.Symbol, orderEvent.Quantity, orderEvent.LimitPrice or 0.0)
+        elif status == OrderStatus.PartiallyFilled:
+            self.fill(orderEvent.OrderId, orderEvent.FillQuantity)
+        elif status in CLOSED_STATUSES:
+            self.remove(orderEvent.OrderId)
+
+    def addTicket(self, ticket, limit_price=0.0):
+        # Reserve a just-placed order right away, before its Submitted event arrives.
+        if ticket is None or ticket.Status in CLOSED_STATUSES:
+            return
+            # Already filled or rejected: its closing event has been handled.
+        self.add(ticket.OrderId, ticket.Symbol, ticket.Quantity - ticket.QuantityFilled, limit_price)
+
+    def add(self, order_id, symbol, quantity, limit_price):
+        if order_id in self.orders:
+            return
+        order = self.orders[order_id] = OpenOrder(symbol, quantity, limit_price)
+        self.symbol_orders[symbol] = self.symbol_orders.get(symbol, 0) + 1
+        self.symbol_qty[symbol] = self.symbol_qty.get(symbol, 0) + quantity
+        self.reserved_cash += order.reserved_cash
+
+    def update(self, order_id, symbol, quantity, limit_price):
+        # Submitted event: confirm the entry added when the order was placed. Orders placed
+        # elsewhere than OnData are added here.
+        order = self.orders.get(order_id)
+        if order is None:
+            self.add(order_id, symbol, quantity, limit_price)
+            return
+        if order.limit_price != limit_price:
+            reserved_before = order.reserved_cash
+            order.limit_price = limit_price
+            self.reserved_cash += order.reserved_cash - reserved_before
+
+    def fill(self, order_id, fill_qty):
+        order = self.orders.get(order_id)
+        if order is None:
+            return
+        reserved_before = order.reserved_cash
+        order.remaining_qty -= fill_qty
+        self.symbol_qty[order.symbol] -= fill_qty
+        self.reserved_cash += order.reserved_cash - reserved_before
+
+    def remove(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return
+        symbol = order.symbol
+        self.reserved_cash -= order.reserved_cash
+        self.symbol_orders[symbol] -= 1
+        if self.symbol_orders[symbol] == 0:
+            del self.symbol_orders[symbol]
+            del self.symbol_qty[symbol]
+        else:
+            self.symbol_qty[symbol] -= order.remaining_qty
+        if not self.orders:
+            self.reserved_cash = 0.0
+                # No open orders left: drop any rounding residue.
+
+    def rebuild(self, algorithm):
+        # Re-index the broker's open orders from scratch, e.g. after a restart: orders may have
+        # filled or been cancelled while the algorithm wasn't running.
+        self.orders = {}
+        self.symbol_orders = {}
+        self.symbol_qty = {}
+        self.reserved_cash = 0.0
+        for order in algorithm.Transactions.GetOpenOrders():
+            ticket = algorithm.Transactions.GetOrderTicket(order.Id)
+            filled = ticket.QuantityFilled if ticket is not None else 0
+            self.add(order.Id, order.Symbol, order.Quantity - filled, getattr(order, 'LimitPrice', 0.0) or 0.0)
+                # Market orders have no limit price and reserve no cash.
+
+    def hasOpenOrders(self, symbol):
+        return symbol in self.symbol_orders
+
+    def openQuantity(self, symbol):
+        # Net shares still to be bought (+) or sold (-) by the symbol's working orders.
+        return self.symbol_qty.get(symbol, 0)
+
+    def availableCash(self, algorithm):
+        # Cash not yet committed to open buy limit orders.
+        return algorithm.Portfolio.Cash - self.reserved_cash
+
+# End openOrders.py
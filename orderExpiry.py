@@ -0,0 +1,68 @@
+# Begin orderExpiry.py
+
+# Expiry of pending limit orders after c.max_pending_order_age_minutes.
+#   Pending orders are kept in a min-heap keyed on their expiry time, so each OnData slice only
+#   looks at the head of the heap and touches just the orders that are actually due, instead of
+#   computing the age of every order ever placed.
+#   Orders leave `pending` as soon as OnOrderEvent sees them close. Their heap entry stays until it
+#   comes due and is then skipped, which bounds the heap to the orders placed in the last max age.
+#   After a restart, rebuild() re-registers the broker's open limit orders at the end of the warm-up,
+#   each expiring max age after it was submitted.
+
+from AlgorithmImports import *
+import config as c
+import variables as v
+import heapq
+
+class OrderExpiryQueue:
+    def __init__(self, max_age_minutes=None):
+        self.max_age = timedelta(minutes=c.max_pending_order_age_minutes if max_age_minutes is None else max_age_minutes)
+        self.heap = [] # (expiry time, order id)
+        self.pending = {} # Order id -> OrderTicket, for orders that haven't closed yet
+
+    def add(self, algorithm, ticket):
+        # Expire the order max_age after now. Uses algorithm time rather than OrderTicket.Time, which is UTC in LEAN.
+        if ticket is None or ticket.OrderClosed:
+            return
+        self.pending[ticket.OrderId] = ticket
+        heapq.heappush(self.heap, (algorithm.Time + self.max_age, ticket.OrderId))
+
+    def rebuild(self, algorithm):
+        # Re-register every open limit order from scratch, e.g. after a restart. LEAN loads the broker's
+        # open orders only after Initialize, and order ids aren't kept across restarts, so this runs in
+        # OnWarmupFinished rather than from the checkpoint.
+        utc_offset = algorithm.Time - algorithm.UtcTime
+            # OrderTicket.Time is the submit time in UTC.
+        self.heap = []
+        self.pending = {}
+        for ticket in algorithm.Transactions.GetOpenOrderTickets():
+            if ticket.OrderType != OrderType.Limit or ticket.OrderClosed:
+                continue
+            self.pending[ticket.OrderId] = ticket
+            self.heap.append((ticket.Time + utc_offset + self.max_age, ticket.OrderId))
+        heapq.heapify(self.heap)
+            # Orders already past their max age are cancelled on the next OnData slice.
+
+    def remove(self, order_id):
+        # The order closed: forget its ticket.
+        self.pending.pop(order_id, None)
+
+    def expireDue(self, algorithm):
+        # Cancel every pending order whose expiry time has passed. Returns how many were cancelled.
+        heap = self.heap
+        now = algorithm.Time
+        cancelled = 0
+        while heap and heap[0][0] <= now:
+            _, order_id = heapq.heappop(heap)
+            ticket = self.pending.pop(order_id, None)
+            if ticket is None or ticket.OrderClosed:
+                continue
+            ticket.Cancel("Order too old")
+            cancelled += 1
+            v.log.info("orderExpiry", "Order {} for {} cancelled due to timeout", order_id, ticket.Symbol)
+        return cancelled
+
+    def __len__(self):
+        return len(self.pending)
+
+# End orderExpiry.py
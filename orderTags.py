@@ -0,0 +1,75 @@
+# Begin orderTags.py
+
+# Compact order tags backed by a side-table of condition snapshots.
+#   shouldBuy / shouldSell return a snapshot function instead of a JSON tag. Only when OnData
+#   actually submits an order is the snapshot built and stored here, and the order gets a short
+#   tag like "B-17" (buy) or "S-18" (sell) that points to it.
+#   The table can be queried during or after the run with lookup() / records(), and is saved to
+#   the ObjectStore as JSON by save(), which main.OnEndOfAlgorithm calls. The JSON is written by the
+#   background v.persistence_writer, see persistenceWriter.py.
+
+from AlgorithmImports import *
+import config as c
+import variables as v
+import json
+
+class OrderTagJournal:
+    CHECKPOINT_VERSION = 1 # Bump when checkpointState() changes shape, see checkpoint.py.
+
+    def __init__(self):
+        self.snapshots = {} # Tag -> condition snapshot dict
+        self.next_id = 1
+
+    def checkpointState(self):
+        # Only the tag counter: the snapshots are saved by save().
+        return {'version': self.CHECKPOINT_VERSION, 'next_id': self.next_id}
+
+    @classmethod
+    def fromCheckpoint(cls, state, snapshots=None):
+        # Journal restored from checkpointState(), continuing the tag numbers. snapshots: the table
+        # saved by save(), e.g. from loadOrderTags(), so the next save() keeps the earlier tags.
+        if state.get('version') != cls.CHECKPOINT_VERSION:
+            raise ValueError(f"OrderTagJournal checkpoint version {state.get('version')}, expected {cls.CHECKPOINT_VERSION}")
+        journal = cls()
+        journal.next_id = state['next_id']
+        journal.snapshots = dict(snapshots or {})
+        return journal
+
+    def createTag(self, algorithm, kind, symbol, conditionSnapshot):
+        # Build the snapshot and return the compact tag that identifies it.
+        # kind: "B" for buys, "S" for sells.
+        tag = f"{kind}-{self.next_id}"
+        self.next_id += 1
+        snapshot = conditionSnapshot() if callable(conditionSnapshot) else dict(conditionSnapshot or {})
+        snapshot["Symbol"] = str(symbol)
+        snapshot["Time"] = str(algorithm.Time)
+        self.snapshots[tag] = snapshot
+        return tag
+
+    def lookup(self, tag):
+        # Condition snapshot for an order tag, or None.
+        return self.snapshots.get(tag)
+
+    def records(self, symbol=None):
+        # All snapshots as a list of dicts with their tag, optionally for one symbol.
+        return [
+            {"Tag": tag, **snapshot} for tag, snapshot in self.snapshots.items()
+            if symbol is None or snapshot["Symbol"] == str(symbol)
+        ]
+
+    def save(self, algorithm, key=None):
+        # Queue the whole side-table to be saved to the ObjectStore as one JSON document.
+        key = key or c.order_tag_journal_object_store_key
+        snapshots = dict(self.snapshots)
+            # Snapshots don't change once created: a shallow copy is enough to serialize on the writer thread.
+        return v.persistence_writer.save(key, lambda: json.dumps(snapshots, default=str))
+
+def loadOrderTags(object_store, key=None):
+    # Read a saved side-table back as {tag: snapshot}, e.g. in research.ipynb.
+    key = key or c.order_tag_journal_object_store_key
+    if not object_store.ContainsKey(key):
+        return {}
+    text = object_store.Read(key)
+    return json.loads(text) if text else {}
+
+# End orderTags.py
@@ -0,0 +1,169 @@
+# Begin parameterSweep.py
+
+# Parallel parameter sweep over config.py parameters, using the local replay harness.
+#   Runs one backtest per parameter variant across a process pool on one machine.
+#   Bar data is converted once to .npy files and every worker memory-maps them read-only
+#   (np.load mmap_mode='r'), so the OS shares one copy of the pages instead of each worker
+#   re-reading and re-parsing the bar files.
+#   Writes a results table (CSV) with return, drawdown, trade count and wall-time per variant.
+#
+#   Usage:
+#       python parameterSweep.py --bars data/ --all-symbols --processes 4 --out sweep.csv \
+#           --grid '{"buy_parameter_ema_short_periods": [5, 9, 12], "buy_parameter_rsi_min_threshold": [40, 50]}'
+#       python parameterSweep.py --bars data/ --all-symbols --samples 20 --seed 7 \
+#           --random '{"sell_parameter_stop_loss_price_atr_multiplier": [1.0, 3.0], "buy_parameter_ema_long_periods": [10, 30]}'
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import localReplay
+
+RESULT_COLUMNS = ('variant', 'total_return', 'max_drawdown', 'trade_count', 'wall_time_s', 'error_count', 'error')
+    # Result columns written before the parameter columns.
+
+def gridSpace(grid):
+    # Every combination of the listed values: {"name": [value, ...]}.
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def randomSpace(space, samples, seed=None):
+    # `samples` random variants. Each parameter is either a [low, high] range (ints stay ints)
+    # or {"choices": [value, ...]}.
+    rng = random.Random(seed)
+    variants = []
+    for _ in range(samples):
+        variant = {}
+        for name, spec in space.items():
+            if isinstance(spec, dict):
+                variant[name] = rng.choice(spec['choices'])
+            elif all(isinstance(bound, int) for bound in spec):
+                variant[name] = rng.randint(spec[0], spec[1])
+            else:
+                variant[name] = rng.uniform(spec[0], spec[1])
+        variants.append(variant)
+    return variants
+
+def shareBars(bars_path, directory):
+    # Return a directory of .npy bar arrays that workers can memory-map, converting once if needed.
+    if os.path.isdir(bars_path) and os.path.exists(os.path.join(bars_path, 'times.npy')):
+        return bars_path
+    localReplay.saveBars(directory, localReplay.loadBars(bars_path))
+    return directory
+
+# Per-worker state, set once by initializeWorker.
+worker_bars = None
+worker_options = None
+worker_fundamentals = None
+worker_fundamental_cache = None
+
+def initializeWorker(shared_bars_path, options):
+    global worker_bars, worker_options, worker_fundamentals, worker_fundamental_cache
+    worker_bars = localReplay.loadBars(shared_bars_path, mmap_mode='r')
+    worker_options = options
+    worker_fundamentals = worker_fundamental_cache = None
+    if options.get('fundamentals'):
+        worker_fundamentals = localReplay.CsvFundamentalSource(options['fundamentals'])
+        if options.get('fundamental_cache'):
+            worker_fundamental_cache = localReplay.fundamentalCacheFor(options['fundamental_cache'], worker_fundamentals)
+                # Shared on disk: each date is parsed by whichever worker needs it first, then memory-mapped by all.
+
+def replayVariant(params, start=None, end=None):
+    # Run one backtest in this worker with the given config overrides and return its ReplayResult.
+    # start / end default to the pool's options.
+    return localReplay.ReplayEngine(
+        worker_bars,
+        start=start or worker_options.get('start'),
+        end=end or worker_options.get('end'),
+        config_overrides={**worker_options.get('config_overrides', {}), **params},
+        all_symbols=worker_options.get('all_symbols', False),
+        fundamentals=worker_fundamentals,
+        fundamental_cache=worker_fundamental_cache
+    ).run()
+
+def runVariant(task):
+    # Run one backtest with the given config overrides and return its result row.
+    variant_id, params = task
+    started = time.perf_counter()
+    row = {'variant': variant_id, **params}
+    try:
+        summary = replayVariant(params).summary()
+        row.update(
+            total_return=summary['total_return'],
+            max_drawdown=summary['max_drawdown'],
+            trade_count=summary['trade_count'],
+            error_count=summary['error_count'],
+            error=''
+        )
+    except Exception as e:
+        row.update(total_return=float('nan'), max_drawdown=float('nan'), trade_count=0, error_count=1, error=str(e))
+    row['wall_time_s'] = time.perf_counter() - started
+    return row
+
+def createPool(bars_path, processes, options, directory):
+    # Process pool whose workers memory-map the shared bar arrays once at start-up.
+    shared = shareBars(bars_path, directory)
+    context = multiprocessing.get_context('spawn')
+        # Fresh interpreters: no algorithm module state is inherited from the parent.
+    return context.Pool(processes, initializer=initializeWorker, initargs=(shared, options))
+
+def runSweep(bars_path, variants, processes=None, options=None):
+    # Run all variants in parallel and return the result rows in variant order.
+    options = options or {}
+    with tempfile.TemporaryDirectory(prefix='sweep-bars-') as directory:
+        with createPool(bars_path, processes, options, directory) as pool:
+            rows = pool.map(runVariant, list(enumerate(variants)), chunksize=1)
+    return rows
+
+def writeResults(path, rows):
+    parameter_names = []
+    for row in rows:
+        parameter_names.extend(name for name in row if name not in RESULT_COLUMNS and name not in parameter_names)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(RESULT_COLUMNS) + parameter_names)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({name: json.dumps(value) if isinstance(value, (list, dict)) else value for name, value in row.items()})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel sweep of config.py parameters with the local replay harness.")
+    parser.add_argument('--bars', required=True, help="Bar files, see localReplay.py.")
+    parser.add_argument('--grid', help="JSON {name: [values]} grid.")
+    parser.add_argument('--random', help="JSON {name: [low, high] or {\"choices\": [...]}} random space.")
+    parser.add_argument('--samples', type=int, default=20, help="Number of random variants.")
+    parser.add_argument('--seed', type=int, help="Seed for random variants.")
+    parser.add_argument('--start', help="Override config.SetStartDate.")
+    parser.add_argument('--end', help="Override config.SetEndDate.")
+    parser.add_argument('--all-symbols', action='store_true', help="Use every symbol in the bar files as a static universe.")
+    parser.add_argument('--processes', type=int, help="Worker processes (default: CPU count).")
+    parser.add_argument('--out', default='sweep_results.csv', help="Results CSV path.")
+    parser.add_argument('--fundamentals', help="Fundamentals CSV for the dynamic universe, see localReplay.py.")
+    parser.add_argument('--fundamental-cache', help="Directory of memory-mapped fundamental snapshots, shared by all workers and runs.")
+    args = parser.parse_args(argv)
+
+    if args.grid:
+        variants = gridSpace(json.loads(args.grid))
+    elif args.random:
+        variants = randomSpace(json.loads(args.random), args.samples, args.seed)
+    else:
+        parser.error("one of --grid or --random is required")
+
+    options = {
+        'start': args.start, 'end': args.end, 'all_symbols': args.all_symbols,
+        'fundamentals': args.fundamentals, 'fundamental_cache': args.fundamental_cache
+    }
+    rows = runSweep(args.bars, variants, args.processes, options)
+    writeResults(args.out, rows)
+    best = max((row for row in rows if not row['error']), key=lambda row: row['total_return'], default=None)
+    print(f"{len(rows)} variants written to {args.out}. Best: {best}")
+
+if __name__ == '__main__':
+    main()
+
+# End parameterSweep.py
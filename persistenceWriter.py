@@ -0,0 +1,181 @@
+# Begin persistenceWriter.py
+
+# Background writer for Object Store saves.
+#   Chart chunks (chartStore.py), the order tag journal (orderTags.py), checkpoints (checkpoint.py)
+#   and the profiler report are queued here instead of being saved inside OnData or a scheduled
+#   event. A payload can be a function, which the writer thread calls to serialize or compress it,
+#   so only copying the data stays on the algorithm's thread.
+#
+#   - Bounded queue of c.persistence_queue_size saves, drained by one daemon thread in batches of up
+#     to c.persistence_batch_size. Within a batch only the latest save of each key is written,
+#     e.g. the chart index or a checkpoint queued twice.
+#   - Backpressure: when the queue is full, a save that isn't droppable waits for room, up to
+#     c.persistence_block_timeout_seconds. If there is still none it replaces the queued saves of the
+#     same key, or else is queued past the bound, so it is never lost and never overwritten by an
+#     older save of its key.
+#   - Drop policy for droppable saves (chart chunks) when the queue is full, c.persistence_drop_policy:
+#       "oldest": drop the oldest queued droppable save to make room
+#       "newest": drop the new save
+#   - close() waits for every queued save to be written, in OnEndOfAlgorithm.
+#
+#   Failures on the writer thread are collected and logged on the algorithm's thread, at the next
+#   save() or flush(). With c.persistence_writer_enabled off every save is written synchronously.
+
+from AlgorithmImports import *
+import config as c
+import variables as v
+import collections
+import threading
+
+DROP_POLICIES = ('oldest', 'newest')
+
+class PersistenceItem:
+    __slots__ = ('key', 'payload', 'droppable', 'write')
+
+    def __init__(self, key, payload, droppable, write):
+        self.key = key
+        self.payload = payload
+        self.droppable = droppable
+        self.write = write
+
+class PersistenceWriter:
+    def __init__(self, algorithm, queue_size=None, batch_size=None, drop_policy=None, asynchronous=None):
+        self.algorithm = algorithm
+        self.queue_size = queue_size or c.persistence_queue_size
+        self.batch_size = batch_size or c.persistence_batch_size
+        self.drop_policy = drop_policy or c.persistence_drop_policy
+        if self.drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown persistence drop policy: {self.drop_policy}")
+        self.asynchronous = c.persistence_writer_enabled if asynchronous is None else asynchronous
+
+        self.queue = collections.deque() # PersistenceItems waiting for the writer thread
+        self.condition = threading.Condition()
+        self.in_flight = 0 # Saves of the batch being written
+        self.closed = False
+        self.failures = collections.deque() # (key, error) from the writer thread, logged by logFailures()
+
+        # Counters for the report at close()
+        self.written = 0
+        self.coalesced = 0 # Superseded by a later save of the same key, in the same batch or in a full queue
+        self.dropped = 0
+        self.waited = 0 # Non-droppable saves that waited for room in a full queue
+        self.overflowed = 0 # Non-droppable saves still without room after the wait, queued past the bound
+
+        self.thread = None
+        if self.asynchronous:
+            self.thread = threading.Thread(target=self.run, name="PersistenceWriter", daemon=True)
+            self.thread.start()
+
+    def save(self, key, payload, droppable=False, write=None):
+        # Queue a save of payload (str, bytes, or a function returning them) to the Object Store key.
+        # write(key, data) -> bool replaces the Object Store save, e.g. for a local file.
+        # Returns False if the save was dropped.
+        self.logFailures()
+        item = PersistenceItem(key, payload, droppable, write)
+        if self.thread is None or self.closed:
+            self.writeItem(item)
+            self.logFailures()
+            return True
+
+        with self.condition:
+            if len(self.queue) >= self.queue_size:
+                if droppable:
+                    oldest = next((queued for queued in self.queue if queued.droppable), None) if self.drop_policy == 'oldest' else None
+                    self.dropped += 1
+                    if oldest is None:
+                        v.log.warning("persistenceWriter.drop", "Queue full, dropped save of {}", key)
+                        return False
+                    self.queue.remove(oldest)
+                    v.log.warning("persistenceWriter.drop", "Queue full, dropped queued save of {}", oldest.key)
+                else:
+                    self.waited += 1
+                    if not self.condition.wait_for(lambda: len(self.queue) < self.queue_size, c.persistence_block_timeout_seconds):
+                        superseded = [queued for queued in self.queue if queued.key == key]
+                        for queued in superseded:
+                            self.queue.remove(queued)
+                        self.coalesced += len(superseded)
+                        if not superseded:
+                            self.overflowed += 1
+                            # Still no room: the save replaces the queued saves of its key, or goes past the
+                            # bound. The writer thread writes it after any older save of its key in flight.
+            self.queue.append(item)
+            self.condition.notify_all()
+        return True
+
+    def run(self):
+        # Writer thread: drain the queue in batches until close().
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.queue or self.closed)
+                if not self.queue:
+                    return
+                batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+                self.in_flight = len(batch)
+                self.condition.notify_all()
+                    # Room in the queue for waiting saves.
+
+            latest = {}
+            for item in batch:
+                latest.pop(item.key, None)
+                latest[item.key] = item
+                    # Keeps the latest save of each key, in the order of the latest saves.
+            for item in latest.values():
+                self.writeItem(item)
+
+            with self.condition:
+                self.coalesced += len(batch) - len(latest)
+                self.in_flight = 0
+                self.condition.notify_all()
+
+    def writeItem(self, item):
+        try:
+            data = item.payload() if callable(item.payload) else item.payload
+            if item.write is not None:
+                saved = item.write(item.key, data)
+            elif isinstance(data, str):
+                saved = self.algorithm.ObjectStore.Save(item.key, data)
+            else:
+                saved = self.algorithm.ObjectStore.SaveBytes(item.key, data)
+            error = None if saved else "save returned False"
+        except Exception as e:
+            error = e
+        with self.condition:
+            # Counted under the lock: both the writer thread and the algorithm's thread (after close()) write.
+            if error is None:
+                self.written += 1
+            else:
+                self.failures.append((item.key, error))
+
+    def logFailures(self):
+        while self.failures:
+            key, error = self.failures.popleft()
+            v.log.error("persistenceWriter", "Failed to save {} to Object Store: {}", key, error)
+
+    def flush(self, timeout=None):
+        # Wait until every queued save is written. Returns False on timeout.
+        done = True
+        if self.thread is not None:
+            with self.condition:
+                done = self.condition.wait_for(
+                    lambda: not self.queue and not self.in_flight,
+                    c.persistence_flush_timeout_seconds if timeout is None else timeout
+                )
+        self.logFailures()
+        return done
+
+    def close(self):
+        # Write everything still queued and stop the writer thread. Later saves are written synchronously.
+        if not self.flush():
+            v.log.error("persistenceWriter", "Timed out writing {} queued saves", len(self.queue))
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(c.persistence_flush_timeout_seconds)
+        self.logFailures()
+        v.log.info(
+            "persistenceWriter", "Wrote {} saves: {} superseded by a later save of the same key, {} dropped, {} waited for room, {} queued past the bound",
+            self.written, self.coalesced, self.dropped, self.waited, self.overflowed
+        )
+
+# End persistenceWriter.py
@@ -0,0 +1,145 @@
+# Begin profiler.py
+
+# Per-handler profiling, enabled with c.profiling_enabled.
+#   HandlerProfiler.instrument() wraps the algorithm's entry points in place (PROFILED_FUNCTIONS) and
+#   keeps, for each one, the number of calls and the total and longest call time. Timings are
+#   inclusive: OnDataHandler.OnData includes the shouldBuy / shouldSell calls it makes.
+#   The overhead is two perf_counter_ns calls and a few integer updates per call.
+#
+#   c.profiling_cprofile_slices = (first, last) also runs cProfile over that window of OnData slices
+#   after the warm-up, for a function-level breakdown of where the time goes.
+#
+#   report() writes the summary to the log and the Object Store at the end of the algorithm, and
+#   removes the wrappers.
+
+from AlgorithmImports import *
+import config as c
+import variables as v
+import cProfile
+import functools
+import importlib
+import io
+import pstats
+import time
+
+PROFILED_FUNCTIONS = (
+    ('OnData', 'OnDataHandler', 'OnData'),
+    ('OnSecuritiesChanged', 'OnSecuritiesChangedHandler', 'updateIndicators'),
+    ('OnData', None, 'shouldBuy'),
+    ('OnData', None, 'shouldSell'),
+        # OnData.py calls them through its own module globals.
+    ('riskLevels', 'RiskLevels', 'update'),
+    ('riskLevels', 'RiskLevels', 'trail'),
+        # Batched stop loss / take profit levels of the ready symbols with new bars, and the trailing
+        # stop of held positions it raises.
+    ('charts', None, 'plotIndicators'),
+    ('charts', None, 'plotPositionSizes'),
+    ('chartStore', 'ChartStore', 'flush'),
+    ('checkpoint', 'StrategyCheckpoint', 'save'),
+    ('persistenceWriter', 'PersistenceWriter', 'save'),
+        # Object Store writes, queued for the background writer. The time spent on its thread isn't included.
+    ('AddUniverse', 'AddUniverseHandler', 'filterAndSortUniverse'),
+    ('OnOrderEvent', 'OnOrderEventHandler', 'OnOrderEvent')
+) # (module, class or None for a module function, function)
+
+class CallStats:
+    __slots__ = ('calls', 'total_ns', 'max_ns')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+class HandlerProfiler:
+    def __init__(self, cprofile_slices=None):
+        self.stats = {} # Label -> CallStats
+        self.originals = [] # (owner, attribute, function) to restore
+        self.cprofile_slices = cprofile_slices if cprofile_slices is not None else c.profiling_cprofile_slices
+        self.cprofile = None
+        self.slice_count = 0 # OnData slices after the warm-up
+        self.started_ns = None
+
+    def instrument(self):
+        self.started_ns = time.perf_counter_ns()
+        for module_name, class_name, attribute in PROFILED_FUNCTIONS:
+            module = importlib.import_module(module_name)
+            owner = getattr(module, class_name) if class_name else module
+            label = f"{class_name}.{attribute}" if class_name else attribute
+            self.wrap(owner, attribute, label, onData=(class_name == 'OnDataHandler'))
+
+    def wrap(self, owner, attribute, label, onData=False):
+        function = getattr(owner, attribute)
+        while hasattr(function, '__profiled__'):
+            function = function.__wrapped__
+                # Left over from a run that didn't reach report().
+        stats = self.stats[label] = CallStats()
+        profiler = self
+
+        @functools.wraps(function)
+        def profiled(*args, **kwargs):
+            if onData:
+                profiler.onSlice(args[0].algorithm)
+            started = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter_ns() - started
+                stats.calls += 1
+                stats.total_ns += elapsed
+                if elapsed > stats.max_ns:
+                    stats.max_ns = elapsed
+
+        profiled.__profiled__ = True
+        self.originals.append((owner, attribute, function))
+        setattr(owner, attribute, profiled)
+
+    def onSlice(self, algorithm):
+        # Start / stop cProfile at the edges of the c.profiling_cprofile_slices window.
+        if algorithm.IsWarmingUp or self.cprofile_slices is None:
+            return
+        first, last = self.cprofile_slices
+        if self.slice_count == first and self.cprofile is None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        elif self.slice_count == last + 1 and self.cprofile is not None:
+            self.cprofile.disable()
+        self.slice_count += 1
+
+    def restore(self):
+        for owner, attribute, function in reversed(self.originals):
+            setattr(owner, attribute, function)
+        self.originals.clear()
+
+    def summary(self):
+        elapsed_ns = max(time.perf_counter_ns() - self.started_ns, 1) if self.started_ns else 1
+        lines = [
+            "{:<44} {:>10} {:>12} {:>12} {:>12} {:>7}".format("Function", "Calls", "Total ms", "Mean us", "Max ms", "% time")
+        ]
+        for label, stats in sorted(self.stats.items(), key=lambda item: item[1].total_ns, reverse=True):
+            if not stats.calls:
+                continue
+            lines.append("{:<44} {:>10} {:>12.1f} {:>12.1f} {:>12.2f} {:>6.1f}%".format(
+                label, stats.calls, stats.total_ns / 1e6, stats.total_ns / stats.calls / 1e3,
+                stats.max_ns / 1e6, 100 * stats.total_ns / elapsed_ns
+            ))
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            stream = io.StringIO()
+            pstats.Stats(self.cprofile, stream=stream).sort_stats('cumulative').print_stats(c.profiling_cprofile_top)
+            first, last = self.cprofile_slices
+            lines.append(f"\ncProfile of OnData slices {first} - {last}:")
+            lines.append(stream.getvalue())
+        return "\n".join(lines)
+
+    def report(self, algorithm):
+        try:
+            report = self.summary()
+            v.log.info("profiler", "Profile:\n{}", report)
+            if c.profiling_report_object_store_key:
+                v.persistence_writer.save(c.profiling_report_object_store_key, report)
+        except Exception as e:
+            v.log.error("profiler", "Error on report: {}", e)
+        finally:
+            self.restore()
+
+# End profiler.py
@@ -0,0 +1,188 @@
+# Begin researchIndicators.py
+
+# Vectorized indicators for research.ipynb.
+#   Computes the same indicators as IndicatorEngine (indicatorEngine.py), with the same parameters:
+#   Minimum of the close (atr_min), Wilders ATR, EMA short / long, Wilders MACD(12, 26, 9) and its
+#   signal line, Wilders RSI and Stochastic fast %K(14). The inputs are whole (time x symbol) panels
+#   of high / low / close, as NumPy arrays or DataFrames; NaN means the symbol has no bar at that time.
+#
+#   Each symbol's bars are first stacked to the top of its column, so row i holds every symbol's
+#   (i+1)th bar. The smoothing (pandas ewm) and rolling windows then run over all symbols at once,
+#   and the results are scattered back to the original rows.
+#
+#   parityCheck() replays the same bars through IndicatorEngine bar by bar, the way the algorithm
+#   updates it, and reports the largest difference of each indicator.
+#
+#   Outside QuantConnect, install the local stand-in first:
+#       import localReplay; localReplay.installAlgorithmImports()
+#       import researchIndicators
+
+from AlgorithmImports import *
+import numpy as np
+import pandas as pd
+import config as c
+from indicatorEngine import (
+    IndicatorEngine, KEY_COLUMNS, COLUMN_MACD_SIGNAL,
+    MACD_FAST_PERIODS, MACD_SLOW_PERIODS, MACD_SIGNAL_PERIODS, STO_PERIODS
+)
+
+OUTPUT_COLUMNS = dict(KEY_COLUMNS, macd_signal=COLUMN_MACD_SIGNAL)
+    # Output key -> IndicatorEngine value column.
+
+def readyAfter():
+    # Number of bars each output needs before it IsReady, from the IndicatorEngine settings.
+    ready_after = IndicatorEngine(capacity=1).ready_after
+    return {key: int(ready_after[column]) for key, column in OUTPUT_COLUMNS.items()}
+
+def asPanel(values):
+    # (time x symbol) float array of a DataFrame, Series or array. 1-D inputs are one symbol.
+    panel = np.asarray(values, dtype=np.float64)
+    return panel.reshape(-1, 1) if panel.ndim == 1 else panel
+
+def likeInput(panel, template):
+    # The panel back in the shape and type of the input: DataFrame, Series or array.
+    if isinstance(template, pd.DataFrame):
+        return pd.DataFrame(panel, index=template.index, columns=template.columns)
+    if isinstance(template, pd.Series):
+        return pd.Series(panel[:, 0], index=template.index, name=template.name)
+    return panel[:, 0] if np.ndim(template) == 1 else panel
+
+def stackBars(valid):
+    # Row order that moves each column's bars to the top, keeping their order.
+    return np.argsort(~valid, axis=0, kind='stable')
+
+def rollingExtreme(values, window, reduce, fill):
+    # Min / max of the last `window` rows per column, over fewer rows at the start (min_periods=1).
+    padded = np.vstack([np.full((window - 1, values.shape[1]), fill), values])
+    return reduce(np.lib.stride_tricks.sliding_window_view(padded, window, axis=0), axis=-1)
+
+def seededSmoothing(values, periods, alpha, start=0):
+    # Simple average of the first `periods` rows from `start`, then y += alpha * (x - y), per column.
+    # Rows before `start` are NaN: the series starts there, like IndicatorEngine's smoothing.
+    smoothed = np.full(values.shape, np.nan)
+    head = values[start:start + periods]
+    smoothed[start:start + periods] = np.cumsum(head, axis=0) / np.arange(1, len(head) + 1)[:, None]
+    seed_row = start + periods - 1
+    if seed_row + 1 < len(values):
+        recursive = values[seed_row:].copy()
+        recursive[0] = smoothed[seed_row]
+            # The recursion starts from the simple average.
+        smoothed[seed_row:] = pd.DataFrame(recursive).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return smoothed
+
+def stackedIndicators(high, low, close):
+    # Indicators of stacked panels, where row i is the (i+1)th bar of each symbol.
+    samples = np.broadcast_to(np.arange(1, close.shape[0] + 1, dtype=np.float64)[:, None], close.shape)
+    previous_close = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    wilders = lambda values, periods, start=0: seededSmoothing(values, periods, 1.0 / periods, start)
+    exponential = lambda values, periods: seededSmoothing(values, periods, 2.0 / (periods + 1))
+    results = {}
+
+    results['atr_min'] = rollingExtreme(close, c.buy_parameter_atr_low_period, np.min, np.inf)
+
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - previous_close), np.abs(low - previous_close)))
+    atr = wilders(true_range, c.buy_parameter_atr_periods, start=1)
+    atr[0] = 0.0
+    results['atr'] = atr
+        # The first bar only seeds the previous close.
+
+    results['emaShort'] = exponential(close, c.buy_parameter_ema_short_periods)
+    results['emaLong'] = exponential(close, c.buy_parameter_ema_long_periods)
+
+    macd = wilders(close, MACD_FAST_PERIODS) - wilders(close, MACD_SLOW_PERIODS)
+    results['macd'] = macd
+    signal = wilders(macd, MACD_SIGNAL_PERIODS, start=MACD_SLOW_PERIODS - 1)
+    signal[:MACD_SLOW_PERIODS - 1] = 0.0
+    results['macd_signal'] = signal
+        # The signal line starts once the slow average has its first full window.
+
+    change = close - previous_close
+    gain = wilders(np.maximum(change, 0.0), c.buy_parameter_rsi_periods, start=1)
+    loss = wilders(np.maximum(-change, 0.0), c.buy_parameter_rsi_periods, start=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(loss == 0.0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+    rsi[0] = 0.0
+    results['rsi'] = rsi
+
+    highest = rollingExtreme(high, STO_PERIODS, np.max, -np.inf)
+    lowest = rollingExtreme(low, STO_PERIODS, np.min, np.inf)
+    denominator = highest - lowest
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fast = np.where(denominator == 0.0, 0.0, (close - lowest) / denominator)
+    fast[:STO_PERIODS - 1] = 0.0
+    results['sto'] = fast * 100.0
+
+    results['samples'] = samples
+    return results
+
+def computeIndicators(high, low, close):
+    # {key: panel} of every indicator, plus 'samples' (bars received so far), NaN where there is no bar.
+    high_panel, low_panel, close_panel = asPanel(high), asPanel(low), asPanel(close)
+    valid = ~np.isnan(close_panel)
+    order = stackBars(valid)
+    stacked_valid = np.arange(close_panel.shape[0])[:, None] < valid.sum(axis=0)
+
+    def stack(panel):
+        return np.where(stacked_valid, np.take_along_axis(panel, order, axis=0), np.nan)
+
+    indicators = {}
+    for key, stacked in stackedIndicators(stack(high_panel), stack(low_panel), stack(close_panel)).items():
+        panel = np.full(close_panel.shape, np.nan)
+        np.put_along_axis(panel, order, np.where(stacked_valid, stacked, np.nan), axis=0)
+        indicators[key] = likeInput(panel, close)
+    return indicators
+
+def maskNotReady(indicators):
+    # Copy of computeIndicators' output with NaN wherever the indicator isn't ready yet.
+    samples = indicators['samples']
+    masked = {'samples': samples}
+    for key, ready in readyAfter().items():
+        values = indicators[key]
+        if isinstance(values, (pd.DataFrame, pd.Series)):
+            masked[key] = values.where(samples >= ready)
+        else:
+            masked[key] = np.where(samples >= ready, values, np.nan)
+    return masked
+
+def streamingIndicators(high, low, close):
+    # Same output as computeIndicators, from IndicatorEngine updated one bar at a time.
+    high_panel, low_panel, close_panel = asPanel(high), asPanel(low), asPanel(close)
+    bar_count, symbol_count = close_panel.shape
+    engine = IndicatorEngine(capacity=symbol_count)
+    slots = np.array([engine.slots.setdefault(column, engine.free_slots.pop()) for column in range(symbol_count)], dtype=np.int64)
+    outputs = {key: np.full(close_panel.shape, np.nan) for key in (*OUTPUT_COLUMNS, 'samples')}
+
+    for row in range(bar_count):
+        columns = np.flatnonzero(~np.isnan(close_panel[row]))
+        if not len(columns):
+            continue
+        rows = slots[columns]
+        engine.update(rows, high_panel[row, columns], low_panel[row, columns], close_panel[row, columns])
+        for key, column in OUTPUT_COLUMNS.items():
+            outputs[key][row, columns] = engine.current[rows, column]
+        outputs['samples'][row, columns] = engine.samples[rows]
+    return {key: likeInput(panel, close) for key, panel in outputs.items()}
+
+def parityCheck(high, low, close, rtol=1e-9, atol=1e-8):
+    # Largest absolute and relative difference of each indicator between computeIndicators
+    # and the bar-by-bar IndicatorEngine, and whether all values are within rtol / atol.
+    vectorized = computeIndicators(high, low, close)
+    streaming = streamingIndicators(high, low, close)
+    rows = []
+    for key in (*OUTPUT_COLUMNS, 'samples'):
+        expected = asPanel(streaming[key])
+        actual = asPanel(vectorized[key])
+        both = ~np.isnan(expected) & ~np.isnan(actual)
+        difference = np.abs(actual - expected)[both]
+        scale = np.abs(expected)[both]
+        rows.append({
+            'indicator': key,
+            'values': int(both.sum()),
+            'missing': int((np.isnan(expected) != np.isnan(actual)).sum()),
+            'max_abs_diff': float(difference.max()) if len(difference) else 0.0,
+            'max_rel_diff': float((difference / np.maximum(scale, np.finfo(float).tiny)).max()) if len(difference) else 0.0,
+            'within_tolerance': bool(np.all(difference <= atol + rtol * scale)) and not (np.isnan(expected) != np.isnan(actual)).any()
+        })
+    return pd.DataFrame(rows).set_index('indicator')
+
+# End researchIndicators.py
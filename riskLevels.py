@@ -0,0 +1,140 @@
+# Begin riskLevels.py
+
+# Batched stop loss and take profit levels for all ready symbols of a slice.
+#   OnData only passes the symbols whose consolidated bars completed since the last slice. Held
+#   positions without a new bar only have their trailing stop raised, through trail().
+#   Every stop loss / take profit method is linear in the price and the ATR:
+#       level = price * price multiplier + ATR * ATR multiplier
+#   so the multipliers are precomputed once from config.py, and RiskLevels.update() computes every
+#   method for every ready symbol as one (symbols x methods) array per side. A disabled method has
+#   NaN multipliers and never wins. The highest level of each side is the one used, as before, and
+#   the name of the method that produced it is kept for the order tags. Each side keeps the
+#   original max(): the same methods, in the same order, so ties go to the same method. The ATR
+#   take profit was never part of that max, so it isn't here either.
+#   Results are stored on each SymbolState and reused for the rest of the slice by shouldBuy
+#   (risk/reward and position sizing), shouldSell and the order tags.
+#
+#   A held position sells against the levels of the slice it was bought at (onBuyFill), not
+#   against levels recomputed around each new price. Its stop only moves up, with the trailing
+#   stop below the highest price since purchase.
+
+from AlgorithmImports import *
+import config as c
+import variables as v
+import numpy as np
+
+STOP_LOSS_METHODS = ('atr', 'fib_atr', 'trailing', 'percent')
+TAKE_PROFIT_METHODS = ('percent', 'fib_atr', 'trailing')
+    # Column order of each side's level arrays. On a tie the first method wins, like max().
+
+def _multipliers(enabled, price_multipliers, atr_multipliers):
+    price_multipliers = np.array(price_multipliers, dtype=np.float64)
+    atr_multipliers = np.array(atr_multipliers, dtype=np.float64)
+    disabled = ~np.array(enabled, dtype=bool)
+    price_multipliers[disabled] = np.nan
+    atr_multipliers[disabled] = np.nan
+    return price_multipliers, atr_multipliers
+
+class RiskLevels:
+    def __init__(self):
+        stop_loss_fibonacci_levels = c.sell_parameter_stop_loss_fibonacci_retracement_levels
+        take_profit_fibonacci_levels = c.sell_parameter_take_profit_fibonacci_retracement_levels
+
+        self.stop_loss_price_multipliers, self.stop_loss_atr_multipliers = _multipliers(
+            (
+                c.sell_condition_stop_loss_atr_price,
+                c.sell_condition_stop_loss_fibonacci_atr_price and bool(stop_loss_fibonacci_levels),
+                c.sell_condition_stop_loss_trailing_percent,
+                c.sell_condition_stop_loss_percent
+            ),
+            (
+                1.0, # Price - ATR * multiplier
+                1 - max(stop_loss_fibonacci_levels, default=0), # Lowest Fibonacci retracement below the price, plus one ATR
+                1 - c.sell_parameter_stop_loss_trailing_percent, # x% below the price
+                1 - c.sell_parameter_stop_loss_percent # Max loss %
+            ),
+            (-c.sell_parameter_stop_loss_price_atr_multiplier, 1.0, 0.0, 0.0)
+        )
+        self.take_profit_price_multipliers, self.take_profit_atr_multipliers = _multipliers(
+            (
+                c.sell_condition_take_profit_percent,
+                c.sell_condition_take_profit_fibonacci_atr_price and bool(take_profit_fibonacci_levels),
+                c.sell_condition_take_profit_trailing_percent
+            ),
+            (
+                1 + c.sell_parameter_take_profit_percent, # Fixed gain %
+                1 + min(take_profit_fibonacci_levels, default=0), # Lowest Fibonacci extension above the price, plus one ATR
+                1 + c.sell_parameter_take_profit_trailing_percent
+            ),
+            (0.0, 1.0, 0.0)
+        )
+        self.trailing_stop_multiplier = (
+            1 - c.sell_parameter_stop_loss_trailing_percent
+            if c.sell_condition_stop_loss_trailing_percent else None
+        )
+
+    def levels(self, prices, atr):
+        # (stop loss levels, take profit levels): (symbols x STOP_LOSS_METHODS) and (symbols x TAKE_PROFIT_METHODS) arrays.
+        stop_loss = np.outer(prices, self.stop_loss_price_multipliers) + np.outer(atr, self.stop_loss_atr_multipliers)
+        take_profit = np.outer(prices, self.take_profit_price_multipliers) + np.outer(atr, self.take_profit_atr_multipliers)
+        return stop_loss, take_profit
+
+    @staticmethod
+    def highest(levels):
+        # Highest enabled level of each row and the index of its method. NaN if all are disabled.
+        best = np.where(np.isnan(levels), -np.inf, levels).argmax(axis=1)
+        return np.fmax.reduce(levels, axis=1), best
+
+    def update(self, algorithm, states):
+        # Compute the levels of every state (with current_price set and indicators ready) in one pass.
+        count = len(states)
+        if not count:
+            return
+        prices = np.fromiter((state.current_price for state in states), dtype=np.float64, count=count)
+        atr = v.indicator_engine.currentValues([state.symbol for state in states], 'atr')
+
+        stop_loss, take_profit = self.levels(prices, atr)
+        stop_loss_max, stop_loss_method = self.highest(stop_loss)
+        take_profit_max, take_profit_method = self.highest(take_profit)
+        loss_risk = prices - stop_loss_max
+        profit_reward = take_profit_max - prices
+
+        for i, state in enumerate(states):
+            state.stop_loss_max_price = float(stop_loss_max[i])
+            state.take_profit_max_price = float(take_profit_max[i])
+            state.stop_loss_method = STOP_LOSS_METHODS[stop_loss_method[i]] if stop_loss_max[i] == stop_loss_max[i] else None
+            state.take_profit_method = TAKE_PROFIT_METHODS[take_profit_method[i]] if take_profit_max[i] == take_profit_max[i] else None
+                # None when every method of the side is disabled (NaN level).
+            state.max_loss_risk_per_share = float(loss_risk[i])
+            state.max_profit_reward_per_share = float(profit_reward[i])
+            if state.position_stop_loss_price is not None:
+                self.trail(state)
+
+    def trail(self, state):
+        # Raise a held position's stop with the trailing stop below its highest price since purchase.
+        if state.current_price > state.position_high_price:
+            state.position_high_price = state.current_price
+            if self.trailing_stop_multiplier is not None:
+                trailing_stop = state.position_high_price * self.trailing_stop_multiplier
+                if trailing_stop > state.position_stop_loss_price:
+                    state.position_stop_loss_price = trailing_stop
+                    state.position_stop_loss_method = 'trailing'
+
+    def onBuyFill(self, state, fill_price):
+        # A new position keeps the levels of the slice it was bought at. Adding to it keeps them.
+        if state.position_stop_loss_price is not None or state.stop_loss_max_price is None:
+            return
+        state.position_stop_loss_price = state.stop_loss_max_price
+        state.position_take_profit_price = state.take_profit_max_price
+        state.position_stop_loss_method = state.stop_loss_method
+        state.position_take_profit_method = state.take_profit_method
+        state.position_high_price = fill_price
+
+    def onPositionClosed(self, state):
+        state.position_stop_loss_price = None
+        state.position_take_profit_price = None
+        state.position_stop_loss_method = None
+        state.position_take_profit_method = None
+        state.position_high_price = None
+
+# End riskLevels.py
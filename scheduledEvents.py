@@ -0,0 +1,58 @@
+# Begin scheduledEvents.py
+
+# Periodic housekeeping, run by LEAN scheduled events (or the scheduler of localReplay.py)
+# instead of inside OnData, so a slice only does the work of the symbols it carries.
+#   Registered once in main.Initialize through ScheduledEventsHandler.schedule().
+
+from AlgorithmImports import *
+import config as c
+import variables as v
+
+class ScheduledEventsHandler:
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+
+    def schedule(self):
+        algorithm = self.algorithm
+
+        algorithm.Schedule.On(algorithm.DateRules.EveryDay(), algorithm.TimeRules.At(0, 0), self.resetDailyTransactions)
+            # Day trades are counted per day.
+
+        algorithm.Schedule.On(algorithm.DateRules.EveryDay(), algorithm.TimeRules.At(0, 0), self.refreshTradeBootstrap)
+            # The risk-adjusted Kelly Criterion is resampled from the latest trades once a day, see monteCarlo.py.
+
+        algorithm.Schedule.On(algorithm.DateRules.EveryDay(), algorithm.TimeRules.At(0, 0), self.logWarmupProgress)
+            # One warm-up progress line per day, instead of one per symbol per bar.
+
+        algorithm.Schedule.On(
+            algorithm.DateRules.EveryDay(),
+            algorithm.TimeRules.Every(timedelta(minutes=c.sector_exposure_refresh_minutes)),
+            self.refreshSectorExposure
+        ) # Revalue sector holdings at current prices. Fills update them immediately in between.
+
+        algorithm.Schedule.On(
+            algorithm.DateRules.EveryDay(),
+            algorithm.TimeRules.Every(timedelta(minutes=c.checkpoint_interval_minutes)),
+            self.saveCheckpoint
+        ) # Save all strategy state, so a restart only replays the bars since. See checkpoint.py.
+
+    def resetDailyTransactions(self):
+        v.daily_transactions.clear()
+
+    def refreshTradeBootstrap(self):
+        v.trade_bootstrap.refresh()
+
+    def logWarmupProgress(self):
+        if self.algorithm.IsWarmingUp:
+            v.log.info("scheduledEvents.logWarmupProgress", "Warming up indicators - {} / {} symbols ready", v.indicator_engine.readySymbolCount(), len(v.active_symbols))
+
+    def saveCheckpoint(self):
+        v.checkpoint.save(self.algorithm)
+
+    def refreshSectorExposure(self):
+        try:
+            v.sector_exposure.markToMarket(self.algorithm)
+        except Exception as e:
+            v.log.error("scheduledEvents.refreshSectorExposure", "Error on refreshSectorExposure: {}", e)
+
+# End scheduledEvents.py
@@ -1,45 +1,102 @@
 from AlgorithmImports import *
 import config as c
 import variables as v
+from symbolState import symbolState
 
-class sectorAnalysis:
-# Functions for getting sector info
-    
-    def getUniquePortfolioSectors(self):
-    # Gets the number of sectors in the portfolio.
-        try:
-            for symbol in self.Portfolio.Keys: # Iterate over all symbols in portfolio
-                if self.Portfolio[symbol].Invested: # If the portfolio is invested in this symbol
-                    v.symbol_sector[symbol] = symbol.AssetClassification.MorningstarSectorCode # Get the sector for this symbol
-                    v.unique_portfolio_sectors.add(v.symbol_sector[symbol]) # Add sector to the distinct list
-            return v.unique_portfolio_sectors # Return the final list of distinct portfolio sectors
-        
-        except Exception as e:
-            self.Error(f"Error on getUniquePortfolioSectors: {str(e)}")
-            return
-
-    def calculatePortfolioValueForSector (self, sector):
-    # Gets the total portfolio value for a provided sector 
-        try:    
-            for symbol in self.Portfolio.Keys: # Iterate over all symbols in portfolio
-                if self.Portfolio[symbol].Invested and self.Securities[symbol].Fundamentals.AssetClassification.MorningstarSectorCode == sector: # If the portfolio is invested in this symbol, and the sector for this symbol matches the sector being checked
-                    v.sector_portfolio_value[sector] += self.Portfolio[symbol].HoldingsValue # Adds the value of portfolio holdings for this symbol to the v.sector_portfolio_value[sector]
-            return v.sector_portfolio_value[sector] # Returns the total portfolio value for the provided sector
-        
-        except Exception as e:
-            self.Error(f"Error on calculatePortfolioValueForSector : {str(e)}")
-            return   
-
-    def calculateSymbolCountsPerSector(self):
-    # Returns a list of symbol counts for each sector in the current portfolio.
-        try:
-            for symbol in self.Portfolio.Keys: # Iterate over all symbols in portfolio
-                if self.Portfolio[symbol].Invested: # If the portfolio is invested in this symbol
-                    v.symbol_sector[symbol] = self.Securities[symbol].Fundamentals.AssetClassification.MorningstarSectorCode # Get the sector for this symbol
-                    if v.symbol_sector[symbol]: # If sector was returned
-                        v.symbol_counts_per_sector[v.symbol_sector[symbol]] = v.symbol_counts_per_sector.get(v.symbol_sector[symbol], 0) + 1 # Increment the number of symbols for this sector 
-            return v.symbol_counts_per_sector # Return the  list of symbol counts per sector
-        
-        except Exception as e:
-            self.Error(f"Error on calculateSymbolCountsPerSector: {str(e)}")
-            return
+class SectorPosition:
+    # Holding of one symbol as seen by the SectorExposureTracker.
+    __slots__ = ('sector', 'quantity', 'price')
+
+    def __init__(self, sector):
+        self.sector = sector
+        self.quantity = 0
+        self.price = 0.0
+
+class SectorExposureTracker:
+# Keeps per-sector holdings value, symbol counts and portfolio percentages up to date incrementally.
+#   onFill applies each fill's quantity and price delta in O(1), and markToMarket periodically revalues
+#   the held symbols at their current prices, so nothing scans the whole Portfolio or reads
+#   Fundamentals.AssetClassification for every holding on each fill.
+#   The sector of a symbol is read once and cached on its SymbolState.
+
+    def __init__(self):
+        self.positions = {} # Symbol -> SectorPosition, for invested symbols only
+        self.sector_value = {} # Sector -> holdings value
+        self.sector_symbol_count = {} # Sector -> number of invested symbols
+        self.total_portfolio_value = 0.0 # Portfolio.TotalPortfolioValue as of the last update
+
+    def sectorOf(self, algorithm, symbol):
+    # Gets the sector for this symbol, reading it from Fundamentals only the first time.
+        state = symbolState(symbol)
+        if state.sector is None:
+            state.sector = algorithm.Securities[symbol].Fundamentals.AssetClassification.MorningstarSectorCode
+        return state.sector
+
+    def onFill(self, algorithm, symbol, fill_qty, fill_price):
+    # Applies one fill (or partial fill) to the symbol's position and its sector.
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = SectorPosition(self.sectorOf(algorithm, symbol))
+            self.sector_symbol_count[position.sector] = self.sector_symbol_count.get(position.sector, 0) + 1
+                # Symbol newly invested: count it in its sector.
+        sector = position.sector
+
+        old_value = position.quantity * position.price
+        position.quantity += fill_qty
+        position.price = fill_price
+        self.sector_value[sector] = self.sector_value.get(sector, 0.0) + position.quantity * position.price - old_value
+            # Holdings value delta of this fill, at the fill price.
+
+        if position.quantity == 0:
+            del self.positions[symbol]
+            self.sector_symbol_count[sector] -= 1
+            if self.sector_symbol_count[sector] == 0:
+                del self.sector_symbol_count[sector]
+                del self.sector_value[sector]
+                    # No holdings left in the sector: drop it rather than keep a rounding residue.
+
+        self.total_portfolio_value = algorithm.Portfolio.TotalPortfolioValue
+
+    def markToMarket(self, algorithm):
+    # Revalues the held symbols at their current prices. Runs as a scheduled event, see scheduledEvents.py.
+        for symbol, position in self.positions.items():
+            price = algorithm.Securities[symbol].Price if symbol in algorithm.Securities else 0
+            if price:
+                self.sector_value[position.sector] += position.quantity * (price - position.price)
+                position.price = price
+        self.total_portfolio_value = algorithm.Portfolio.TotalPortfolioValue
+
+    def rebuild(self, algorithm):
+    # Recomputes everything with one full Portfolio scan, e.g. to pick up holdings that existed before the algorithm started.
+        self.positions = {}
+        self.sector_value = {}
+        self.sector_symbol_count = {}
+        for symbol, holding in algorithm.Portfolio.items():
+            if holding.Invested:
+                position = self.positions[symbol] = SectorPosition(self.sectorOf(algorithm, symbol))
+                position.quantity = holding.Quantity
+                position.price = holding.Price
+                self.sector_value[position.sector] = self.sector_value.get(position.sector, 0.0) + holding.HoldingsValue
+                self.sector_symbol_count[position.sector] = self.sector_symbol_count.get(position.sector, 0) + 1
+        self.total_portfolio_value = algorithm.Portfolio.TotalPortfolioValue
+
+    @property
+    def invested_symbols(self):
+        return self.positions.keys()
+
+    @property
+    def sectors(self):
+        return self.sector_value.keys()
+
+    def sectorPercent(self, sector):
+    # Portfolio percent invested in the sector, 0 if the sector isn't held.
+        if not self.total_portfolio_value:
+            return 0.0
+        return self.sector_value.get(sector, 0.0) / self.total_portfolio_value
+
+    def percentPerSector(self):
+        return {sector: self.sectorPercent(sector) for sector in self.sector_value}
+
+    def biggestSector(self):
+    # Sector with the highest portfolio percentage, or None.
+        return max(self.sector_value, key=self.sector_value.get, default=None)
@@ -0,0 +1,97 @@
+# Begin symbolState.py
+
+# Per-symbol state store.
+#   Everything the algorithm tracks for one symbol lives in a single SymbolState record in
+#   v.symbol_states, instead of one entry in each of ~30 parallel dicts in variables.py.
+#   Handlers fetch the record once per symbol per slice and then read plain attributes, so a slice
+#   costs one hash lookup on the LEAN Symbol per symbol rather than one per value.
+#   __slots__ keeps each record a fixed-size object without a per-instance __dict__, which keeps
+#   memory small for large universes.
+
+from AlgorithmImports import *
+import variables as v
+
+class SymbolState:
+    __slots__ = (
+        'symbol',
+        'sector',
+        'indicators', # {key: indicator view} backed by v.indicator_engine, see indicatorEngine.py.
+        'consolidators', # {bar period: consolidator}, the symbol's consolidation cascade, finest first. See consolidationCascade.py.
+        'warmup_bar_count', # Bars of the coarsest indicator timeframe received, to log warm-up progress.
+
+        # Prices, updated with each OnData slice.
+        'current_price',
+        'current_close_price',
+
+        # Buy Conditions, updated through shouldBuy.
+        'buy_limit_price',
+        'position_size_share_qty_to_buy',
+        'max_loss_risk_per_share',
+        'max_profit_reward_per_share',
+
+        # Sell Conditions, updated for the ready symbols with new bars once per slice by v.risk_levels, see riskLevels.py.
+        'stop_loss_max_price',
+        'stop_loss_method', # Name of the stop loss method that set stop_loss_max_price, see riskLevels.STOP_LOSS_METHODS.
+        'take_profit_max_price',
+        'take_profit_method', # See riskLevels.TAKE_PROFIT_METHODS.
+
+        # Held position's levels, set when it was bought. The stop trails the highest price since.
+        'position_stop_loss_price',
+        'position_stop_loss_method',
+        'position_take_profit_price',
+        'position_take_profit_method',
+        'position_high_price',
+
+        # Orders
+        'latest_order_ticket',
+        'open_order_ticket',
+    )
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.sector = None
+        self.indicators = None
+        self.consolidators = {}
+        self.warmup_bar_count = 0
+
+        self.current_price = None
+        self.current_close_price = None
+
+        self.buy_limit_price = None
+        self.position_size_share_qty_to_buy = 0
+        self.max_loss_risk_per_share = None
+        self.max_profit_reward_per_share = None
+
+        self.stop_loss_max_price = None
+        self.stop_loss_method = None
+        self.take_profit_max_price = None
+        self.take_profit_method = None
+
+        self.position_stop_loss_price = None
+        self.position_stop_loss_method = None
+        self.position_take_profit_price = None
+        self.position_take_profit_method = None
+        self.position_high_price = None
+
+        self.latest_order_ticket = None
+        self.open_order_ticket = None
+
+def symbolState(symbol):
+    # Returns the symbol's state record, creating it on first use.
+    state = v.symbol_states.get(symbol)
+    if state is None:
+        state = v.symbol_states[symbol] = SymbolState(symbol)
+    return state
+
+def releaseSymbolState(algorithm, symbol):
+    # Drops the record of a symbol removed from the universe, unless a position or order still needs it.
+    state = v.symbol_states.get(symbol)
+    if state is None:
+        return
+    state.indicators = None
+    state.consolidators = {}
+    open_order = state.open_order_ticket is not None and not state.open_order_ticket.OrderClosed
+    if not algorithm.Portfolio[symbol].Invested and not open_order:
+        del v.symbol_states[symbol]
+
+# End symbolState.py
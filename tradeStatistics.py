@@ -0,0 +1,213 @@
+# Begin tradeStatistics.py
+
+# Streaming trade statistics over a rolling window of trades, for Kelly Criterion position sizing.
+#   Every closed sell order is one trade. Its result is the return on the shares sold, against the
+#   algorithm's own average cost basis built from its fills (not Portfolio.AveragePrice at the time
+#   of the event). Partial fills of one order are combined into a single trade.
+#   Results are kept in fixed-size ring buffers for three scopes: global, per symbol and per sector.
+#   Each buffer keeps running sums, so adding a trade and reading win rate, payoff ratio,
+#   expectancy or Kelly fraction are O(1) and never rescan trade history.
+
+from AlgorithmImports import *
+import config as c
+import numpy as np
+
+SCOPES = ('global', 'symbol', 'sector')
+
+class RollingTradeStats:
+    # Statistics of the last `window` trade returns.
+    def __init__(self, window):
+        self.returns = np.zeros(window, dtype=np.float64) # Ring buffer
+        self.next = 0
+        self.count = 0
+        self.win_count = 0
+        self.win_sum = 0.0
+        self.loss_sum = 0.0 # Sum of the absolute losses
+
+    def checkpointState(self):
+        return {
+            'returns': self.returns.copy(),
+            'next': self.next,
+            'count': self.count,
+            'win_count': self.win_count,
+            'win_sum': self.win_sum,
+            'loss_sum': self.loss_sum
+        }
+
+    @classmethod
+    def fromCheckpoint(cls, state, window):
+        if len(state['returns']) != window:
+            raise ValueError(f"RollingTradeStats checkpoint window {len(state['returns'])}, expected {window}")
+        stats = cls(window)
+        stats.returns[:] = state['returns']
+        stats.next = state['next']
+        stats.count = state['count']
+        stats.win_count = state['win_count']
+        stats.win_sum = state['win_sum']
+        stats.loss_sum = state['loss_sum']
+        return stats
+
+    def add(self, trade_return):
+        if self.count == len(self.returns):
+            self.remove(float(self.returns[self.next]))
+                # Window full: the oldest trade drops out.
+        else:
+            self.count += 1
+        self.returns[self.next] = trade_return
+        self.next = (self.next + 1) % len(self.returns)
+        if trade_return > 0:
+            self.win_count += 1
+            self.win_sum += trade_return
+        else:
+            self.loss_sum -= trade_return
+
+    def remove(self, trade_return):
+        if trade_return > 0:
+            self.win_count -= 1
+            self.win_sum -= trade_return
+        else:
+            self.loss_sum += trade_return
+
+    def values(self):
+        # The window's trade returns, oldest first.
+        if self.count < len(self.returns):
+            return self.returns[:self.count].copy()
+        return np.roll(self.returns, -self.next)
+
+    @property
+    def win_rate(self):
+        return self.win_count / self.count if self.count else 0.0
+
+    @property
+    def payoff_ratio(self):
+        # Average win / average loss. 'inf' without losses.
+        loss_count = self.count - self.win_count
+        if not loss_count or self.loss_sum <= 0:
+            return float('inf') if self.win_count else 0.0
+        average_win = self.win_sum / self.win_count if self.win_count else 0.0
+        return average_win / (self.loss_sum / loss_count)
+
+    @property
+    def expectancy(self):
+        # Average return per trade.
+        return (self.win_sum - self.loss_sum) / self.count if self.count else 0.0
+
+    @property
+    def kelly(self):
+        # Kelly fraction: W - (1 - W) / R.
+        payoff_ratio = self.payoff_ratio
+        if payoff_ratio == 0:
+            return 0.0
+            # No wins (or no trades): don't size by Kelly at all.
+        return self.win_rate - (1 - self.win_rate) / payoff_ratio
+
+    def summary(self):
+        return {
+            "Trades": self.count,
+            "WinRate": self.win_rate,
+            "PayoffRatio": self.payoff_ratio,
+            "Expectancy": self.expectancy,
+            "Kelly": self.kelly
+        }
+
+class TradeStatistics:
+    CHECKPOINT_VERSION = 1 # Bump when checkpointState() changes shape, see checkpoint.py.
+
+    def __init__(self, window=None):
+        self.window = window or c.trade_statistics_window
+        self.global_stats = RollingTradeStats(self.window)
+        self.symbol_stats = {} # Symbol -> RollingTradeStats
+        self.sector_stats = {} # Sector -> RollingTradeStats
+        self.cost_basis = {} # Symbol -> [quantity held, average cost per share]
+        self.open_trades = {} # Order id -> [symbol, sector, realized profit, cost of the shares sold]
+
+    def checkpointState(self):
+        # Plain copy of the statistics for checkpoint.py. Trades of orders still open aren't included:
+        # order ids aren't kept across restarts, so their later fills would be added to other orders' trades.
+        return {
+            'version': self.CHECKPOINT_VERSION,
+            'window': self.window,
+            'global_stats': self.global_stats.checkpointState(),
+            'symbol_stats': {symbol: stats.checkpointState() for symbol, stats in self.symbol_stats.items()},
+            'sector_stats': {sector: stats.checkpointState() for sector, stats in self.sector_stats.items()},
+            'cost_basis': {symbol: list(position) for symbol, position in self.cost_basis.items()}
+        }
+
+    @classmethod
+    def fromCheckpoint(cls, state, window=None):
+        # Statistics restored from checkpointState(). Raises ValueError if the state doesn't fit this
+        # version or the configured window.
+        if state.get('version') != cls.CHECKPOINT_VERSION:
+            raise ValueError(f"TradeStatistics checkpoint version {state.get('version')}, expected {cls.CHECKPOINT_VERSION}")
+        statistics = cls(window)
+        if state['window'] != statistics.window:
+            raise ValueError(f"TradeStatistics checkpoint window {state['window']}, expected {statistics.window}")
+        statistics.global_stats = RollingTradeStats.fromCheckpoint(state['global_stats'], statistics.window)
+        statistics.symbol_stats = {symbol: RollingTradeStats.fromCheckpoint(stats, statistics.window) for symbol, stats in state['symbol_stats'].items()}
+        statistics.sector_stats = {sector: RollingTradeStats.fromCheckpoint(stats, statistics.window) for sector, stats in state['sector_stats'].items()}
+        statistics.cost_basis = {symbol: list(position) for symbol, position in state['cost_basis'].items()}
+        return statistics
+
+    def scope(self, scope, symbol=None, sector=None):
+        # RollingTradeStats of a scope, or None if it has no trades yet.
+        if scope == 'symbol':
+            return self.symbol_stats.get(symbol)
+        if scope == 'sector':
+            return self.sector_stats.get(sector)
+        return self.global_stats
+
+    def sizingStats(self, scope, symbol=None, sector=None, min_trades=None):
+        # RollingTradeStats of the scope, falling back to the global one while the scope has fewer
+        # than min_trades trades. None while even the global scope has too few.
+        min_trades = c.trade_statistics_min_trades if min_trades is None else min_trades
+        stats = self.scope(scope, symbol, sector)
+        if stats is None or stats.count < min_trades:
+            stats = self.global_stats
+        if stats.count < min_trades:
+            return None
+        return stats
+
+    def kellyFraction(self, scope, symbol=None, sector=None, min_trades=None):
+        # Point estimate of the Kelly fraction of the scope, see sizingStats. None while too few trades.
+        stats = self.sizingStats(scope, symbol, sector, min_trades)
+        return stats.kelly if stats is not None else None
+
+    def onFill(self, order_id, symbol, sector, fill_qty, fill_price):
+        # Applies one fill to the cost basis. Sells realize profit against it.
+        position = self.cost_basis.get(symbol)
+        if position is None:
+            position = self.cost_basis[symbol] = [0, 0.0]
+        quantity, average_cost = position
+        if fill_qty > 0:
+            position[1] = (quantity * average_cost + fill_qty * fill_price) / (quantity + fill_qty) if quantity + fill_qty else 0.0
+            position[0] = quantity + fill_qty
+            return
+        sold = min(-fill_qty, quantity)
+        position[0] = quantity + fill_qty
+        if position[0] <= 0:
+            del self.cost_basis[symbol]
+        if sold <= 0:
+            return
+            # Nothing held to realize against, e.g. holdings from before the algorithm started.
+        trade = self.open_trades.get(order_id)
+        if trade is None:
+            trade = self.open_trades[order_id] = [symbol, sector, 0.0, 0.0]
+        trade[2] += (fill_price - average_cost) * sold
+        trade[3] += average_cost * sold
+
+    def onOrderClosed(self, order_id):
+        # Records the order's combined sell fills as one trade. Returns its return, or None.
+        trade = self.open_trades.pop(order_id, None)
+        if trade is None or trade[3] <= 0:
+            return None
+        symbol, sector, profit, cost = trade
+        trade_return = profit / cost
+        self.global_stats.add(trade_return)
+        for stats, key in ((self.symbol_stats, symbol), (self.sector_stats, sector)):
+            rolling = stats.get(key)
+            if rolling is None:
+                rolling = stats[key] = RollingTradeStats(self.window)
+            rolling.add(trade_return)
+        return trade_return
+
+# End tradeStatistics.py
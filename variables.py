@@ -6,62 +6,34 @@ import collections
 # Algorithm Initialization
 day_trade_counter = 0  # Counts day trades
 day_trade_dates = collections.deque(maxlen=5)  # Dates of last 5 day trades
-last_increment_day = None  # Last day warmup counter was incremented
-indicator_warmup_counter = {}  # Tracks warmup progress
-daily_transactions = {}  # Track daily buys and sells for each security
+daily_transactions = {}  # Track daily buys and sells for each security, cleared daily by scheduledEvents.py
 current_date = {}
 
-current_price = {} 
-current_close_price = {}
-indicators = {}
-consolidators = {}
-position_size_chart = {}
-
-# Buy Conditions
-buy_limit_price = {} # Updated with each OnData slice through shouldBuy.
-
-# Sell Conditions
-max_loss_risk_per_share = {}
-max_profit_reward_per_share = {}
-stop_loss_atr_price = {}
-stop_loss_fib_atr_price = {}
-stop_loss_fibonacci_prices = {}
-stop_loss_max_price = {}
-stop_loss_percent_price = {}
-stop_loss_trailing_price = {}
-take_profit_atr_price = {}
-take_profit_fib_atr_price = {}
-take_profit_fibonacci_prices = {}
-take_profit_max_price = {}
-take_profit_percent_price = {}
-take_profit_trailing_price = {}
+symbol_states = {} # Symbol -> SymbolState holding all per-symbol values, see symbolState.py.
+log = None # AlgorithmLogger every Debug/Error call goes through, created in main.Initialize.
+indicator_engine = None # MultiTimeframeIndicatorEngine holding every symbol's indicator state, created in main.Initialize.
+checkpoint = None # StrategyCheckpoint saving and restoring all strategy state, created in main.Initialize.
+chart_store = None # ChartStore buffering chart rows for the Object Store, created in main.Initialize.
+persistence_writer = None # PersistenceWriter saving to the Object Store on a background thread, created in main.Initialize.
+profiler = None # HandlerProfiler timing the entry points, created in main.Initialize when c.profiling_enabled.
 
 # Symbols
-unique_portfolio_symbols = set()
-unique_portfolio_sectors = set()
 symbol_history = {}
-sector_portfolio_value = {}
-symbol_counts_per_sector = {}
-symbol_sector = {}
-portfolio_percent_per_sector = {}
-biggest_portfolio_sector = {}
+sector_exposure = None # SectorExposureTracker of per-sector holdings value, counts and percents, created in main.Initialize.
 max_symbol_price = 0
-active_symbols = {}
+active_symbols = set()
+dirty_symbols = set() # Symbols with a consolidated bar since the last OnData slice, evaluated and cleared by OnData.
 
 # Orders
 order_ticket = None
-open_order_tickets = {}
-position_size_share_qty_to_buy = {}
-latest_order_ticket = {}
+open_orders = None # OpenOrderIndex of working orders per symbol and reserved cash, created in main.Initialize.
+risk_levels = None # RiskLevels computing every ready symbol's stop loss / take profit levels per slice, created in main.Initialize.
+order_expiry = None # OrderExpiryQueue of pending limit orders by expiry time, created in main.Initialize.
+order_tags = None # OrderTagJournal mapping compact order tags to condition snapshots, created in main.Initialize.
+buy_plan = None # BuyPlan of the enabled buy conditions, compiled in main.Initialize.
 
 # Profit/Loss Sell Results
-average_buy_price = {}
-trade_win_count = 0
-trade_loss_count = 0
-total_profit = 0
-total_loss = 0
-kelly_criterion = 0
-win_probability = 0
-win_loss_ratio = 0
+trade_statistics = None # TradeStatistics: rolling win rate, payoff ratio and Kelly Criterion per scope, created in main.Initialize.
+trade_bootstrap = None # TradeBootstrap: daily Monte Carlo risk-adjusted Kelly Criterion per scope, created in main.Initialize.
 
 # End variables.py
\ No newline at end of file
@@ -0,0 +1,228 @@
+# Begin walkForward.py
+
+# Parallel walk-forward analysis over config.py parameters, using the parameterSweep pool.
+#   Splits the bar history into rolling windows: each in-sample period is followed by an
+#   out-of-sample period of the same length as the step, e.g. 180 days in / 60 days out, moved
+#   forward 60 days at a time (--anchored keeps every in-sample period starting at the beginning).
+#   Every parameter variant is backtested on every in-sample window; the best one by --objective is
+#   then backtested on the window's out-of-sample period, which it has never seen.
+#
+#   All backtests run on one process pool whose workers memory-map the same .npy bar arrays
+#   (see parameterSweep.py). A window's out-of-sample run is queued as soon as its in-sample runs
+#   are done, while other windows are still optimizing. Each backtest warms up on the bars before
+#   its start, so out-of-sample runs start with ready indicators.
+#
+#   Writes:
+#       <out>_windows.csv    one row per window: dates, chosen parameters, in-sample score, out-of-sample results
+#       <out>_equity.csv     out-of-sample equity curves stitched into one, compounding window by window
+#       <out>_in_sample.csv  every in-sample result, for inspecting how stable the optimum is
+#
+#   Usage:
+#       python walkForward.py --bars data/ --all-symbols --in-sample-days 180 --out-of-sample-days 60 \
+#           --grid '{"buy_parameter_ema_short_periods": [5, 9, 12], "buy_parameter_rsi_min_threshold": [40, 50]}'
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import localReplay
+import parameterSweep
+
+OBJECTIVES = ('total_return', 'return_over_drawdown', 'sharpe')
+BAR_EPSILON = timedelta(seconds=1)
+    # Bar times are whole seconds: a backtest ending one second before a period end excludes that bar.
+WINDOW_COLUMNS = (
+    'window', 'in_sample_start', 'in_sample_end', 'out_of_sample_start', 'out_of_sample_end',
+    'in_sample_score', 'total_return', 'max_drawdown', 'trade_count', 'error_count', 'error'
+) # Columns written before the chosen parameter columns.
+
+def walkForwardWindows(first_time, last_time, in_sample, out_of_sample, anchored=False):
+    # [(in-sample start, in-sample end, out-of-sample start, out-of-sample end)], moving forward by out_of_sample.
+    # Periods are half-open: [start, end), so the bar at an in-sample end belongs to the out-of-sample period.
+    windows = []
+    start = first_time
+    while start + in_sample < last_time:
+        in_sample_end = start + in_sample
+        out_of_sample_end = min(in_sample_end + out_of_sample, last_time + BAR_EPSILON)
+        windows.append((first_time if anchored else start, in_sample_end, in_sample_end, out_of_sample_end))
+        start += out_of_sample
+    return windows
+
+def score(summary, equity, objective):
+    # Higher is better. 'sharpe' is the mean / standard deviation of per-slice returns (not annualized).
+    if objective == 'total_return':
+        return summary['total_return']
+    if objective == 'return_over_drawdown':
+        return summary['total_return'] / max(summary['max_drawdown'], 1e-9)
+    if objective == 'sharpe':
+        returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(0)
+        deviation = returns.std() if len(returns) else 0.0
+        return float(returns.mean() / deviation) if deviation > 0 else 0.0
+    raise ValueError(f"Unknown objective: {objective}")
+
+def runWindowTask(task):
+    # Worker: one in-sample or out-of-sample backtest of one window.
+    kind, window_id, variant_id, params, start, end, objective = task
+    started = time.perf_counter()
+    row = {'window': window_id, 'variant': variant_id, **params}
+    equity, times = np.zeros(0), []
+    try:
+        result = parameterSweep.replayVariant(params, start, end - BAR_EPSILON)
+        summary = result.summary()
+        equity = result.tradingEquity()
+        times = [str(t) for t in result.times[result.warmup_slices:]]
+        row.update(
+            score=score(summary, equity, objective),
+            total_return=summary['total_return'],
+            max_drawdown=summary['max_drawdown'],
+            trade_count=summary['trade_count'],
+            error_count=summary['error_count'],
+            error=''
+        )
+    except Exception as e:
+        row.update(score=float('nan'), total_return=float('nan'), max_drawdown=float('nan'), trade_count=0, error_count=1, error=str(e))
+    row['wall_time_s'] = time.perf_counter() - started
+    return row, (times, equity) if kind == 'out_of_sample' else None
+
+def bestVariant(rows, min_trades=0):
+    # In-sample row with the highest score, preferring variants with at least min_trades trades.
+    valid = [row for row in rows if not row['error'] and row['score'] == row['score']]
+    qualified = [row for row in valid if row['trade_count'] >= min_trades] or valid
+    return max(qualified, key=lambda row: row['score'], default=None)
+
+def stitchEquity(curves, starting_value=1.0):
+    # [(window, time, equity)] of consecutive out-of-sample curves, each rescaled to start where
+    # the previous one ended, so returns compound across windows.
+    stitched = []
+    value = starting_value
+    for window_id, (times, equity) in curves:
+        if not len(equity) or not equity[0]:
+            continue
+        scaled = value * np.asarray(equity) / equity[0]
+        stitched.extend(zip([window_id] * len(times), times, scaled))
+        value = float(scaled[-1])
+    return stitched
+
+def runWalkForward(bars_path, variants, in_sample, out_of_sample, anchored=False, objective='total_return',
+                   min_trades=0, warmup=timedelta(days=45), processes=None, options=None):
+    # Returns (window rows, stitched equity rows, in-sample rows).
+    options = options or {}
+    with tempfile.TemporaryDirectory(prefix='walk-forward-bars-') as directory:
+        shared = parameterSweep.shareBars(bars_path, directory)
+        times = localReplay.loadBars(shared, mmap_mode='r').times.astype(datetime)
+        windows = walkForwardWindows(times[0] + warmup, times[-1], in_sample, out_of_sample, anchored)
+            # The first window starts after `warmup`, so its indicators can warm up on the bars before it.
+        if not windows:
+            raise ValueError("History too short for one in-sample and out-of-sample window")
+
+        in_sample_rows = {window_id: [] for window_id in range(len(windows))}
+        out_of_sample_results = {}
+        with parameterSweep.createPool(shared, processes, options, directory) as pool:
+            tasks = [
+                ('in_sample', window_id, variant_id, params, window[0], window[1], objective)
+                for window_id, window in enumerate(windows) for variant_id, params in enumerate(variants)
+            ]
+            for row, _ in pool.imap_unordered(runWindowTask, tasks):
+                window_rows = in_sample_rows[row['window']]
+                window_rows.append(row)
+                if len(window_rows) == len(variants):
+                    window_id = row['window']
+                    best = bestVariant(window_rows, min_trades)
+                    if best is not None:
+                        window = windows[window_id]
+                        out_of_sample_results[window_id] = (best, pool.apply_async(
+                            runWindowTask,
+                            (('out_of_sample', window_id, best['variant'], variants[best['variant']], window[2], window[3], objective),)
+                        )) # Optimized: run this window out-of-sample while the others are still optimizing.
+            out_of_sample_results = {
+                window_id: (best, pending.get()) for window_id, (best, pending) in out_of_sample_results.items()
+            }
+
+    window_rows, curves = [], []
+    for window_id, window in enumerate(windows):
+        row = {
+            'window': window_id,
+            'in_sample_start': str(window[0]), 'in_sample_end': str(window[1]),
+            'out_of_sample_start': str(window[2]), 'out_of_sample_end': str(window[3])
+        }
+        if window_id in out_of_sample_results:
+            best, (result_row, curve) = out_of_sample_results[window_id]
+            row.update(in_sample_score=best['score'], **{name: result_row[name] for name in WINDOW_COLUMNS if name in result_row and name != 'window'})
+            row.update(variants[best['variant']])
+            curves.append((window_id, curve))
+        else:
+            row.update(error="No valid in-sample result")
+        window_rows.append(row)
+
+    all_in_sample = sorted((row for rows in in_sample_rows.values() for row in rows), key=lambda row: (row['window'], row['variant']))
+    return window_rows, stitchEquity(curves), all_in_sample
+
+def writeCsv(path, rows, leading_columns):
+    columns = list(leading_columns)
+    for row in rows:
+        columns.extend(name for name in row if name not in columns)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({name: json.dumps(value) if isinstance(value, (list, dict)) else value for name, value in row.items()})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel walk-forward analysis of config.py parameters with the local replay harness.")
+    parser.add_argument('--bars', required=True, help="Bar files, see localReplay.py.")
+    parser.add_argument('--grid', help="JSON {name: [values]} grid.")
+    parser.add_argument('--random', help="JSON {name: [low, high] or {\"choices\": [...]}} random space.")
+    parser.add_argument('--samples', type=int, default=20, help="Number of random variants.")
+    parser.add_argument('--seed', type=int, help="Seed for random variants.")
+    parser.add_argument('--in-sample-days', type=int, default=180, help="Calendar days optimized per window.")
+    parser.add_argument('--out-of-sample-days', type=int, default=60, help="Calendar days tested after each in-sample period, and the step between windows.")
+    parser.add_argument('--anchored', action='store_true', help="Start every in-sample period at the beginning of the history.")
+    parser.add_argument('--warmup-days', type=int, default=45, help="Calendar days of history kept before the first window for the warm-up.")
+    parser.add_argument('--objective', choices=OBJECTIVES, default='total_return', help="In-sample score to maximize.")
+    parser.add_argument('--min-trades', type=int, default=0, help="Prefer in-sample variants with at least this many trades.")
+    parser.add_argument('--all-symbols', action='store_true', help="Use every symbol in the bar files as a static universe.")
+    parser.add_argument('--processes', type=int, help="Worker processes (default: CPU count).")
+    parser.add_argument('--out', default='walk_forward', help="Output path prefix.")
+    parser.add_argument('--fundamentals', help="Fundamentals CSV for the dynamic universe, see localReplay.py.")
+    parser.add_argument('--fundamental-cache', help="Directory of memory-mapped fundamental snapshots, shared by all workers and runs.")
+    args = parser.parse_args(argv)
+
+    if args.grid:
+        variants = parameterSweep.gridSpace(json.loads(args.grid))
+    elif args.random:
+        variants = parameterSweep.randomSpace(json.loads(args.random), args.samples, args.seed)
+    else:
+        parser.error("one of --grid or --random is required")
+
+    options = {
+        'all_symbols': args.all_symbols,
+        'fundamentals': args.fundamentals, 'fundamental_cache': args.fundamental_cache
+    }
+    window_rows, equity_rows, in_sample_rows = runWalkForward(
+        args.bars, variants, timedelta(days=args.in_sample_days), timedelta(days=args.out_of_sample_days),
+        args.anchored, args.objective, args.min_trades, timedelta(days=args.warmup_days), args.processes, options
+    )
+
+    directory = os.path.dirname(args.out)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    writeCsv(f"{args.out}_windows.csv", window_rows, WINDOW_COLUMNS)
+    writeCsv(f"{args.out}_in_sample.csv", in_sample_rows, ('window', 'variant', 'score') + parameterSweep.RESULT_COLUMNS[1:])
+    with open(f"{args.out}_equity.csv", 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('window', 'time', 'equity'))
+        writer.writerows(equity_rows)
+
+    total_return = equity_rows[-1][2] - 1 if equity_rows else 0.0
+    print(f"{len(window_rows)} windows written to {args.out}_windows.csv. Stitched out-of-sample return: {total_return:.2%}")
+
+if __name__ == '__main__':
+    main()
+
+# End walkForward.py